@@ -1,4 +1,7 @@
 #include <string.h>
+#include <stdbool.h>
+#include <stdio.h>
+#include <stdlib.h>
 #include <sys/param.h>
 #include "freertos/FreeRTOS.h"
 #include "freertos/task.h"
@@ -24,6 +27,27 @@
 //#define HOST_IP_ADDR   "172.18.21.125" // <--- PON LA IP DE TU LAPTOP AQUI
 #define PORT           3333
 
+/* --- MODO TRAMA ---
+ * 0: reenvia el texto de la UART tal cual (compatible con interfaces antiguas).
+ * 1: antepone a cada datagrama una cabecera de 8 bytes (little-endian):
+ *    magia 0xEC | tipo | secuencia uint16 | contador uint32
+ *    'contador' cuenta los '\n' enviados antes de este datagrama y el bit TRAMA_CONTINUA
+ *    de 'tipo' indica que el texto empieza a mitad de una linea. Con esto el PC detecta
+ *    datagramas perdidos/desordenados y recompone las lineas partidas (protocolo.py).
+ * 2: el puente interpreta las lineas de la UART y envia tramas binarias con la misma
+ *    cabecera (tipo TRAMA_BINARIA, 'contador' = muestras enviadas antes) y el cuerpo:
+ *    n_muestras uint16 | n_stats uint8 | n_muestras x uint16 | n_stats x (spo2, hr) int16
+ *    ~2 bytes por muestra en vez de 5-6 en texto. El PC detecta el tipo solo.
+ * Por defecto 0: activar 1 o 2 solo con interfaces que ya entienden las tramas. */
+#define MODO_TRAMA     0
+#define TRAMA_MAGIA    0xEC
+#define TRAMA_TEXTO    0x01
+#define TRAMA_BINARIA  0x02
+#define TRAMA_CONTINUA 0x80
+#define TRAMA_CABECERA 8
+#define MAX_MUESTRAS   128   // Muestras maximas por trama binaria
+#define MAX_STATS      4
+
 /* --- 2. CONFIGURACIÓN UART (Pines 16 y 17) --- */
 #define RX_PIN         16
 #define TX_PIN         17
@@ -113,10 +137,92 @@ void init_uart(void)
     ESP_LOGI(TAG, "UART2 Inicializado en pines %d(RX) y %d(TX)", RX_PIN, TX_PIN);
 }
 
+/* --- TRAMAS --- */
+#if MODO_TRAMA != 0
+static void escribir_cabecera(uint8_t *dst, uint8_t tipo, uint16_t secuencia, uint32_t contador)
+{
+    dst[0] = TRAMA_MAGIA;
+    dst[1] = tipo;
+    dst[2] = secuencia & 0xFF;
+    dst[3] = secuencia >> 8;
+    dst[4] = contador & 0xFF;
+    dst[5] = (contador >> 8) & 0xFF;
+    dst[6] = (contador >> 16) & 0xFF;
+    dst[7] = contador >> 24;
+}
+#endif
+
+#if MODO_TRAMA == 2
+/* Estado del modo binario: linea en curso y muestras pendientes de enviar */
+static char linea[16];
+static int largo_linea = 0;
+static uint16_t bin_muestras[MAX_MUESTRAS];
+static int16_t bin_stats[MAX_STATS][2];
+static int n_muestras = 0;
+static int n_stats = 0;
+
+/* Acumula un byte de la UART; devuelve true si la trama esta llena y hay que enviarla */
+static bool acumular_binario(char c)
+{
+    if (c == '\r') return false;
+    if (c != '\n') {
+        if (largo_linea < (int)sizeof(linea) - 1) linea[largo_linea++] = c;
+        return false;
+    }
+    linea[largo_linea] = 0;
+    if (largo_linea > 2 && linea[0] == 'S' && linea[1] == ':') {
+        int spo2, hr;
+        if (sscanf(linea + 2, "%d,%d", &spo2, &hr) == 2) {
+            bin_stats[n_stats][0] = spo2;
+            bin_stats[n_stats][1] = hr;
+            n_stats++;
+        }
+    } else if (largo_linea > 0) {
+        int valor = atoi(linea);
+        bin_muestras[n_muestras++] = valor < 0 ? 0 : (valor > 0xFFFF ? 0xFFFF : valor);
+    }
+    largo_linea = 0;
+    return n_muestras == MAX_MUESTRAS || n_stats == MAX_STATS;
+}
+
+static int enviar_binario(int sock, struct sockaddr_in *dest, uint16_t *secuencia, uint32_t *contador)
+{
+    static uint8_t tx[TRAMA_CABECERA + 3 + 2 * MAX_MUESTRAS + 4 * MAX_STATS];
+    escribir_cabecera(tx, TRAMA_BINARIA, *secuencia, *contador);
+    uint8_t *p = tx + TRAMA_CABECERA;
+    *p++ = n_muestras & 0xFF;
+    *p++ = n_muestras >> 8;
+    *p++ = n_stats;
+    for (int i = 0; i < n_muestras; i++) {
+        *p++ = bin_muestras[i] & 0xFF;
+        *p++ = bin_muestras[i] >> 8;
+    }
+    for (int i = 0; i < n_stats; i++) {
+        for (int j = 0; j < 2; j++) {
+            *p++ = (uint16_t)bin_stats[i][j] & 0xFF;
+            *p++ = (uint16_t)bin_stats[i][j] >> 8;
+        }
+    }
+    (*secuencia)++;
+    *contador += n_muestras;
+    n_muestras = 0;
+    n_stats = 0;
+    return sendto(sock, tx, p - tx, 0, (struct sockaddr *)dest, sizeof(*dest));
+}
+#endif
+
 /* --- TAREA PRINCIPAL (BRIDGE) --- */
 void udp_client_task(void *pvParameters)
 {
     char rx_buffer[128];
+#if MODO_TRAMA != 0
+    uint16_t secuencia = 0;
+    uint32_t contador = 0;
+#endif
+#if MODO_TRAMA == 1
+    uint8_t tx_buffer[TRAMA_CABECERA + sizeof(rx_buffer)];
+    bool a_mitad_de_linea = false;
+#endif
     char addr_str[128];
     int addr_family = AF_INET;
     int ip_protocol = 0;
@@ -147,10 +253,39 @@ void udp_client_task(void *pvParameters)
             int len = uart_read_bytes(UART_NUM, rx_buffer, (sizeof(rx_buffer) - 1), 20 / portTICK_PERIOD_MS);
             
             if (len > 0) {
-                rx_buffer[len] = 128; // Null-terminate por seguridad
-                
+                rx_buffer[len] = 0; // Null-terminate por seguridad
+
+#if MODO_TRAMA == 2
+                // Se envia al llenarse la trama y al final de cada lectura de la UART
+                int err = 0;
+                for (int i = 0; i < len && err >= 0; i++) {
+                    if (acumular_binario(rx_buffer[i])) {
+                        err = enviar_binario(sock, &dest_addr, &secuencia, &contador);
+                    }
+                }
+                if (err >= 0 && (n_muestras > 0 || n_stats > 0)) {
+                    err = enviar_binario(sock, &dest_addr, &secuencia, &contador);
+                }
+#else
+                const void *payload = rx_buffer;
+                int payload_len = len;
+#if MODO_TRAMA == 1
+                escribir_cabecera(tx_buffer, TRAMA_TEXTO | (a_mitad_de_linea ? TRAMA_CONTINUA : 0),
+                                  secuencia, contador);
+                memcpy(tx_buffer + TRAMA_CABECERA, rx_buffer, len);
+                payload = tx_buffer;
+                payload_len = TRAMA_CABECERA + len;
+
+                secuencia++;
+                for (int i = 0; i < len; i++) {
+                    if (rx_buffer[i] == '\n') contador++;
+                }
+                a_mitad_de_linea = rx_buffer[len - 1] != '\n';
+#endif
+
                 // Enviar por UDP
-                int err = sendto(sock, rx_buffer, len, 0, (struct sockaddr *)&dest_addr, sizeof(dest_addr));
+                int err = sendto(sock, payload, payload_len, 0, (struct sockaddr *)&dest_addr, sizeof(dest_addr));
+#endif
                 
                 if (err < 0) {
                     ESP_LOGE(TAG, "Error al enviar UDP: errno %d", errno);
@@ -0,0 +1,198 @@
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+# --- MOTOR DE ALARMAS ---
+# Reglas por parametro evaluadas sobre los lotes del receptor (fuera del hilo de la GUI):
+#   "umbral":    spo2 / hr por debajo de 'bajo' o por encima de 'alto'
+#   "plano":     ECG con amplitud pico a pico < 'amplitud' durante 'ventana' s (electrodo suelto)
+#   "sin_datos": ninguna muestra ECG en 'timeout' s (puente caido), solo tras haber recibido alguna
+# Cada regla solo cambia de estado si la condicion se mantiene 'duracion' s (activar) o
+# 'duracion_fin' s (desactivar), y una vez activa un umbral solo se normaliza al pasar
+# 'histeresis' unidades por dentro del limite. El motor devuelve unicamente las transiciones,
+# asi la GUI solo repinta y registra cuando algo cambia.
+# Las reglas por defecto se pueden sustituir con un JSON (lista de dicts como REGLAS_DEFECTO).
+REGLAS_DEFECTO = [
+    {"nombre": "hipoxia", "tipo": "umbral", "parametro": "spo2", "bajo": 90, "histeresis": 2, "duracion": 5,
+     "mensaje": "HIPOXIA DETECTADA", "mensaje_fin": "NIVEL O2 NORMALIZADO"},
+    {"nombre": "bradicardia", "tipo": "umbral", "parametro": "hr", "bajo": 40, "histeresis": 5, "duracion": 5,
+     "mensaje": "BRADICARDIA", "mensaje_fin": "FC NORMALIZADA"},
+    {"nombre": "taquicardia", "tipo": "umbral", "parametro": "hr", "alto": 150, "histeresis": 5, "duracion": 5,
+     "mensaje": "TAQUICARDIA", "mensaje_fin": "FC NORMALIZADA"},
+    {"nombre": "ecg_plano", "tipo": "plano", "parametro": "ecg", "amplitud": 30, "ventana": 4,
+     "mensaje": "ECG PLANO", "mensaje_fin": "ECG RECUPERADO"},
+    {"nombre": "sin_datos", "tipo": "sin_datos", "parametro": "ecg", "timeout": 3,
+     "mensaje": "SIN DATOS DEL DISPOSITIVO", "mensaje_fin": "DATOS RECUPERADOS"},
+]
+CADUCIDAD_HR_ECG = 5.0   # s sin latidos del ECG tras los que vuelve a valer la FC del oximetro
+
+
+class Transicion:
+    """Cambio de estado de una regla: lo unico que llega a la GUI y al historial"""
+
+    def __init__(self, regla, activa, valor):
+        self.nombre = regla.nombre
+        self.parametro = regla.parametro
+        self.activa = activa
+        self.valor = valor
+        # Registro del historial: ("ALARMA", mensaje, valor) o ("INFO", mensaje_fin, valor)
+        self.tipo = "ALARMA" if activa else "INFO"
+        self.detalle = regla.mensaje if activa else regla.mensaje_fin
+
+
+class Regla:
+    """Maquina de estados comun: activa/inactiva con duraciones minimas"""
+
+    def __init__(self, nombre, parametro, duracion=0.0, duracion_fin=0.0, mensaje="", mensaje_fin=""):
+        self.nombre = nombre
+        self.parametro = parametro
+        self.duracion = duracion
+        self.duracion_fin = duracion_fin
+        self.mensaje = mensaje or nombre.upper()
+        self.mensaje_fin = mensaje_fin or f"{self.mensaje} FINALIZADA"
+        self.activa = False
+        self.desde = None   # Instante desde el que la condicion contradice el estado actual
+
+    def _actualizar(self, condicion, ahora, valor):
+        if condicion == self.activa:
+            self.desde = None
+            return None
+        if self.desde is None:
+            self.desde = ahora
+        if ahora - self.desde < (self.duracion if condicion else self.duracion_fin):
+            return None
+        self.activa = condicion
+        self.desde = None
+        return Transicion(self, condicion, valor)
+
+
+class ReglaUmbral(Regla):
+    def __init__(self, nombre, parametro, bajo=None, alto=None, histeresis=0.0, **kwargs):
+        super().__init__(nombre, parametro, **kwargs)
+        self.bajo = bajo
+        self.alto = alto
+        self.histeresis = histeresis
+
+    def evaluar(self, valor, ahora):
+        if valor <= 0:
+            return None  # 0 = sin lectura del sensor (dedo fuera), no cambia el estado
+        margen = self.histeresis if self.activa else 0.0
+        fuera = ((self.bajo is not None and valor < self.bajo + margen)
+                 or (self.alto is not None and valor > self.alto - margen))
+        return self._actualizar(fuera, ahora, str(valor))
+
+
+class ReglaPlano(Regla):
+    def __init__(self, nombre, parametro="ecg", amplitud=30.0, ventana=4.0, **kwargs):
+        super().__init__(nombre, parametro, **kwargs)
+        self.amplitud = amplitud
+        self.ventana = ventana
+        self.tramos = deque()   # (instante, minimo, maximo) de cada lote recibido
+
+    def evaluar(self, muestras, ahora):
+        self.tramos.append((ahora, float(np.min(muestras)), float(np.max(muestras))))
+        while ahora - self.tramos[0][0] > self.ventana:
+            self.tramos.popleft()
+        if ahora - self.tramos[0][0] < self.ventana * 0.9 and not self.activa:
+            return None  # Aun no hay una ventana completa para decidir
+        pico_pico = max(t[2] for t in self.tramos) - min(t[1] for t in self.tramos)
+        return self._actualizar(pico_pico < self.amplitud, ahora, f"{pico_pico:.0f}")
+
+
+class ReglaSinDatos(Regla):
+    def __init__(self, nombre, parametro="ecg", timeout=3.0, **kwargs):
+        super().__init__(nombre, parametro, **kwargs)
+        self.timeout = timeout
+        self.ultimo = None
+
+    def recibido(self, ahora):
+        self.ultimo = ahora
+        return self._actualizar(False, ahora, "")
+
+    def revisar(self, ahora):
+        if self.ultimo is None:
+            return None
+        silencio = ahora - self.ultimo
+        return self._actualizar(silencio >= self.timeout, ahora, f"{silencio:.0f} s")
+
+
+TIPOS_REGLA = {"umbral": ReglaUmbral, "plano": ReglaPlano, "sin_datos": ReglaSinDatos}
+
+
+def crear_reglas(configuracion=None):
+    """Lista de dicts (o ruta a un JSON con esa lista) -> reglas nuevas, con su propio estado"""
+    if configuracion is None:
+        configuracion = REGLAS_DEFECTO
+    elif isinstance(configuracion, str):
+        with open(configuracion, encoding="utf-8") as f:
+            configuracion = json.load(f)
+    reglas = []
+    for entrada in configuracion:
+        parametros = dict(entrada)
+        tipo = parametros.pop("tipo", "umbral")
+        if tipo not in TIPOS_REGLA:
+            raise ValueError(f"Tipo de regla desconocido: {tipo}")
+        reglas.append(TIPOS_REGLA[tipo](**parametros))
+    return reglas
+
+
+class OrigenHR:
+    """FC del ECG mientras siga habiendo latidos; si caduca (electrodos sueltos), la del oximetro"""
+
+    def __init__(self, caducidad=CADUCIDAD_HR_ECG):
+        self.caducidad = caducidad
+        self.ultimo_latido = None
+
+    def latido(self, ahora=None):
+        self.ultimo_latido = time.monotonic() if ahora is None else ahora
+
+    def ecg(self, ahora=None):
+        """True si la ultima FC del ECG sigue vigente"""
+        if self.ultimo_latido is None:
+            return False
+        ahora = time.monotonic() if ahora is None else ahora
+        return ahora - self.ultimo_latido <= self.caducidad
+
+
+class MotorAlarmas:
+    """Reglas de un dispositivo; procesar() y revisar() devuelven las transiciones producidas"""
+
+    def __init__(self, configuracion=None):
+        self.reglas = crear_reglas(configuracion)
+        self.origen_hr = OrigenHR()   # Con FC del ECG vigente se ignora la del oximetro (igual que en pantalla)
+
+    @property
+    def activas(self):
+        return [r.nombre for r in self.reglas if r.activa]
+
+    def procesar(self, muestras=(), stats=(), frecuencias=(), ahora=None):
+        """Un lote del receptor: muestras ECG crudas, [(spo2, hr)] del oximetro y FC del ECG"""
+        ahora = time.monotonic() if ahora is None else ahora
+        transiciones = []
+        if frecuencias:
+            self.origen_hr.latido(ahora)
+        hr_ecg = self.origen_hr.ecg(ahora)
+        for regla in self.reglas:
+            if isinstance(regla, ReglaUmbral):
+                if regla.parametro == "spo2":
+                    valores = [spo2 for spo2, _ in stats]
+                elif regla.parametro == "hr":
+                    valores = [int(round(hr)) for hr in frecuencias] if hr_ecg else [hr for _, hr in stats]
+                else:
+                    continue
+                for valor in valores:
+                    transiciones.append(regla.evaluar(valor, ahora))
+            elif len(muestras):
+                if isinstance(regla, ReglaPlano):
+                    transiciones.append(regla.evaluar(muestras, ahora))
+                elif isinstance(regla, ReglaSinDatos):
+                    transiciones.append(regla.recibido(ahora))
+        return [t for t in transiciones if t]
+
+    def revisar(self, ahora=None):
+        """Reglas que dependen del paso del tiempo (sin datos); llamar periodicamente"""
+        ahora = time.monotonic() if ahora is None else ahora
+        transiciones = [r.revisar(ahora) for r in self.reglas if isinstance(r, ReglaSinDatos)]
+        return [t for t in transiciones if t]
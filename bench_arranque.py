@@ -0,0 +1,139 @@
+import os
+import sys
+import json
+import shutil
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+import importlib.util
+import statistics
+
+from reproductor import Reproductor
+
+# --- TIEMPO DE ARRANQUE ---
+# Uso: python bench_arranque.py [--scripts registro+eventos.py interfaz_registro.py] [--repeticiones 5]
+#                               [--arquitecturas hilo proceso]
+# Lanza cada interfaz en un proceso nuevo (Qt offscreen) mientras el reproductor envia ECG
+# sintetico en tiempo real al puerto de la prueba, y mide desde antes de crear el proceso:
+#   importado:       modulo del script cargado (imports a nivel de modulo)
+#   ventana:         MonitorVital construido
+#   primer_cuadro:   primer evento Paint de la ventana (lo que ve el usuario)
+#   grafica:         grafica ECG creada (backend de dibujo cargado)
+#   primera_muestra: primera muestra ECG en el buffer de la grafica (receptor en marcha)
+# Se informa de la mediana de --repeticiones arranques. La primera repeticion suele ser la
+# mas lenta (cache de disco fria); para medir un arranque en frio real, reiniciar antes.
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+FASES = ["importado", "ventana", "primer_cuadro", "grafica", "primera_muestra"]
+LIMITE_S = 30.0
+
+
+def ejecutar_hijo(script, puerto, t0):
+    """Proceso hijo: arranca la interfaz y devuelve por stdout los instantes de cada fase"""
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    os.environ["MONITOR_PUERTO"] = str(puerto)
+    tiempos = {}
+
+    def marcar(fase):
+        if fase not in tiempos:
+            tiempos[fase] = time.time() - t0
+
+    spec = importlib.util.spec_from_file_location("monitor", os.path.join(DIRECTORIO, script))
+    monitor = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(monitor)
+    marcar("importado")
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QObject, QEvent, QTimer
+
+    class FiltroPintado(QObject):
+        def eventFilter(self, objeto, evento):
+            if evento.type() == QEvent.Paint:
+                marcar("primer_cuadro")
+            return False
+
+    app = QApplication([])
+    ventana = monitor.MonitorVital()
+    marcar("ventana")
+    filtro = FiltroPintado()
+    ventana.installEventFilter(filtro)
+    ventana.show()
+
+    def sondear():
+        if getattr(ventana, "grafica", None) is not None:
+            marcar("grafica")
+        if ventana.buffer_ecg.total > 0:
+            marcar("primera_muestra")
+        if all(fase in tiempos for fase in FASES) or time.time() - t0 > LIMITE_S:
+            timer.stop()
+            ventana.close()
+            app.quit()
+
+    timer = QTimer()
+    timer.timeout.connect(sondear)
+    timer.start(1)
+    app.exec_()
+    print(json.dumps(tiempos), flush=True)
+
+
+def medir(script, puerto, entorno=None):
+    directorio = tempfile.mkdtemp(prefix="bench_arranque_")
+    t0 = time.time()
+    try:
+        salida = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--hijo", script, "--puerto", str(puerto), "--t0", repr(t0)],
+            cwd=directorio, capture_output=True, text=True, env=dict(os.environ, **(entorno or {})))
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    try:
+        return json.loads(salida.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        print(f"  fallo: {salida.stderr.strip()[-300:]}")
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo hasta el primer cuadro y la primera muestra de las interfaces")
+    parser.add_argument("--scripts", nargs="+", default=["registro+eventos.py", "interfaz_registro.py"])
+    parser.add_argument("--arquitecturas", nargs="+", default=["hilo"], choices=["hilo", "proceso"],
+                        help="Solo afecta a registro+eventos.py")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--puerto", type=int, default=3338, help="Puerto local de la prueba (no usar el del monitor)")
+    parser.add_argument("--salida", help="Guardar los resultados en este JSON")
+    parser.add_argument("--hijo", help=argparse.SUPPRESS)
+    parser.add_argument("--t0", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        ejecutar_hijo(args.hijo, args.puerto, args.t0)
+        return
+
+    reproductor = Reproductor(["sintetico"], puerto=args.puerto, velocidad=1.0)
+    emisor = threading.Thread(target=reproductor.ejecutar, args=(1e9,), daemon=True)
+    emisor.start()
+    resultados = {}
+    try:
+        print(f"Mediana de {args.repeticiones} arranques, segundos desde el lanzamiento del proceso")
+        print(f"{'script':<34}" + "".join(f"{fase:>16}" for fase in FASES))
+        for script in args.scripts:
+            for arquitectura in (args.arquitecturas if script == "registro+eventos.py" else ["hilo"]):
+                nombre = script if arquitectura == "hilo" else f"{script} ({arquitectura})"
+                medidas = [medir(script, args.puerto, {"MONITOR_ARQUITECTURA": arquitectura})
+                           for _ in range(args.repeticiones)]
+                medianas = {fase: statistics.median(m[fase] for m in medidas if fase in m)
+                            for fase in FASES if any(fase in m for m in medidas)}
+                resultados[nombre] = {"medianas": medianas, "medidas": medidas}
+                print(f"{nombre:<34}" + "".join(
+                    f"{medianas[fase]:>16.3f}" if fase in medianas else f"{'-':>16}" for fase in FASES))
+    finally:
+        reproductor.detener()
+        emisor.join()
+        reproductor.cerrar()
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import glob
+import time
+import argparse
+import numpy as np
+
+from dsp import ProcesadorDSP, FRECUENCIA_RED
+from lector_sesion import abrir_sesion
+from sintetico import ecg_sintetico
+
+# --- BENCHMARK DEL PROCESADO ECG ---
+# Uso: python bench_dsp.py [Historial_*.txt | *.ecgb ...] [--flujos 16] [--bloque 20]
+# Reproduce cada sesion grabada como si llegara de --flujos puentes a la vez, en bloques del
+# tamaño de un datagrama, y mide el coste por muestra y cuantas veces mas rapido que el tiempo
+# real va el filtrado + deteccion de R. Sin archivos usa una señal sintetica de FC conocida.
+
+
+def cargar(path):
+    lector = abrir_sesion(path)
+    try:
+        y = np.asarray(lector.muestras(0, lector.n_muestras), dtype=np.float64)
+        fs = (lector.n_muestras - 1) / lector.duracion if lector.duracion > 0 else 0
+        stats = lector.stats
+    finally:
+        lector.cerrar()
+    hr_oximetro = stats[:, 2][stats[:, 2] > 0] if len(stats) else np.zeros(0)
+    return y, fs, hr_oximetro
+
+
+def medir(y, fs, flujos, bloque, red):
+    procesadores = [ProcesadorDSP(fs, red) for _ in range(flujos)]
+    frecuencias = []
+    inicio = time.perf_counter()
+    for i in range(0, len(y), bloque):
+        trozo = y[i:i + bloque]
+        for k, dsp in enumerate(procesadores):
+            _, latidos = dsp.procesar(trozo)
+            if k == 0:
+                frecuencias.extend(hr for _, hr in latidos if hr)
+    duracion = time.perf_counter() - inicio
+    return {
+        "us_muestra": duracion / (len(y) * flujos) * 1e6,
+        "x_tiempo_real": (len(y) / fs) * flujos / duracion,
+        "frecuencias": np.array(frecuencias),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del DSP (filtros + deteccion de R) sobre sesiones grabadas")
+    parser.add_argument("sesiones", nargs="*", help="Historiales .txt o .ecgb (por defecto Historial_*.txt)")
+    parser.add_argument("--flujos", type=int, default=16, help="Dispositivos simultaneos simulados")
+    parser.add_argument("--bloque", type=int, default=20, help="Muestras por bloque (datagrama)")
+    parser.add_argument("--red", type=float, default=FRECUENCIA_RED, help="Frecuencia del notch (Hz)")
+    args = parser.parse_args()
+
+    sesiones = args.sesiones or sorted(glob.glob("Historial_*.txt"))
+    casos = []
+    for path in sesiones:
+        y, fs, hr_oximetro = cargar(path)
+        if not fs or len(y) < fs * 5:
+            print(f"{path}: menos de 5 s de ECG, se omite")
+            continue
+        casos.append((path, y, fs, hr_oximetro))
+    if not casos:
+        fs = 500
+        casos.append(("sintetico 72 lpm", ecg_sintetico(fs * 60, fs, 72).astype(np.float64), fs, np.array([72.0])))
+
+    print(f"{args.flujos} flujos, bloques de {args.bloque} muestras")
+    print(f"{'sesion':<48}{'fs':>7}{'us/muestra':>12}{'x t. real':>11}{'FC ECG':>9}{'FC oxim.':>10}")
+    for path, y, fs, hr_oximetro in casos:
+        r = medir(y, fs, args.flujos, args.bloque, args.red)
+        fc = f"{np.median(r['frecuencias']):.0f}" if len(r["frecuencias"]) else "-"
+        fc_ox = f"{np.median(hr_oximetro):.0f}" if len(hr_oximetro) else "-"
+        nombre = path if len(path) <= 46 else "..." + path[-43:]
+        print(f"{nombre:<48}{fs:>7.1f}{r['us_muestra']:>12.2f}{r['x_tiempo_real']:>11.0f}{fc:>9}{fc_ox:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+from buffer_circular import BufferCircular
+from sintetico import ecg_sintetico
+
+# --- BENCHMARK DE BACKENDS GRAFICOS ---
+# Uso: python bench_graficos.py [--backends matplotlib pyqtgraph] [--ventana 10] [--offscreen]
+#  1) FPS maximos: redibujar tan rapido como se pueda con datos nuevos en cada cuadro.
+#  2) Latencia del hilo GUI: render a FPS fijos + datos a tiempo real, midiendo el retraso
+#     de un temporizador de sondeo de 5 ms (lo que tardaria la GUI en atender un evento).
+
+
+def medir_fps(app, grafica, buffer, y_pantalla, fs, segundos):
+    cuadros = 0
+    inicio = time.perf_counter()
+    ultimo = inicio
+    while True:
+        ahora = time.perf_counter()
+        if ahora - inicio >= segundos:
+            break
+        n = max(1, int((ahora - ultimo) * fs))
+        ultimo = ahora
+        buffer.escribir(ecg_sintetico(n, fs, inicio=buffer.total, ruido=0))
+        grafica.dibujar(buffer.vista_barrido(y_pantalla, 25))
+        app.processEvents()
+        cuadros += 1
+    return cuadros / (time.perf_counter() - inicio)
+
+
+def medir_latencia(app, grafica, buffer, y_pantalla, fs, fps, segundos):
+    from PyQt5.QtCore import QTimer, QEventLoop
+
+    periodo_sonda = 0.005
+    retrasos = []
+    estado = {"ultimo": time.perf_counter(), "alimentado": time.perf_counter()}
+
+    def sonda():
+        ahora = time.perf_counter()
+        retrasos.append(ahora - estado["ultimo"] - periodo_sonda)
+        estado["ultimo"] = ahora
+
+    def alimentar():
+        ahora = time.perf_counter()
+        n = int((ahora - estado["alimentado"]) * fs)
+        if n:
+            estado["alimentado"] += n / fs
+            buffer.escribir(ecg_sintetico(n, fs, inicio=buffer.total, ruido=0))
+
+    def refrescar():
+        grafica.dibujar(buffer.vista_barrido(y_pantalla, 25))
+
+    timers = []
+    for intervalo, funcion in ((int(periodo_sonda * 1000), sonda), (20, alimentar), (int(1000 / fps), refrescar)):
+        t = QTimer()
+        t.setTimerType(0)  # Qt.PreciseTimer
+        t.timeout.connect(funcion)
+        t.start(intervalo)
+        timers.append(t)
+
+    bucle = QEventLoop()
+    QTimer.singleShot(int(segundos * 1000), bucle.quit)
+    bucle.exec_()
+    for t in timers:
+        t.stop()
+
+    retrasos = np.maximum(np.array(retrasos[1:]), 0) * 1000
+    return {
+        "lag_medio_ms": float(retrasos.mean()),
+        "lag_p95_ms": float(np.percentile(retrasos, 95)),
+        "lag_max_ms": float(retrasos.max()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de backends graficos del monitor ECG")
+    parser.add_argument("--backends", nargs="+", default=["matplotlib", "pyqtgraph"])
+    parser.add_argument("--fs", type=int, default=500, help="Frecuencia de muestreo simulada (Hz)")
+    parser.add_argument("--ventana", type=float, default=10, help="Segundos visibles en el barrido")
+    parser.add_argument("--fps", type=int, default=30, help="FPS objetivo para la prueba de latencia")
+    parser.add_argument("--segundos", type=float, default=5, help="Duracion de cada prueba")
+    parser.add_argument("--offscreen", action="store_true", help="Usar la plataforma Qt offscreen")
+    args = parser.parse_args()
+
+    if args.offscreen:
+        os.environ["QT_QPA_PLATFORM"] = "offscreen"
+
+    from PyQt5.QtWidgets import QApplication
+    from graficos import BACKENDS
+
+    app = QApplication(sys.argv)
+    print(f"{'backend':<18}{'fps max':>10}{'lag medio':>12}{'lag p95':>10}{'lag max':>10}")
+    for nombre in args.backends:
+        capacidad = int(args.fs * args.ventana)
+        eje_x = np.arange(capacidad) / args.fs
+        try:
+            grafica = BACKENDS[nombre](eje_x)
+        except (KeyError, ImportError) as e:
+            print(f"{nombre:<18}no disponible ({e})")
+            continue
+        grafica.widget.resize(800, 400)
+        grafica.widget.show()
+        app.processEvents()
+
+        buffer = BufferCircular(capacidad)
+        y_pantalla = np.full(capacidad, np.nan, dtype=np.float32)
+        fps = medir_fps(app, grafica, buffer, y_pantalla, args.fs, args.segundos)
+        lag = medir_latencia(app, grafica, buffer, y_pantalla, args.fs, args.fps, args.segundos)
+        print(f"{nombre:<18}{fps:>10.1f}{lag['lag_medio_ms']:>10.2f}ms{lag['lag_p95_ms']:>8.2f}ms{lag['lag_max_ms']:>8.2f}ms")
+        grafica.widget.close()
+
+
+if __name__ == "__main__":
+    main()
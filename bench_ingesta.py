@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import glob
+import time
+import signal
+import shutil
+import resource
+import argparse
+import tempfile
+import subprocess
+import importlib.util
+import multiprocessing
+import numpy as np
+
+from reproductor import Reproductor
+
+# --- BENCHMARK DE INGESTA ---
+# Uso: python bench_ingesta.py [--destinos gui grabador] [--velocidades 1 10 50 0] [--dispositivos 4]
+# El reproductor envia ECG sintetico (500 Hz por dispositivo) a la velocidad indicada
+# (0 = maxima) contra registro+eventos.py (Qt offscreen, grabando) o contra grabador.py,
+# lanzados en otro proceso. Se cuentan las muestras que llegaron al buffer de la grafica o
+# al historial y se informa del ritmo sostenido y del porcentaje de muestras perdidas.
+# A velocidad maxima se envia una sesion mas larga para que el buffer del socket no oculte
+# las perdidas: el ritmo sostenido es entonces lo que el destino procesa saturado.
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+MONITOR = os.path.join(DIRECTORIO, "registro+eventos.py")
+GRABADOR = os.path.join(DIRECTORIO, "grabador.py")
+PERIODO_SONDA_MS = 5
+
+
+def ejecutar_gui(puerto):
+    """Proceso hijo: MonitorVital offscreen grabando hasta recibir SIGTERM; imprime un JSON con lo medido"""
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    os.environ["MONITOR_PUERTO"] = str(puerto)
+    spec = importlib.util.spec_from_file_location("monitor", MONITOR)
+    monitor = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(monitor)
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+
+    app = QApplication([])
+    ventana = monitor.MonitorVital()
+    ventana.show()
+    ventana.input_nombre.setText("bench")
+    ventana.toggle_recording()
+    resultado = {}
+    retrasos = []
+    sonda_estado = {"ultimo": None}
+    cuadros = [0]
+    ventana.cargar_grafica()  # Normalmente se crea en la primera vuelta del bucle de eventos
+    dibujar_original = ventana.grafica.dibujar
+
+    def dibujar(y):
+        dibujar_original(y)
+        cuadros[0] += 1
+
+    def sonda():
+        # Retraso del bucle de eventos: lo que tarda de mas un temporizador de PERIODO_SONDA_MS
+        ahora = time.perf_counter()
+        if sonda_estado["ultimo"] is not None:
+            retrasos.append((ahora - sonda_estado["ultimo"]) * 1e3 - PERIODO_SONDA_MS)
+        sonda_estado["ultimo"] = ahora
+
+    def listo():
+        sonda_estado["inicio"] = (time.perf_counter(), os.times(), cpu_hijos())
+        sonda_estado["ultimo"] = None
+        retrasos.clear()
+        cuadros[0] = 0
+        print("listo", flush=True)
+
+    def terminar(*_):
+        resultado["recibidas"] = ventana.buffer_ecg.total
+        resultado["cuadros"] = cuadros[0]
+        ventana.close()
+        app.quit()
+
+    ventana.grafica.dibujar = dibujar
+    signal.signal(signal.SIGTERM, terminar)
+    # La sonda tambien devuelve el control a Python para atender la señal
+    timer_sonda = QTimer()
+    timer_sonda.timeout.connect(sonda)
+    timer_sonda.start(PERIODO_SONDA_MS)
+    # En modo "proceso" el socket lo abre el proceso de analisis, que tarda en arrancar
+    QTimer.singleShot(3000 if monitor.ARQUITECTURA == "proceso" else 500, listo)
+    app.exec_()
+
+    # Tras close(): el escritor ya vacio su cola y el proceso de analisis (si lo hay) ya termino
+    # Al proceso de analisis se le descuenta la CPU de su arranque (ya gastada en listo())
+    t_inicio, cpu_inicio, hijos_inicio = sonda_estado.get("inicio", (time.perf_counter(), os.times(), 0.0))
+    cpu = os.times()
+    segundos = max(time.perf_counter() - t_inicio, 1e-9)
+    cpu_s = sum(cpu[:4]) - sum(cpu_inicio[:4]) - hijos_inicio
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    lag = np.array(retrasos) if retrasos else np.zeros(1)
+    resultado.update({
+        "cpu_pct": 100.0 * cpu_s / segundos, "rss_mb": rss_kb / 1024,
+        "lag_p50_ms": float(np.percentile(lag, 50)), "lag_p95_ms": float(np.percentile(lag, 95)),
+        "lag_max_ms": float(lag.max()),
+    })
+    resultado.update(contar_historial(os.getcwd()))
+    print(json.dumps(resultado), flush=True)
+
+
+def cpu_hijos():
+    """Segundos de CPU ya consumidos por los procesos hijos vivos (multiprocessing); 0 fuera de Linux"""
+    total = 0.0
+    for hijo in multiprocessing.active_children():
+        try:
+            with open(f"/proc/{hijo.pid}/stat") as f:
+                campos = f.read().rsplit(")", 1)[1].split()
+            total += (int(campos[11]) + int(campos[12])) / os.sysconf("SC_CLK_TCK")
+        except (OSError, ValueError, IndexError):
+            pass
+    return total
+
+
+def contar_historial(directorio):
+    """Muestras ECG y bytes escritos en los historiales de texto de 'directorio'"""
+    registradas = 0
+    bytes_log = 0
+    for path in glob.glob(os.path.join(directorio, "Historial_*.txt")):
+        with open(path, "rb") as f:
+            contenido = f.read()
+        registradas += contenido.count(b",ECG,")
+        bytes_log += len(contenido)
+    return {"registradas": registradas, "bytes_log": bytes_log}
+
+
+def lanzar(destino, puerto, directorio, entorno=None):
+    """Arranca el destino en otro proceso y espera a que tenga el socket abierto"""
+    if destino == "gui":
+        comando = [sys.executable, os.path.abspath(__file__), "--hijo", "--puerto", str(puerto)]
+    else:
+        comando = [sys.executable, GRABADOR, "--puerto", str(puerto), "--por-puerto", "--directorio", directorio,
+                   "--estado", "3600"]
+    proceso = subprocess.Popen(comando, cwd=directorio, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+                               env=dict(os.environ, **(entorno or {})))
+    proceso.stdout.readline()  # "listo" / "Grabando en ..."
+    return proceso
+
+
+def detener(destino, proceso, directorio):
+    """SIGTERM, espera el cierre de los historiales y devuelve lo medido ('recibidas' siempre)"""
+    proceso.send_signal(signal.SIGTERM)
+    salida, _ = proceso.communicate(timeout=60)
+    if destino == "gui":
+        lineas = [l for l in salida.splitlines() if l.startswith("{")]
+        return json.loads(lineas[-1]) if lineas else {"recibidas": 0}
+    resultado = contar_historial(directorio)
+    resultado["recibidas"] = resultado["registradas"]
+    return resultado
+
+
+def medir(destino, velocidad, dispositivos, segundos, puerto, fuentes=("sintetico",), entorno=None):
+    directorio = tempfile.mkdtemp(prefix="bench_ingesta_")
+    reproductor = Reproductor(list(fuentes), puerto=puerto, dispositivos=dispositivos, velocidad=velocidad)
+    proceso = lanzar(destino, puerto, directorio, entorno)
+    try:
+        envio = reproductor.ejecutar(segundos)
+    finally:
+        reproductor.cerrar()
+    time.sleep(1.0)  # Que el destino drene lo que quede en el socket
+    resultado = detener(destino, proceso, directorio)
+    shutil.rmtree(directorio, ignore_errors=True)
+    recibidas = resultado["recibidas"]
+    resultado.update({
+        "destino": destino, "velocidad": velocidad, "dispositivos": dispositivos,
+        "enviadas": envio["muestras"], "recibidas": recibidas,
+        "enviadas_s": envio["muestras_s"], "sostenidas_s": recibidas / max(envio["segundos"], 1e-9),
+        "perdidas_pct": 100.0 * (1 - recibidas / envio["muestras"]) if envio["muestras"] else 0.0,
+        "segundos": envio["segundos"],
+    })
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ritmo sostenido y perdidas de la GUI y del grabador")
+    parser.add_argument("--destinos", nargs="+", default=["gui", "grabador"], choices=["gui", "grabador"])
+    parser.add_argument("--velocidades", nargs="+", type=float, default=[1, 10, 50, 0], help="0 = maxima")
+    parser.add_argument("--dispositivos", type=int, default=4, help="Puentes simulados (la GUI los mezcla en uno)")
+    parser.add_argument("--segundos", type=float, default=20, help="Segundos de sesion enviados por medida")
+    parser.add_argument("--segundos-maxima", type=float, default=300,
+                        help="Segundos de sesion a velocidad maxima (mas que el buffer del socket)")
+    parser.add_argument("--fuentes", nargs="+", default=["sintetico"], help="Historiales o sintetico[:lpm]")
+    parser.add_argument("--puerto", type=int, default=3336, help="Puerto local de la prueba (no usar el del monitor)")
+    parser.add_argument("--hijo", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        ejecutar_gui(args.puerto)
+        return
+
+    print(f"{args.dispositivos} dispositivos, {args.segundos:.0f} s de sesion por medida "
+          f"({args.segundos_maxima:.0f} s a velocidad maxima)")
+    print(f"{'destino':<10}{'velocidad':>10}{'enviadas/s':>12}{'sostenidas/s':>14}{'perdidas':>10}")
+    for destino in args.destinos:
+        for velocidad in args.velocidades:
+            segundos = args.segundos_maxima if velocidad == 0 else args.segundos
+            r = medir(destino, velocidad, args.dispositivos, segundos, args.puerto, args.fuentes)
+            nombre = "maxima" if velocidad == 0 else f"{velocidad:g}x"
+            print(f"{destino:<10}{nombre:>10}{r['enviadas_s']:>12.0f}{r['sostenidas_s']:>14.0f}{r['perdidas_pct']:>9.2f}%")
+
+
+if __name__ == "__main__":
+    main()
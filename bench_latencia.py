@@ -0,0 +1,161 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import importlib.util
+import multiprocessing
+import numpy as np
+
+from sintetico import ecg_sintetico
+
+# --- BENCHMARK DE LATENCIA EXTREMO A EXTREMO ---
+# Uso: python bench_latencia.py [--arquitecturas hilo proceso] [--cargas 500 4000] [--segundos 8]
+# Lanza registro+eventos.py (Qt offscreen, grabando historial) una vez por arquitectura y carga.
+# Un proceso aparte envia ECG de texto al ritmo indicado (muestras/s) y apunta el instante de
+# cada datagrama; en la GUI se fuerza el repintado tras cada dibujar() y se apunta cuantas
+# muestras habia en el buffer. Latencia = primer repintado que incluye el datagrama - envio.
+# Ademas se mide el retraso de un temporizador de sondeo de 5 ms (respuesta de la GUI).
+MONITOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "registro+eventos.py")
+
+
+def emisor(puerto, fs, bloque, segundos, espera, instantes):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    x = ecg_sintetico(len(instantes) * bloque, fs).astype(int)
+    datagramas = [b"".join(b"%d\n" % v for v in x[i:i + bloque]) for i in range(0, len(x), bloque)]
+    time.sleep(espera)
+    inicio = time.perf_counter()
+    for j, d in enumerate(datagramas):
+        objetivo = inicio + j * bloque / fs
+        while time.perf_counter() < objetivo:
+            time.sleep(0.0005)
+        instantes[j] = time.perf_counter()
+        sock.sendto(d + (b"S:97,72\n" if j % max(1, fs // bloque) == 0 else b""), ("127.0.0.1", puerto))
+    sock.close()
+
+
+def ejecutar_hijo(args):
+    """Una medida: GUI en este proceso, emisor en otro"""
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    os.environ["MONITOR_ARQUITECTURA"] = args.hijo
+    os.environ["MONITOR_PUERTO"] = str(args.puerto)
+    os.environ["MONITOR_FS"] = str(args.carga)
+    spec = importlib.util.spec_from_file_location("monitor", MONITOR)
+    monitor = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(monitor)
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+
+    n_datagramas = int(args.segundos * args.carga / args.bloque)
+    contexto = multiprocessing.get_context("spawn")
+    instantes = contexto.Array("d", n_datagramas, lock=False)
+    proceso = contexto.Process(target=emisor, args=(args.puerto, args.carga, args.bloque, args.segundos,
+                                                    args.espera, instantes))
+
+    app = QApplication([])
+    os.chdir(tempfile.mkdtemp(prefix="bench_latencia_"))
+    ventana = monitor.MonitorVital()
+    ventana.show()
+    ventana.input_nombre.setText("bench")
+    ventana.toggle_recording()
+
+    buffer = ventana.buffer_ecg
+    copiado = [0]
+    dibujos = []
+    vista_original = buffer.vista_barrido
+    ventana.cargar_grafica()  # Normalmente se crea en la primera vuelta del bucle de eventos
+    dibujar_original = ventana.grafica.dibujar
+
+    def vista_barrido(*a, **k):
+        copiado[0] = buffer.total  # Antes de copiar: lo que seguro entra en este cuadro
+        return vista_original(*a, **k)
+
+    def dibujar(y):
+        dibujar_original(y)
+        ventana.grafica.widget.repaint()
+        dibujos.append((time.perf_counter(), copiado[0]))
+
+    buffer.vista_barrido = vista_barrido
+    ventana.grafica.dibujar = dibujar
+
+    retrasos = []
+    sonda_estado = {"ultimo": time.perf_counter()}
+
+    def sonda():
+        ahora = time.perf_counter()
+        retrasos.append(ahora - sonda_estado["ultimo"] - 0.005)
+        sonda_estado["ultimo"] = ahora
+
+    timer_sonda = QTimer()
+    timer_sonda.timeout.connect(sonda)
+    timer_sonda.start(5)
+
+    proceso.start()
+    QTimer.singleShot(int((args.espera + args.segundos + 1.0) * 1000), ventana.close)
+    QTimer.singleShot(int((args.espera + args.segundos + 1.5) * 1000), app.quit)
+    app.exec_()
+    proceso.join()
+
+    envios = np.frombuffer(instantes, dtype=np.float64)
+    t_dibujo = np.array([d[0] for d in dibujos])
+    totales = np.array([d[1] for d in dibujos])
+    necesarios = (np.arange(n_datagramas) + 1) * args.bloque
+    indices = np.searchsorted(totales, necesarios, side="left")
+    vistos = indices < len(totales)
+    latencias = (t_dibujo[indices[vistos]] - envios[vistos]) * 1e3
+    espera_inicial = int(args.espera / 0.005)
+    retrasos = np.array(retrasos[espera_inicial:]) * 1e3
+    print(json.dumps({
+        "arquitectura": args.hijo, "carga": args.carga,
+        "media": float(latencias.mean()) if len(latencias) else None,
+        "p50": float(np.percentile(latencias, 50)) if len(latencias) else None,
+        "p95": float(np.percentile(latencias, 95)) if len(latencias) else None,
+        "max": float(latencias.max()) if len(latencias) else None,
+        "sonda_p95": float(np.percentile(retrasos, 95)) if len(retrasos) else None,
+        "sin_dibujar": int((~vistos).sum()), "datagramas": n_datagramas,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia datagrama -> pixel del monitor ECG por arquitectura")
+    parser.add_argument("--arquitecturas", nargs="+", default=["hilo", "proceso"])
+    parser.add_argument("--cargas", nargs="+", type=int, default=[500, 4000], help="Muestras/s enviadas")
+    parser.add_argument("--bloque", type=int, default=20, help="Muestras por datagrama")
+    parser.add_argument("--segundos", type=float, default=8, help="Duracion del envio")
+    parser.add_argument("--espera", type=float, default=3, help="Segundos de arranque antes de enviar")
+    parser.add_argument("--puerto", type=int, default=3335, help="Puerto local de la prueba (no usar el del monitor)")
+    parser.add_argument("--hijo", help=argparse.SUPPRESS)
+    parser.add_argument("--carga", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        ejecutar_hijo(args)
+        return
+
+    print(f"Datagramas de {args.bloque} muestras, {args.segundos:.0f} s por medida, grabando historial de texto")
+    print(f"{'arquitectura':<14}{'muestras/s':>11}{'media ms':>10}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}"
+          f"{'sonda p95':>11}{'sin dibujar':>13}")
+    for carga in args.cargas:
+        for arquitectura in args.arquitecturas:
+            salida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--hijo", arquitectura, "--carga", str(carga),
+                 "--bloque", str(args.bloque), "--segundos", str(args.segundos), "--espera", str(args.espera),
+                 "--puerto", str(args.puerto)],
+                capture_output=True, text=True)
+            try:
+                r = json.loads(salida.stdout.strip().splitlines()[-1])
+            except (IndexError, ValueError):
+                print(f"{arquitectura:<14}{carga:>11}  fallo: {salida.stderr.strip()[-200:]}")
+                continue
+            if r["media"] is None:
+                print(f"{arquitectura:<14}{carga:>11}  no se dibujo ningun datagrama")
+                continue
+            print(f"{arquitectura:<14}{carga:>11}{r['media']:>10.1f}{r['p50']:>9.1f}{r['p95']:>9.1f}{r['max']:>9.1f}"
+                  f"{r['sonda_p95']:>11.1f}{r['sin_dibujar']:>8}/{r['datagramas']}")
+
+
+if __name__ == "__main__":
+    main()
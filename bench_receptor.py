@@ -0,0 +1,163 @@
+import time
+import socket
+import argparse
+import threading
+import multiprocessing
+
+from protocolo import parsear_datagrama, codificar_binaria, decodificar_binaria, Reensamblador
+from receptor import ReceptorUDP
+from sintetico import ecg_sintetico
+
+# --- BENCHMARK DEL MOTOR DE RECEPCION ---
+# Uso: python bench_receptor.py [--puerto 3334] [--segundos 5] [--lineas 10] [--binario]
+#  1) Coste de parseo por muestra: parser linea a linea original contra parsear_datagrama
+#     y contra las tramas binarias (MODO_TRAMA = 2 en UART-UDP.c), y bytes por muestra.
+#  2) Throughput UDP: un proceso aparte envia datagramas tan rapido como puede a un puerto
+#     local y se cuentan los datagramas/muestras que entrega ReceptorUDP.
+
+
+def parsear_linea_a_linea(data):
+    """Parser original de DataWorker (una conversion y una señal por linea)"""
+    ecg, stats = [], []
+    for line in data.decode("utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("S:"):
+            try:
+                partes = line[2:].split(",")
+                if len(partes) == 2:
+                    stats.append((int(partes[0]), int(partes[1])))
+            except ValueError:
+                pass
+        else:
+            try:
+                ecg.append(float(line))
+            except ValueError:
+                pass
+    return ecg, stats
+
+
+def generar_datagramas(n, lineas):
+    muestras = ecg_sintetico(n * lineas).astype(int)
+    datagramas = []
+    for i in range(n):
+        texto = "".join(f"{v}\n" for v in muestras[i * lineas:(i + 1) * lineas])
+        if i % 50 == 0:
+            texto += "S:97,72\n"
+        datagramas.append(texto.encode())
+    return datagramas
+
+
+def generar_binarias(n, lineas):
+    muestras = ecg_sintetico(n * lineas).astype(int)
+    return [codificar_binaria(i, i * lineas, muestras[i * lineas:(i + 1) * lineas],
+                              [(97, 72)] if i % 50 == 0 else ())
+            for i in range(n)]
+
+
+def medir_parseo(lineas, repeticiones=2000):
+    datagramas = generar_datagramas(repeticiones, lineas)
+    binarias = generar_binarias(repeticiones, lineas)
+    total = repeticiones * lineas
+    resultados = {}
+    for nombre, funcion in (("linea a linea", parsear_linea_a_linea), ("parsear_datagrama", parsear_datagrama)):
+        inicio = time.perf_counter()
+        for d in datagramas:
+            funcion(d)
+        resultados[nombre] = (time.perf_counter() - inicio) / total * 1e6
+
+    # Lo que hace ReceptorUDP al drenar: un solo parseo para todos los datagramas pendientes
+    inicio = time.perf_counter()
+    for i in range(0, len(datagramas), 50):
+        parsear_datagrama(b"\n".join(datagramas[i:i + 50]))
+    resultados["drenado (50 dgr)"] = (time.perf_counter() - inicio) / total * 1e6
+
+    inicio = time.perf_counter()
+    for d in binarias:
+        decodificar_binaria(d)
+    resultados["trama binaria"] = (time.perf_counter() - inicio) / total * 1e6
+
+    enlace = Reensamblador()
+    inicio = time.perf_counter()
+    for i in range(0, len(binarias), 50):
+        enlace.procesar(binarias[i:i + 50])
+    resultados["drenado binario (50)"] = (time.perf_counter() - inicio) / total * 1e6
+
+    tamanos = {"texto": sum(map(len, datagramas)) / total, "binario": sum(map(len, binarias)) / total}
+    return resultados, tamanos
+
+
+def emisor(puerto, segundos, lineas, binario, enviados):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    datagramas = generar_binarias(200, lineas) if binario else generar_datagramas(200, lineas)
+    destino = ("127.0.0.1", puerto)
+    n = 0
+    fin = time.perf_counter() + segundos
+    while time.perf_counter() < fin:
+        for d in datagramas:
+            try:
+                sock.sendto(d, destino)
+                n += 1
+            except OSError:
+                pass  # Buffer de envio lleno: se reintenta con el siguiente
+    enviados.value = n
+    sock.close()
+
+
+def medir_throughput(puerto, segundos, lineas, binario=False):
+    recibido = {"muestras": 0}
+
+    def al_recibir(lote):
+        for muestras, _ in lote.values():
+            recibido["muestras"] += len(muestras)
+
+    receptor = ReceptorUDP(al_recibir, "127.0.0.1", puerto)
+    hilo = threading.Thread(target=receptor.ejecutar, daemon=True)
+    hilo.start()
+
+    enviados = multiprocessing.Value("q", 0)
+    proceso = multiprocessing.Process(target=emisor, args=(puerto, segundos, lineas, binario, enviados))
+    inicio = time.perf_counter()
+    proceso.start()
+    proceso.join()
+    time.sleep(0.2)  # Dejar drenar lo que quede en el socket
+    duracion = time.perf_counter() - inicio
+
+    receptor.detener()
+    hilo.join()
+    receptor.cerrar()
+    return {
+        "enviados": enviados.value,
+        "recibidos": receptor.datagramas,
+        "dgr_s": receptor.datagramas / duracion,
+        "muestras_s": recibido["muestras"] / duracion,
+        "por_despertar": receptor.datagramas / max(1, receptor.despertares),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del receptor UDP del monitor ECG")
+    parser.add_argument("--puerto", type=int, default=3334, help="Puerto local de la prueba (no usar el del monitor)")
+    parser.add_argument("--segundos", type=float, default=5, help="Duracion de la prueba de throughput")
+    parser.add_argument("--lineas", type=int, default=10, help="Muestras ECG por datagrama")
+    parser.add_argument("--binario", action="store_true", help="Enviar tramas binarias en la prueba de throughput")
+    args = parser.parse_args()
+
+    print(f"Parseo ({args.lineas} lineas/datagrama):")
+    resultados, tamanos = medir_parseo(args.lineas)
+    for nombre, us in resultados.items():
+        print(f"  {nombre:<22}{us:>8.3f} us/muestra")
+    print(f"  bytes/muestra: texto {tamanos['texto']:.2f}  binario {tamanos['binario']:.2f}")
+
+    r = medir_throughput(args.puerto, args.segundos, args.lineas, args.binario)
+    perdidos = r["enviados"] - r["recibidos"]
+    print(f"Throughput UDP ({args.segundos:.0f} s, {'binario' if args.binario else 'texto'}):")
+    print(f"  enviados {r['enviados']}  recibidos {r['recibidos']}  perdidos {perdidos} "
+          f"({100 * perdidos / max(1, r['enviados']):.1f}%)")
+    print(f"  {r['dgr_s']:.0f} datagramas/s  {r['muestras_s']:.0f} muestras/s  "
+          f"{r['por_despertar']:.1f} datagramas por despertar")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import os
+import sys
+import json
+import argparse
+import datetime
+import platform
+import subprocess
+
+from bench_ingesta import medir
+from reproductor import FS_SINTETICO
+
+# --- SUITE DE RENDIMIENTO EXTREMO A EXTREMO ---
+# Uso: python bench_suite.py [--arquitecturas hilo proceso] [--desde 500] [--hasta 256000] [--segundos 6]
+#      python bench_suite.py --comparar bench_resultados/ANTES.json bench_resultados/DESPUES.json
+# Cadena completa recepcion -> pantalla -> historial: registro+eventos.py en Qt offscreen grabando,
+# alimentado por el reproductor (ECG sintetico por UDP local). Se dobla el ritmo desde --desde
+# hasta que se pierden muestras (en la grafica o en el historial) y se afina el limite con
+# biseccion. De cada nivel se guarda: perdidas, retraso del bucle de eventos de la GUI (sonda
+# de 5 ms), CPU (incluido el proceso de analisis, sin su arranque), RSS maximo y bytes/s
+# escritos en el historial.
+# El JSON lleva el commit, de modo que dos ejecuciones se comparan con --comparar.
+CARPETA_RESULTADOS = "bench_resultados"
+UMBRAL_PERDIDAS_PCT = 0.1   # Por encima de esto el ritmo no se considera sostenible
+PASOS_BISECCION = 2
+
+# Metricas del resumen y si es mejor que suban (True) o que bajen (False)
+METRICAS_RESUMEN = {
+    "max_sostenible_s": True,
+    "lag_p95_ms": False,
+    "lag_max_ms": False,
+    "cpu_pct": False,
+    "rss_mb": False,
+    "log_mb_s_max": True,
+}
+
+
+def commit_actual():
+    try:
+        salida = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        return salida.stdout.strip() or "desconocido"
+    except OSError:
+        return "desconocido"
+
+
+def medir_nivel(ritmo, arquitectura, segundos, puerto):
+    """Un nivel de carga (muestras/s) durante ~'segundos' de reloj contra la GUI"""
+    velocidad = ritmo / FS_SINTETICO
+    r = medir("gui", velocidad, 1, segundos * velocidad, puerto, entorno={"MONITOR_ARQUITECTURA": arquitectura})
+    r["ritmo"] = ritmo
+    r["perdidas_registro_pct"] = 100.0 * (1 - r.get("registradas", 0) / r["enviadas"]) if r["enviadas"] else 0.0
+    r["log_mb_s"] = r.get("bytes_log", 0) / max(r["segundos"], 1e-9) / 1e6
+    r["sostenible"] = max(r["perdidas_pct"], r["perdidas_registro_pct"]) <= UMBRAL_PERDIDAS_PCT
+    print(f"  {arquitectura:<8}{ritmo:>9.0f}/s  perdidas {r['perdidas_pct']:6.2f}% (historial "
+          f"{r['perdidas_registro_pct']:6.2f}%)  lag p95 {r.get('lag_p95_ms', 0):6.1f} ms  "
+          f"CPU {r.get('cpu_pct', 0):5.1f}%  RSS {r.get('rss_mb', 0):6.1f} MB  "
+          f"historial {r['log_mb_s']:5.2f} MB/s", flush=True)
+    return r
+
+
+def ejecutar_arquitectura(arquitectura, desde, hasta, segundos, puerto):
+    """Rampa x2 hasta la primera perdida y biseccion entre el ultimo nivel bueno y el malo"""
+    niveles = []
+    bueno, malo = None, None
+    ritmo = desde
+    while ritmo <= hasta:
+        r = medir_nivel(ritmo, arquitectura, segundos, puerto)
+        niveles.append(r)
+        if not r["sostenible"]:
+            malo = ritmo
+            break
+        bueno = ritmo
+        ritmo *= 2
+    if bueno is not None and malo is not None:
+        for _ in range(PASOS_BISECCION):
+            ritmo = (bueno + malo) / 2
+            r = medir_nivel(ritmo, arquitectura, segundos, puerto)
+            niveles.append(r)
+            if r["sostenible"]:
+                bueno = ritmo
+            else:
+                malo = ritmo
+
+    sostenibles = [n for n in niveles if n["sostenible"]]
+    # Coste de la GUI a ritmo de un dispositivo real (primer nivel) y caudal maximo del historial
+    referencia = niveles[0]
+    return {
+        "niveles": niveles,
+        "resumen": {
+            "max_sostenible_s": bueno or 0,
+            "limite_alcanzado": malo is None,
+            "ritmo_referencia": referencia["ritmo"],
+            "lag_p95_ms": referencia.get("lag_p95_ms"),
+            "lag_max_ms": referencia.get("lag_max_ms"),
+            "cpu_pct": referencia.get("cpu_pct"),
+            "rss_mb": max(n.get("rss_mb", 0) for n in niveles),
+            "log_mb_s_max": max((n["log_mb_s"] for n in sostenibles), default=0.0),
+        },
+    }
+
+
+def comparar(path_antes, path_despues, tolerancia):
+    with open(path_antes, encoding="utf-8") as f:
+        antes = json.load(f)
+    with open(path_despues, encoding="utf-8") as f:
+        despues = json.load(f)
+    print(f"{antes['commit']} ({antes['fecha']}) -> {despues['commit']} ({despues['fecha']})")
+    if antes["config"] != despues["config"] or antes["maquina"] != despues["maquina"]:
+        print("Aviso: configuracion o maquina distintas, la comparacion no es directa")
+    regresiones = 0
+    for arquitectura in despues["arquitecturas"]:
+        if arquitectura not in antes["arquitecturas"]:
+            continue
+        print(f"[{arquitectura}]")
+        r_antes = antes["arquitecturas"][arquitectura]["resumen"]
+        r_despues = despues["arquitecturas"][arquitectura]["resumen"]
+        for metrica, mayor_mejor in METRICAS_RESUMEN.items():
+            a, d = r_antes.get(metrica), r_despues.get(metrica)
+            if a is None or d is None:
+                continue
+            cambio = 100.0 * (d - a) / abs(a) if a else 0.0
+            empeora = (cambio < -tolerancia) if mayor_mejor else (cambio > tolerancia)
+            regresiones += empeora
+            marca = "  << REGRESION" if empeora else ""
+            print(f"  {metrica:<18}{a:>12.2f}{d:>12.2f}{cambio:>+9.1f}%{marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de rendimiento recepcion -> pantalla -> historial")
+    parser.add_argument("--arquitecturas", nargs="+", default=["hilo", "proceso"], choices=["hilo", "proceso"])
+    parser.add_argument("--desde", type=float, default=FS_SINTETICO, help="Ritmo inicial (muestras/s)")
+    parser.add_argument("--hasta", type=float, default=256000, help="Ritmo maximo a probar (muestras/s)")
+    parser.add_argument("--segundos", type=float, default=6, help="Segundos de envio por nivel")
+    parser.add_argument("--puerto", type=int, default=3337, help="Puerto local de la prueba (no usar el del monitor)")
+    parser.add_argument("--salida", help=f"JSON de resultados (por defecto {CARPETA_RESULTADOS}/<commit>_<fecha>.json)")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DESPUES"), help="Compara dos JSON de resultados")
+    parser.add_argument("--tolerancia", type=float, default=10.0, help="%% de cambio que cuenta como regresion")
+    args = parser.parse_args()
+
+    if args.comparar:
+        regresiones = comparar(*args.comparar, args.tolerancia)
+        sys.exit(1 if regresiones else 0)
+
+    commit = commit_actual()
+    ahora = datetime.datetime.now()
+    resultados = {
+        "commit": commit, "fecha": ahora.isoformat(timespec="seconds"),
+        "maquina": {"sistema": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "config": {"desde": args.desde, "hasta": args.hasta, "segundos": args.segundos,
+                   "umbral_perdidas_pct": UMBRAL_PERDIDAS_PCT},
+        "arquitecturas": {},
+    }
+    for arquitectura in args.arquitecturas:
+        print(f"[{arquitectura}]")
+        resultados["arquitecturas"][arquitectura] = ejecutar_arquitectura(
+            arquitectura, args.desde, args.hasta, args.segundos, args.puerto)
+
+    salida = args.salida or os.path.join(CARPETA_RESULTADOS, f"{commit}_{ahora.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(salida) or ".", exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+    print(f"{'arquitectura':<14}{'max muestras/s':>15}{'lag p95 ms':>12}{'CPU %':>8}{'RSS MB':>9}{'historial MB/s':>16}")
+    for arquitectura, r in resultados["arquitecturas"].items():
+        s = r["resumen"]
+        maximo = f"{'>=' if s['limite_alcanzado'] else ''}{s['max_sostenible_s']:.0f}"
+        print(f"{arquitectura:<14}{maximo:>15}{s['lag_p95_ms'] or 0:>12.1f}{s['cpu_pct'] or 0:>8.1f}"
+              f"{s['rss_mb']:>9.1f}{s['log_mb_s_max']:>16.2f}")
+    print(f"Resultados en {salida}")
+
+
+if __name__ == "__main__":
+    main()
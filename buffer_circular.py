@@ -0,0 +1,188 @@
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+
+class BufferCircular:
+    """Buffer circular preasignado: escribir bloques no reserva memoria nueva"""
+
+    def __init__(self, capacidad, dtype=np.float32, relleno=np.nan):
+        self.capacidad = int(capacidad)
+        self.datos = np.full(self.capacidad, relleno, dtype=dtype)
+        self.indice = 0   # Proxima posicion de escritura
+        self.total = 0    # Muestras escritas desde el inicio
+
+    def escribir(self, muestras):
+        n = len(muestras)
+        if n == 0:
+            return
+        cap = self.capacidad
+        if n >= cap:
+            # Solo caben las ultimas 'cap' muestras; se alinean con el cursor
+            inicio = (self.indice + n) % cap
+            ultimas = muestras[-cap:]
+            self.datos[inicio:] = ultimas[:cap - inicio]
+            self.datos[:inicio] = ultimas[cap - inicio:]
+        else:
+            primero = min(n, cap - self.indice)
+            self.datos[self.indice:self.indice + primero] = muestras[:primero]
+            if primero < n:
+                self.datos[:n - primero] = muestras[primero:]
+        self.indice = (self.indice + n) % cap
+        self.total += n
+
+    def ultimos(self, n):
+        """Devuelve una copia ordenada (antigua -> reciente) de las ultimas n muestras"""
+        n = min(n, self.capacidad, self.total)
+        inicio = (self.indice - n) % self.capacidad
+        if inicio + n <= self.capacidad:
+            return self.datos[inicio:inicio + n].copy()
+        return np.concatenate((self.datos[inicio:], self.datos[:self.indice]))
+
+    def vista_barrido(self, destino, hueco=0):
+        """Copia el buffer en modo barrido (eje x fijo) sobre 'destino' dejando un hueco tras el cursor"""
+        np.copyto(destino, self.datos)
+        if hueco:
+            fin = self.indice + hueco
+            destino[self.indice:fin] = np.nan
+            if fin > self.capacidad:
+                destino[:fin - self.capacidad] = np.nan
+        return destino
+
+
+class EntradaBarrido:
+    """Muestras para la grafica de barrido cuando el DSP se carga con la señal ya en marcha.
+
+    Hasta que llega el DSP se guardan las ultimas muestras crudas para asentar sus filtros con
+    ellas. Cuando el DSP ya filtra, se sigue entregando la señal cruda hasta que el cursor vuelve
+    al inicio: un mismo barrido no mezcla la linea base cruda (~2000) con la filtrada.
+    """
+
+    def __init__(self, capacidad, previas=None):
+        self.capacidad = int(capacidad)   # Muestras de un barrido (la del buffer de la grafica)
+        self.total = 0
+        self.previas = BufferCircular(previas or capacidad, np.float64)
+        self.dsp = None                   # DSP ya asentado
+        self.filtrando = False
+
+    def procesar(self, dsp, muestras):
+        """(dsp o None, bloque crudo) -> (bloque para la grafica, [(indice R, FC), ...])"""
+        inicio = self.total
+        self.total += len(muestras)
+        if dsp is None:
+            self.previas.escribir(muestras)
+            return muestras, []
+        if dsp is not self.dsp:
+            dsp.asentar(self.previas.ultimos(self.previas.total))
+            self.dsp = dsp
+        filtradas, latidos = dsp.procesar(muestras)
+        if not self.filtrando and dsp.filtrando:
+            corte = -inicio % self.capacidad   # Muestras hasta el inicio del proximo barrido
+            if corte >= len(muestras):
+                return muestras, latidos
+            self.filtrando = True
+            if corte:
+                filtradas = np.concatenate((muestras[:corte], filtradas[corte:]))
+        return filtradas, latidos
+
+
+# --- BUFFER EN MEMORIA COMPARTIDA ---
+# Cabecera de 32 bytes delante de las muestras:
+#   int64 secuencia (impar mientras se escribe) | int64 indice | int64 total | float64 instante
+# Seqlock sin locks entre procesos, valido SOLO con un escritor: el proceso de analisis es el
+# unico que llama a escribir() (el incremento de la secuencia no es atomico; dos escritores la
+# corromperian). Los lectores (GUI) leen la secuencia, copian y la vuelven a leer: si era impar
+# o cambio durante la copia, la copia puede estar a medio escribir y se repite. Si se agotan
+# los intentos no se entrega nunca la copia rota (ver vista_barrido y ultimos).
+TAM_CABECERA_COMPARTIDA = 32
+
+
+class BufferCompartido(BufferCircular):
+    """BufferCircular sobre multiprocessing.shared_memory: lo crea un proceso y otros se conectan por nombre"""
+
+    def __init__(self, capacidad, dtype=np.float32, relleno=np.nan, nombre=None):
+        self.capacidad = int(capacidad)
+        dtype = np.dtype(dtype)
+        self.propietario = nombre is None
+        if self.propietario:
+            self.shm = shared_memory.SharedMemory(
+                create=True, size=TAM_CABECERA_COMPARTIDA + self.capacidad * dtype.itemsize)
+        else:
+            # Un hijo de multiprocessing comparte el resource_tracker del creador: solo este lo borra
+            self.shm = shared_memory.SharedMemory(name=nombre)
+        self.control = np.ndarray(3, np.int64, self.shm.buf, 0)
+        self.marca = np.ndarray(1, np.float64, self.shm.buf, 24)
+        self.datos = np.ndarray(self.capacidad, dtype, self.shm.buf, TAM_CABECERA_COMPARTIDA)
+        if self.propietario:
+            self.control[:] = 0
+            self.marca[0] = 0.0
+            self.datos[:] = relleno
+        self.copia = None           # Destino intermedio de vista_barrido
+        self.lecturas_fallidas = 0  # Lecturas abandonadas porque el escritor no dejo copiar
+
+    @property
+    def nombre(self):
+        return self.shm.name
+
+    @property
+    def indice(self):
+        return int(self.control[1])
+
+    @indice.setter
+    def indice(self, valor):
+        self.control[1] = valor
+
+    @property
+    def total(self):
+        return int(self.control[2])
+
+    @total.setter
+    def total(self, valor):
+        self.control[2] = valor
+
+    @property
+    def instante(self):
+        """time.perf_counter() de la ultima escritura (reloj monotono comun a los procesos)"""
+        return float(self.marca[0])
+
+    def escribir(self, muestras):
+        """Solo desde el proceso escritor: la secuencia queda impar mientras dura la escritura"""
+        if len(muestras) == 0:
+            return
+        self.control[0] += 1
+        super().escribir(muestras)
+        self.marca[0] = time.perf_counter()
+        self.control[0] += 1
+
+    def _leer(self, copiar, intentos):
+        """Resultado de copiar() si la secuencia era par y no cambio durante la copia; None si no se logra"""
+        for _ in range(intentos):
+            secuencia = int(self.control[0])
+            if secuencia % 2 == 0:
+                resultado = copiar()
+                if self.control[0] == secuencia:
+                    return resultado
+            time.sleep(0)
+        self.lecturas_fallidas += 1
+        return None
+
+    def ultimos(self, n, intentos=5):
+        """Como BufferCircular.ultimos; None si no se pudo leer una copia coherente"""
+        return self._leer(lambda: BufferCircular.ultimos(self, n), intentos)
+
+    def vista_barrido(self, destino, hueco=0, intentos=5):
+        """Se copia primero a un intermedio: si no se logra una copia coherente, 'destino' conserva
+        el ultimo fotograma valido en vez de uno a medio escribir"""
+        if self.copia is None or self.copia.shape != destino.shape:
+            self.copia = np.empty_like(destino)
+        if self._leer(lambda: BufferCircular.vista_barrido(self, self.copia, hueco), intentos) is not None:
+            np.copyto(destino, self.copia)
+        return destino
+
+    def cerrar(self):
+        # Las vistas NumPy deben soltarse antes de cerrar el segmento
+        del self.control, self.marca, self.datos
+        self.copia = None
+        self.shm.close()
+        if self.propietario:
+            self.shm.unlink()
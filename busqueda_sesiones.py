@@ -0,0 +1,175 @@
+import os
+import sys
+import time
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QLineEdit,
+                             QPushButton, QComboBox, QCheckBox, QDateEdit, QListWidget, QListWidgetItem)
+from PyQt5.QtCore import QThread, QDate, Qt, pyqtSignal
+
+from indice_sesiones import IndiceSesiones, RUTA_INDICE
+from ventana_revision import VentanaRevision
+
+# --- BUSQUEDA DE SESIONES ---
+# Ventana de consulta del indice (indice_sesiones.py) por paciente, rango de fechas y tipo de
+# evento. Al abrirse recoge en segundo plano los historiales nuevos de la carpeta; las
+# busquedas solo leen la base. Doble clic en un resultado abre la revision en ese instante.
+TIPOS_BUSQUEDA = [("Sesiones", None), ("Todos los eventos", ""), ("Alarmas", "ALARMA"), ("Normalizaciones", "INFO"),
+                  ("Sistema", "SISTEMA"), ("Enlace", "ENLACE")]
+MAX_RESULTADOS = 2000
+
+
+class HiloIndexado(QThread):
+    """Indexa archivos concretos o actualiza una carpeta sin bloquear la GUI"""
+    sig_fin = pyqtSignal(str)
+
+    def __init__(self, paths=(), directorio=None, ruta=RUTA_INDICE):
+        super().__init__()
+        self.paths = list(paths)
+        self.directorio = directorio
+        self.ruta = ruta
+
+    def run(self):
+        try:
+            indice = IndiceSesiones(self.ruta)  # Conexion propia de este hilo
+        except Exception as e:
+            self.sig_fin.emit(f"Error de indice: {e}")
+            return
+        try:
+            for path in self.paths:
+                indice.indexar(path, forzar=True)
+            if self.directorio is not None:
+                indexados, eliminados = indice.actualizar(self.directorio)
+                self.sig_fin.emit(f"Indice actualizado: {indexados} nuevos, {eliminados} eliminados")
+            else:
+                self.sig_fin.emit(f"Indexado: {', '.join(os.path.basename(p) for p in self.paths)}")
+        except Exception as e:
+            self.sig_fin.emit(f"Error de indice: {e}")
+        finally:
+            indice.cerrar()
+
+
+class VentanaBusqueda(QMainWindow):
+    def __init__(self, directorio=".", ruta=RUTA_INDICE):
+        super().__init__()
+        self.setWindowTitle("Busqueda de Historiales")
+        self.setGeometry(140, 140, 900, 550)
+        self.setStyleSheet("background-color: #121212; color: #00FF00;")
+        self.indice = IndiceSesiones(ruta)
+        self.ventanas_revision = []
+        self.initUI()
+
+        self.hilo = HiloIndexado(directorio=directorio, ruta=ruta)
+        self.hilo.sig_fin.connect(self.indexado)
+        self.lbl_estado.setText("Actualizando indice...")
+        self.hilo.start()
+        self.buscar()
+
+    def initUI(self):
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        main_layout = QVBoxLayout(central_widget)
+        estilo_campo = "background-color: #333333; color: white; padding: 4px; border: none;"
+
+        filtros = QHBoxLayout()
+        self.input_paciente = QLineEdit()
+        self.input_paciente.setPlaceholderText("Paciente")
+        self.input_paciente.setStyleSheet(estilo_campo)
+        self.input_paciente.returnPressed.connect(self.buscar)
+        filtros.addWidget(self.input_paciente, stretch=2)
+
+        self.chk_fechas = QCheckBox("Desde")
+        self.chk_fechas.setStyleSheet("color: white;")
+        filtros.addWidget(self.chk_fechas)
+        hoy = QDate.currentDate()
+        self.fecha_desde = QDateEdit(hoy.addDays(-30))
+        self.fecha_hasta = QDateEdit(hoy)
+        for fecha in (self.fecha_desde, self.fecha_hasta):
+            fecha.setCalendarPopup(True)
+            fecha.setDisplayFormat("yyyy-MM-dd")
+            fecha.setStyleSheet(estilo_campo)
+            fecha.setEnabled(False)
+            self.chk_fechas.toggled.connect(fecha.setEnabled)
+        filtros.addWidget(self.fecha_desde)
+        filtros.addWidget(QLabel("hasta"))
+        filtros.addWidget(self.fecha_hasta)
+
+        self.combo_tipo = QComboBox()
+        self.combo_tipo.addItems([nombre for nombre, _ in TIPOS_BUSQUEDA])
+        self.combo_tipo.setCurrentIndex(2)
+        self.combo_tipo.setStyleSheet("background-color: #333333; color: white;")
+        filtros.addWidget(self.combo_tipo)
+
+        self.input_detalle = QLineEdit()
+        self.input_detalle.setPlaceholderText("Detalle (p.ej. HIPOXIA)")
+        self.input_detalle.setStyleSheet(estilo_campo)
+        self.input_detalle.returnPressed.connect(self.buscar)
+        filtros.addWidget(self.input_detalle, stretch=2)
+
+        self.btn_buscar = QPushButton("BUSCAR")
+        self.btn_buscar.setStyleSheet("background-color: #004400; color: white; font-weight: bold; padding: 6px; border-radius: 5px;")
+        self.btn_buscar.clicked.connect(self.buscar)
+        filtros.addWidget(self.btn_buscar)
+        main_layout.addLayout(filtros)
+
+        self.lista = QListWidget()
+        self.lista.setStyleSheet("background-color: #1E1E1E; color: white; border: 1px solid #333333;")
+        self.lista.itemDoubleClicked.connect(self.abrir_resultado)
+        main_layout.addWidget(self.lista, stretch=1)
+
+        self.lbl_estado = QLabel("")
+        self.lbl_estado.setStyleSheet("color: gray; font-size: 10px;")
+        main_layout.addWidget(self.lbl_estado)
+
+    def indexado(self, mensaje):
+        self.lbl_estado.setText(mensaje)
+        self.buscar()
+
+    def buscar(self):
+        paciente = self.input_paciente.text().strip() or None
+        desde = self.fecha_desde.date().toPyDate() if self.chk_fechas.isChecked() else None
+        hasta = self.fecha_hasta.date().toPyDate() if self.chk_fechas.isChecked() else None
+        tipo = TIPOS_BUSQUEDA[self.combo_tipo.currentIndex()][1]
+        inicio = time.perf_counter()
+        self.lista.clear()
+        if tipo is None:
+            resultados = self.indice.buscar_sesiones(paciente, desde, hasta)
+            for s in resultados[:MAX_RESULTADOS]:
+                item = QListWidgetItem(f"{(s['inicio'] or '-')[:19]}  {s['paciente']}  "
+                                       f"{s['duracion'] / 60:.1f} min  {os.path.basename(s['path'])}")
+                item.setData(Qt.UserRole, (s["path"], 0.0))
+                self.lista.addItem(item)
+        else:
+            resultados = self.indice.buscar_eventos(paciente, desde, hasta, tipo or None,
+                                                    self.input_detalle.text().strip() or None)
+            for e in resultados[:MAX_RESULTADOS]:
+                item = QListWidgetItem(f"{(e['instante'] or '-')[:19]}  {e['paciente']}  {e['tipo']}  "
+                                       f"{e['detalle']} {e['valor']}  ({os.path.basename(e['path'])})")
+                item.setData(Qt.UserRole, (e["path"], e["t"]))
+                if e["tipo"] == "ALARMA":
+                    item.setForeground(Qt.red)
+                self.lista.addItem(item)
+        ms = (time.perf_counter() - inicio) * 1e3
+        mostrados = f" (se muestran {MAX_RESULTADOS})" if len(resultados) > MAX_RESULTADOS else ""
+        self.setWindowTitle(f"Busqueda de Historiales - {len(resultados)} resultados{mostrados} en {ms:.0f} ms")
+
+    def abrir_resultado(self, item):
+        path, t = item.data(Qt.UserRole)
+        try:
+            ventana = VentanaRevision(path)
+        except (OSError, ValueError) as e:
+            self.lbl_estado.setText(f"Error al abrir historial: {e}")
+            return
+        ventana.ir_a(t)
+        self.ventanas_revision = [v for v in self.ventanas_revision if v.isVisible()] + [ventana]
+        ventana.show()
+
+    def closeEvent(self, event):
+        self.hilo.wait()
+        self.indice.cerrar()
+        event.accept()
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = VentanaBusqueda(sys.argv[1] if len(sys.argv) > 1 else ".")
+    window.show()
+    sys.exit(app.exec_())
@@ -0,0 +1,237 @@
+import time
+import numpy as np
+from scipy import signal
+
+# --- PROCESADO ECG EN EL PC ---
+# Filtros IIR en secciones de segundo orden (sosfilt) con estado entre bloques, de modo que
+# cada datagrama se filtra en una sola llamada vectorizada sin transitorios en los bordes:
+#   1) paso alto 0.5 Hz  -> quita la deriva de linea base (respiracion, movimiento)
+#   2) notch 50/60 Hz    -> interferencia de red
+#   3) paso bajo 40 Hz   -> junto con 1) forma el paso banda diagnostico
+# Sobre la señal filtrada, un detector de R incremental (energia de la derivada integrada,
+# estilo Pan-Tompkins) con umbral adaptativo da la FC latido a latido.
+CORTE_LINEA_BASE = 0.5
+CORTE_PASO_BAJO = 40.0
+FRECUENCIA_RED = 50.0        # 60.0 en America del Norte
+Q_NOTCH = 30.0
+VENTANA_INTEGRACION = 0.150  # s, ancho tipico de un QRS
+REFRACTARIO = 0.250          # s, no puede haber dos latidos mas cerca (240 lpm)
+APRENDIZAJE = 2.0            # s iniciales para estimar los niveles de señal y ruido
+HR_MIN, HR_MAX = 20, 300
+AMPLITUD_MIN_QRS = 100.0     # ADC filtrado; por debajo es ruido (electrodos sueltos), no un latido
+CADUCIDAD_HR = 5.0           # s sin latidos tras los que la FC del ECG deja de valer
+ESTIMACION_FS = 3.0          # s de llegada de muestras para medir la frecuencia real
+MINIMO_VALIDO = 0            # ADC; >0 sustituye lo que quede por debajo por la muestra anterior. Solo para
+                             # historiales antiguos con lineas partidas ("2034" -> "20", "34"); en vivo
+                             # protocolo.py ya recompone esas lineas y la señal real no se toca
+
+
+def disenar_filtro(fs, red=FRECUENCIA_RED, linea_base=CORTE_LINEA_BASE, paso_bajo=CORTE_PASO_BAJO):
+    """Cascada SOS: paso alto + notch (si la red cabe bajo Nyquist) + paso bajo"""
+    nyquist = fs / 2
+    secciones = [signal.butter(2, linea_base, "highpass", fs=fs, output="sos")]
+    if red and red < nyquist * 0.95:
+        b, a = signal.iirnotch(red, Q_NOTCH, fs=fs)
+        secciones.append(signal.tf2sos(b, a))
+    if paso_bajo and paso_bajo < nyquist * 0.95:
+        secciones.append(signal.butter(4, paso_bajo, "lowpass", fs=fs, output="sos"))
+    return np.vstack(secciones)
+
+
+class FiltroECG:
+    """Cascada de filtros con estado: procesar() se puede llamar con bloques de cualquier tamaño"""
+
+    def __init__(self, fs, red=FRECUENCIA_RED):
+        self.sos = disenar_filtro(fs, red)
+        self.zi = None
+
+    def procesar(self, muestras):
+        x = np.asarray(muestras, dtype=np.float64)
+        if not len(x):
+            return x
+        if self.zi is None:
+            # Estado inicial como si la señal llevara siempre en su primer valor: sin escalon de arranque
+            self.zi = signal.sosfilt_zi(self.sos) * x[0]
+        y, self.zi = signal.sosfilt(self.sos, x, zi=self.zi)
+        return y
+
+
+class DetectorR:
+    """Detector de complejos QRS incremental; procesar() devuelve los latidos confirmados en el bloque"""
+
+    def __init__(self, fs):
+        self.fs = fs
+        self.ancho = max(1, int(VENTANA_INTEGRACION * fs))
+        self.refractario = int(REFRACTARIO * fs)
+        self.aprendizaje = int(APRENDIZAJE * fs)
+        self.previo = 0.0                              # Ultima muestra del bloque anterior (derivada)
+        self.cola_energia = np.zeros(self.ancho - 1)   # Energia pendiente de la ventana de integracion
+        self.pendiente = np.zeros(0)                   # Señal integrada aun sin decidir
+        self.senal = np.zeros(0)                       # Señal filtrada alineada con 'pendiente'
+        self.inicio_pendiente = 0                      # Indice absoluto de pendiente[0]
+        self.decidido = 0                              # Indice absoluto hasta el que ya se decidio
+        self.total = 0
+        self.nivel_senal = 0.0
+        self.nivel_ruido = 0.0
+        self.ultimo_r = None
+        self.ultima_hr = None
+        self.caducidad = int(CADUCIDAD_HR * fs)
+
+    @property
+    def hr(self):
+        """Ultima FC latido a latido; None si hace mas de CADUCIDAD_HR s (de señal) del ultimo latido"""
+        if self.ultimo_r is None or self.total - self.ultimo_r > self.caducidad:
+            return None
+        return self.ultima_hr
+
+    @property
+    def umbral(self):
+        return self.nivel_ruido + 0.25 * (self.nivel_senal - self.nivel_ruido)
+
+    def procesar(self, y):
+        """y: bloque filtrado -> lista de (indice absoluto de la R, FC en lpm o None)"""
+        if not len(y):
+            return []
+        d = np.diff(y, prepend=self.previo)
+        self.previo = y[-1]
+        energia = np.concatenate((self.cola_energia, d * d))
+        self.cola_energia = energia[len(energia) - (self.ancho - 1):]
+        acumulada = np.cumsum(energia)
+        integrada = (acumulada[self.ancho - 1:] - np.concatenate(([0.0], acumulada[:-self.ancho]))) / self.ancho
+        self.total += len(y)
+
+        self.pendiente = np.concatenate((self.pendiente, integrada))
+        self.senal = np.concatenate((self.senal, y))
+        if self.total < self.aprendizaje:
+            return []
+        if self.nivel_senal == 0.0:
+            self.nivel_senal = float(self.pendiente.max()) * 0.5
+            self.nivel_ruido = float(np.median(self.pendiente))
+
+        # Solo se deciden los picos con un periodo refractario completo detras (retraso ~250 ms)
+        corte = len(self.pendiente) - self.refractario
+        if corte <= 0:
+            return []
+        picos, _ = signal.find_peaks(self.pendiente, distance=self.refractario)
+        picos = picos[(picos < corte) & (picos >= self.decidido - self.inicio_pendiente)]
+        latidos = []
+        for p in picos:
+            valor = self.pendiente[p]
+            # La energia integrada culmina al final del QRS: la R es el maximo de |y| en la ventana previa
+            a = max(0, p - self.ancho)
+            tramo = np.abs(self.senal[a:p + 1])
+            indice = self.inicio_pendiente + a + int(np.argmax(tramo))
+            if (valor > self.umbral and tramo.max() >= AMPLITUD_MIN_QRS
+                    and (self.ultimo_r is None or indice - self.ultimo_r >= self.refractario)):
+                self.nivel_senal = 0.125 * valor + 0.875 * self.nivel_senal
+                hr = None
+                if self.ultimo_r is not None:
+                    hr = 60.0 * self.fs / (indice - self.ultimo_r)
+                    hr = hr if HR_MIN <= hr <= HR_MAX else None
+                self.ultimo_r = indice
+                if hr is not None:
+                    self.ultima_hr = hr
+                latidos.append((indice, hr))
+            else:
+                self.nivel_ruido = 0.125 * valor + 0.875 * self.nivel_ruido
+        # Se conserva un refractario ya decidido para que find_peaks vea los picos del borde como interiores
+        self.decidido = self.inicio_pendiente + corte
+        conservar = max(0, corte - self.refractario)
+        self.pendiente = self.pendiente[conservar:]
+        self.senal = self.senal[conservar:]
+        self.inicio_pendiente += conservar
+        return latidos
+
+
+class ProcesadorDSP:
+    """Filtro + detector de R para un flujo (un dispositivo).
+
+    Con fs=None la frecuencia se mide con el ritmo de llegada durante los primeros
+    ESTIMACION_FS segundos (el firmware actual entrega menos de los FS nominales);
+    mientras tanto procesar() devuelve las muestras crudas y ningun latido.
+    """
+
+    def __init__(self, fs=None, red=FRECUENCIA_RED, desplazamiento=0.0, minimo_valido=MINIMO_VALIDO):
+        self.red = red
+        self.minimo_valido = minimo_valido
+        self.ultima_valida = None
+        self.desplazamiento = desplazamiento  # Se suma a la salida (p.ej. centro del ADC para la grafica)
+        self.fs = None
+        self.filtro = None
+        self.detector = None
+        self.t_inicio = None
+        self.previas = []
+        if fs:
+            self._configurar(fs)
+
+    @property
+    def hr(self):
+        return self.detector.hr if self.detector else None
+
+    @property
+    def filtrando(self):
+        """False mientras se mide la frecuencia (procesar() devuelve la señal cruda)"""
+        return self.filtro is not None
+
+    def asentar(self, previas):
+        """Pasa muestras anteriores por filtros y detector sin devolver nada: evita el arranque en frio
+        cuando el DSP llega con la señal ya en marcha. Sin frecuencia aun no hace nada (la estimacion
+        ya asienta el estado con lo que recibe)"""
+        x = np.asarray(previas, dtype=np.float64)
+        if self.filtro is None or not len(x):
+            return
+        if self.minimo_valido:
+            x = self._sin_artefactos(x)
+        self.detector.procesar(self.filtro.procesar(x))
+
+    def _configurar(self, fs):
+        self.fs = fs
+        self.filtro = FiltroECG(fs, self.red)
+        self.detector = DetectorR(fs)
+
+    def _estimar(self, muestras):
+        ahora = time.monotonic()
+        if self.t_inicio is None:
+            # El primer bloque marca el origen: sus muestras no cuentan para el ritmo
+            self.t_inicio = ahora
+            self.n_estimacion = 0
+        else:
+            self.n_estimacion += len(muestras)
+        if ahora - self.t_inicio < ESTIMACION_FS or self.n_estimacion == 0:
+            self.previas.append(np.asarray(muestras, dtype=np.float64))
+            return False
+        self._configurar(round(self.n_estimacion / (ahora - self.t_inicio), 1))
+        # Lo acumulado solo sirve para asentar el estado de filtros y detector; el bloque
+        # actual lo filtra procesar() (una sola vez, para no desplazar los indices de las R)
+        if self.previas:
+            self.detector.procesar(self.filtro.procesar(np.concatenate(self.previas)))
+        self.previas = []
+        return True
+
+    def _sin_artefactos(self, x):
+        """Sustituye las muestras imposibles por la ultima valida (vectorizado)"""
+        validas = x >= self.minimo_valido
+        if validas.all():
+            self.ultima_valida = x[-1]
+            return x
+        posiciones = np.where(validas, np.arange(len(x)), -1)
+        np.maximum.accumulate(posiciones, out=posiciones)
+        relleno = self.ultima_valida
+        if relleno is None:
+            if not validas.any():
+                return x  # Aun no hay ninguna referencia valida
+            relleno = x[validas][0]
+        y = np.where(posiciones >= 0, x[np.maximum(posiciones, 0)], relleno)
+        self.ultima_valida = y[-1]
+        return y
+
+    def procesar(self, muestras):
+        """Bloque crudo -> (bloque filtrado, [(indice R, FC), ...])"""
+        x = np.asarray(muestras, dtype=np.float64)
+        if len(x) and self.minimo_valido:
+            x = self._sin_artefactos(x)
+        if self.filtro is None and not self._estimar(x):
+            return x, []
+        y = self.filtro.procesar(x)
+        latidos = self.detector.procesar(y)
+        return (y + self.desplazamiento if self.desplazamiento else y), latidos
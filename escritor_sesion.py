@@ -0,0 +1,155 @@
+import os
+import time
+import queue
+import datetime
+import threading
+import numpy as np
+
+from metricas import metricas
+
+# --- POLITICA DE ESCRITURA ---
+MAX_COLA = 10000        # Registros pendientes antes de empezar a descartar
+LOTE_LINEAS = 2000      # Lineas acumuladas que fuerzan un flush
+INTERVALO_FLUSH = 0.5   # Segundos maximos entre flushes
+
+_FIN = object()  # Marca de cierre en la cola
+
+
+class EscritorSesion(threading.Thread):
+    """Hilo que escribe el historial de sesion a disco sin bloquear la GUI.
+
+    La GUI solo encola (instante, tipo, detalle, valor); el formateo de la hora,
+    la escritura y los flush se hacen aqui, por lotes.
+    """
+    modo_archivo = "w"
+    vacio = ""
+
+    def __init__(self, filename, cabecera, max_cola=MAX_COLA, lote=LOTE_LINEAS, intervalo=INTERVALO_FLUSH):
+        super().__init__(daemon=True)
+        self.filename = filename
+        self.lote = lote
+        self.intervalo = intervalo
+        self.cola = queue.Queue(maxsize=max_cola)
+        self.descartados = 0     # Lineas (muestras) que no llegaron al archivo
+        self.bytes_escritos = 0
+        self.error = None
+        self.cerrando = False    # Con la cola llena, el hilo termina al vaciarla aunque no le llegue _FIN
+        self._cache_hora = (None, "")
+
+        # Se abre aqui para que un error de disco llegue a quien inicia la grabacion
+        self.file_handle = open(filename, self.modo_archivo)
+        self._escribir_cabecera(cabecera)
+
+    def _escribir_cabecera(self, cabecera):
+        texto = "".join(f"{linea}\n" for linea in cabecera)
+        self.file_handle.write(texto)
+        self.bytes_escritos += len(texto.encode())
+
+    @property
+    def profundidad(self):
+        return self.cola.qsize()
+
+    def registrar(self, tipo, detalle, valor=""):
+        """Encola un registro; si 'detalle' o 'valor' es un np.ndarray se escribe una linea por elemento"""
+        try:
+            self.cola.put_nowait((time.time(), tipo, detalle, valor))
+        except queue.Full:
+            bloque = valor if isinstance(valor, np.ndarray) else detalle
+            self.descartados += len(bloque) if isinstance(bloque, np.ndarray) else 1
+
+    def cerrar(self, timeout=5.0):
+        """Vacia la cola, hace fsync y cierra el archivo; no bloquea a quien llama mas de 'timeout' s.
+
+        Si el hilo no termina a tiempo (disco lento) sigue vaciando la cola y cierra el archivo por su cuenta.
+        """
+        limite = time.monotonic() + timeout
+        self.cerrando = True
+        try:
+            self.cola.put(_FIN, timeout=timeout)
+        except queue.Full:
+            pass  # El hilo vera 'cerrando' cuando vacie la cola
+        if self.is_alive():
+            self.join(max(0.0, limite - time.monotonic()))
+        elif not self.file_handle.closed:
+            self._cerrar_archivo()  # El hilo murio o no llego a arrancar
+
+    def run(self):
+        pendientes = []
+        n_lineas = 0
+        ultimo_flush = time.monotonic()
+        primero = None  # Instante del registro mas antiguo sin volcar (metricas registro->disco)
+
+        while True:
+            try:
+                registro = self.cola.get(timeout=self.intervalo)
+            except queue.Empty:
+                registro = _FIN if self.cerrando else None
+
+            fin = registro is _FIN
+            if registro is not None and not fin:
+                if primero is None:
+                    primero = registro[0]
+                n_lineas += self._codificar(pendientes, *registro)
+
+            ahora = time.monotonic()
+            if pendientes and (fin or n_lineas >= self.lote or ahora - ultimo_flush >= self.intervalo):
+                escritos = self.bytes_escritos
+                self._volcar(pendientes, n_lineas)
+                if metricas:
+                    metricas.observar("registro->disco", time.time() - primero)
+                    metricas.contar("bytes a disco", self.bytes_escritos - escritos)
+                primero = None
+                pendientes = []
+                n_lineas = 0
+                ultimo_flush = ahora
+
+            if fin:
+                break
+
+        self._cerrar_archivo()
+
+    def _cerrar_archivo(self):
+        try:
+            self.file_handle.flush()
+            os.fsync(self.file_handle.fileno())
+        except OSError as e:
+            self.error = e
+        finally:
+            self.file_handle.close()
+
+    def _codificar(self, pendientes, instante, tipo, detalle, valor):
+        """Anade a 'pendientes' el texto del registro y devuelve cuantas lineas genero"""
+        if instante != self._cache_hora[0]:
+            t_txt = datetime.datetime.fromtimestamp(instante).strftime("%H:%M:%S.%f")[:-3]
+            self._cache_hora = (instante, t_txt)
+        t_actual = self._cache_hora[1]
+
+        if isinstance(valor, np.ndarray):
+            prefijo = f"{t_actual},{tipo},{detalle},"
+            pendientes.extend(f"{prefijo}{v:.2f}\n" for v in valor)
+            return len(valor)
+        if isinstance(detalle, np.ndarray):
+            prefijo = f"{t_actual},{tipo},"
+            pendientes.extend(f"{prefijo}{v:.2f},{valor}\n" for v in detalle)
+            return len(detalle)
+        pendientes.append(f"{t_actual},{tipo},{detalle},{valor}\n")
+        return 1
+
+    def _volcar(self, pendientes, n_lineas):
+        texto = self.vacio.join(pendientes)
+        try:
+            self.file_handle.write(texto)
+            self.file_handle.flush()
+            # Bytes reales en disco (UTF-8 y saltos de linea del sistema), no caracteres
+            self.bytes_escritos = os.fstat(self.file_handle.fileno()).st_size
+        except OSError as e:
+            self.error = e
+            self.descartados += n_lineas
+
+
+def crear_escritor(formato, filename, cabecera):
+    """EscritorSesion (texto) o EscritorBinario (.ecgb) segun 'formato'"""
+    if formato == "binario":
+        from formato_binario import EscritorBinario  # formato_binario importa este modulo
+        return EscritorBinario(filename, cabecera)
+    return EscritorSesion(filename, cabecera)
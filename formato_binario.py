@@ -0,0 +1,278 @@
+import sys
+import json
+import struct
+import datetime
+import argparse
+import numpy as np
+
+from escritor_sesion import EscritorSesion
+from historial_texto import clasificar, iterar_registros
+
+# --- FORMATO BINARIO DE SESION (.ecgb) ---
+# Cabecera:  b"ECGB" | version u16 | largo u32 | JSON (paciente, edad, inicio, fs, dtype)
+# Despues, bloques en orden de llegada, cada uno con un byte de tipo:
+#   b"E" ECG:    indice u64 | instante f64 | n u32 | n muestras (int16 o float32)
+#   b"S" STATS:  indice u64 | instante f64 | spo2 i16 | hr i16
+#   b"V" EVENTO: indice u64 | instante f64 | largo u16 | "tipo\x1fdetalle\x1fvalor" utf-8
+# 'indice' es el numero de muestras ECG anteriores al registro: t = inicio + indice / fs.
+# 'instante' es la hora de llegada (epoch) para no perder la sincronia real del enlace.
+MAGIA = b"ECGB"
+VERSION = 1
+EXTENSION = ".ecgb"
+
+CAB = struct.Struct("<4sHI")
+BLOQUE_ECG = struct.Struct("<cQdI")
+BLOQUE_STATS = struct.Struct("<cQdhh")
+BLOQUE_EVENTO = struct.Struct("<cQdH")
+SEP = "\x1f"
+
+BLOQUE_MAX = 4096  # Muestras maximas por bloque al convertir desde texto
+FS_DEFECTO = 500
+
+
+def codificar_cabecera(metadatos):
+    datos = json.dumps(metadatos, ensure_ascii=False).encode("utf-8")
+    return CAB.pack(MAGIA, VERSION, len(datos)) + datos
+
+
+def codificar_ecg(indice, instante, muestras, dtype):
+    muestras = np.asarray(muestras).astype(dtype, copy=False)
+    return BLOQUE_ECG.pack(b"E", indice, instante, len(muestras)) + muestras.tobytes()
+
+
+def codificar_stats(indice, instante, spo2, hr):
+    return BLOQUE_STATS.pack(b"S", indice, instante, spo2, hr)
+
+
+def codificar_evento(indice, instante, tipo, detalle, valor):
+    texto = SEP.join((tipo, detalle, valor)).encode("utf-8")
+    return BLOQUE_EVENTO.pack(b"V", indice, instante, len(texto)) + texto
+
+
+class EscritorBinario(EscritorSesion):
+    """Mismo hilo/cola que EscritorSesion pero escribiendo el formato .ecgb"""
+    modo_archivo = "wb"
+    vacio = b""
+
+    def __init__(self, filename, metadatos, **kwargs):
+        self.dtype = np.dtype(metadatos.get("dtype", "int16"))
+        self.muestras = 0
+        super().__init__(filename, metadatos, **kwargs)
+
+    def _escribir_cabecera(self, metadatos):
+        datos = codificar_cabecera(metadatos)
+        self.file_handle.write(datos)
+        self.bytes_escritos += len(datos)
+
+    def _codificar(self, pendientes, instante, tipo, detalle, valor):
+        bloque = valor if isinstance(valor, np.ndarray) else detalle
+        if isinstance(bloque, np.ndarray):
+            pendientes.append(codificar_ecg(self.muestras, instante, bloque, self.dtype))
+            self.muestras += len(bloque)
+            return len(bloque)
+
+        clase, dato = clasificar(tipo, detalle, valor)
+        if clase == "ECG":
+            pendientes.append(codificar_ecg(self.muestras, instante, [dato], self.dtype))
+            self.muestras += 1
+        elif clase == "STATS":
+            pendientes.append(codificar_stats(self.muestras, instante, *dato))
+        else:
+            pendientes.append(codificar_evento(self.muestras, instante, *dato))
+        return 1
+
+
+class SesionBinaria:
+    """Contenido de un .ecgb: ECG continuo y tablas separadas de bloques, vitales y eventos"""
+
+    def __init__(self, metadatos, ecg, bloques, stats, eventos):
+        self.metadatos = metadatos
+        self.ecg = ecg            # np.ndarray con todas las muestras
+        self.bloques = bloques    # np.ndarray estructurado (indice, instante, n)
+        self.stats = stats        # np.ndarray estructurado (indice, instante, spo2, hr)
+        self.eventos = eventos    # lista de (indice, instante, tipo, detalle, valor)
+
+    @property
+    def fs(self):
+        return self.metadatos.get("fs", FS_DEFECTO)
+
+
+def iterar_bloques(datos):
+    """Recorre los bloques de un .ecgb ya cargado (bytes o mmap) -> (metadatos, generador)"""
+    magia, version, largo = CAB.unpack_from(datos, 0)
+    if magia != MAGIA:
+        raise ValueError("No es un archivo de sesion .ecgb")
+    if version > VERSION:
+        raise ValueError(f"Version de formato no soportada: {version}")
+    metadatos = json.loads(bytes(datos[CAB.size:CAB.size + largo]).decode("utf-8"))
+    dtype = np.dtype(metadatos.get("dtype", "int16"))
+
+    def generador():
+        pos = CAB.size + largo
+        fin = len(datos)
+        while pos < fin:
+            tipo = datos[pos:pos + 1]
+            if tipo == b"E":
+                _, indice, instante, n = BLOQUE_ECG.unpack_from(datos, pos)
+                pos += BLOQUE_ECG.size
+                muestras = np.frombuffer(datos, dtype=dtype, count=n, offset=pos)
+                pos += n * dtype.itemsize
+                yield "ECG", indice, instante, muestras
+            elif tipo == b"S":
+                _, indice, instante, spo2, hr = BLOQUE_STATS.unpack_from(datos, pos)
+                pos += BLOQUE_STATS.size
+                yield "STATS", indice, instante, (spo2, hr)
+            elif tipo == b"V":
+                _, indice, instante, n = BLOQUE_EVENTO.unpack_from(datos, pos)
+                pos += BLOQUE_EVENTO.size
+                texto = bytes(datos[pos:pos + n]).decode("utf-8")
+                pos += n
+                yield "EVENTO", indice, instante, tuple(texto.split(SEP, 2))
+            else:
+                raise ValueError(f"Bloque desconocido en la posicion {pos}")
+
+    return metadatos, generador()
+
+
+def leer_binario(path):
+    with open(path, "rb") as f:
+        datos = f.read()
+    metadatos, bloques = iterar_bloques(datos)
+
+    partes_ecg, tabla_bloques, tabla_stats, eventos = [], [], [], []
+    try:
+        for clase, indice, instante, dato in bloques:
+            if clase == "ECG":
+                partes_ecg.append(dato)
+                tabla_bloques.append((indice, instante, len(dato)))
+            elif clase == "STATS":
+                tabla_stats.append((indice, instante) + dato)
+            else:
+                eventos.append((indice, instante) + dato)
+    except struct.error:
+        pass  # Archivo truncado (p.ej. corte de luz): se conserva lo leido
+
+    dtype = np.dtype(metadatos.get("dtype", "int16"))
+    ecg = np.concatenate(partes_ecg) if partes_ecg else np.empty(0, dtype)
+    bloques = np.array(tabla_bloques, dtype=[("indice", "<u8"), ("instante", "<f8"), ("n", "<u4")])
+    stats = np.array(tabla_stats, dtype=[("indice", "<u8"), ("instante", "<f8"), ("spo2", "<i2"), ("hr", "<i2")])
+    return SesionBinaria(metadatos, ecg, bloques, stats, eventos)
+
+
+# --- CONVERSION TEXTO <-> BINARIO ---
+
+def estimar_fs(path):
+    """Frecuencia real de muestreo segun las horas de llegada del historial de texto"""
+    _, registros = iterar_registros(path)
+    n, primero, ultimo = 0, None, None
+    for instante, clase, _ in registros:
+        if clase == "ECG":
+            n += 1
+            primero = primero or instante
+            ultimo = instante
+    if n < 2 or ultimo == primero:
+        return FS_DEFECTO
+    return round((n - 1) / (ultimo - primero).total_seconds(), 2)
+
+
+def texto_a_binario(entrada, salida, fs=None):
+    cabecera, registros = iterar_registros(entrada)
+    if fs is None:
+        fs = estimar_fs(entrada)
+
+    # Primera pasada para saber si las muestras caben en int16 sin perder decimales
+    _, previo = iterar_registros(entrada)
+    enteras = all(v.is_integer() and -32768 <= v <= 32767 for _, c, v in previo if c == "ECG")
+
+    inicio = cabecera["inicio"]
+    metadatos = {
+        "paciente": cabecera["paciente"],
+        "edad": cabecera["edad"],
+        "inicio": inicio.isoformat() if inicio else None,
+        "fs": fs,
+        "dtype": "int16" if enteras else "float32",
+    }
+    dtype = np.dtype(metadatos["dtype"])
+
+    indice = 0
+    bloque, t_bloque = [], None
+    with open(salida, "wb") as f:
+        f.write(codificar_cabecera(metadatos))
+
+        def volcar():
+            nonlocal indice, bloque
+            if bloque:
+                f.write(codificar_ecg(indice, t_bloque, bloque, dtype))
+                indice += len(bloque)
+                bloque = []
+
+        for instante, clase, dato in registros:
+            t = instante.timestamp()
+            if clase == "ECG":
+                if t != t_bloque or len(bloque) >= BLOQUE_MAX:
+                    volcar()
+                    t_bloque = t
+                bloque.append(dato)
+                continue
+            volcar()
+            if clase == "STATS":
+                f.write(codificar_stats(indice, t, *dato))
+            else:
+                f.write(codificar_evento(indice, t, *dato))
+        volcar()
+    return metadatos
+
+
+def binario_a_texto(entrada, salida):
+    """Escribe el .ecgb con el formato Historial_*.txt (TIMESTAMP,TIPO,DETALLE,VALOR)"""
+    with open(entrada, "rb") as f:
+        datos = f.read()
+    metadatos, bloques = iterar_bloques(datos)
+    inicio = metadatos.get("inicio") or ""
+
+    def hora(instante):
+        return datetime.datetime.fromtimestamp(instante).strftime("%H:%M:%S.%f")[:-3]
+
+    with open(salida, "w") as f:
+        f.write("=== LOG DE SISTEMA DE TELEMETRIA ===\n")
+        f.write(f"PACIENTE: {metadatos.get('paciente', '')} | EDAD: {metadatos.get('edad', '')}\n")
+        f.write(f"INICIO SESION: {datetime.datetime.fromisoformat(inicio) if inicio else ''}\n")
+        f.write("====================================\n")
+        f.write("TIMESTAMP,TIPO,DETALLE,VALOR\n")
+        for clase, indice, instante, dato in bloques:
+            t_txt = hora(instante)
+            if clase == "ECG":
+                f.write("".join(f"{t_txt},ECG,Muestra,{v:.2f}\n" for v in dato.tolist()))
+            elif clase == "STATS":
+                f.write(f"{t_txt},VITALES,SPO2/HR,{dato[0]}/{dato[1]}\n")
+            else:
+                f.write(f"{t_txt},{dato[0]},{dato[1]},{dato[2]}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Conversor entre historiales de texto y sesiones binarias .ecgb")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_bin = sub.add_parser("a-binario", help="Historial_*.txt / registro_*.txt -> .ecgb")
+    p_bin.add_argument("entrada")
+    p_bin.add_argument("-o", "--salida")
+    p_bin.add_argument("--fs", type=float, help="Frecuencia de muestreo (por defecto se estima del archivo)")
+
+    p_txt = sub.add_parser("a-texto", help=".ecgb -> formato TIMESTAMP,TIPO,DETALLE,VALOR")
+    p_txt.add_argument("entrada")
+    p_txt.add_argument("-o", "--salida")
+
+    args = parser.parse_args(argv)
+    base = args.entrada.rsplit(".", 1)[0]
+    if args.comando == "a-binario":
+        salida = args.salida or base + EXTENSION
+        metadatos = texto_a_binario(args.entrada, salida, args.fs)
+        print(f"{salida}: fs={metadatos['fs']} Hz, dtype={metadatos['dtype']}")
+    else:
+        salida = args.salida or base + "_convertido.txt"
+        binario_a_texto(args.entrada, salida)
+        print(salida)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
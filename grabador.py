@@ -0,0 +1,247 @@
+import os
+import sys
+import time
+import queue
+import datetime
+import signal
+import argparse
+import threading
+
+from receptor import ReceptorUDP, UDP_IP, UDP_PORT
+from escritor_sesion import crear_escritor
+from alarmas import MotorAlarmas
+from indice_sesiones import IndiceSesiones, RUTA_INDICE
+
+# --- GRABADOR SIN INTERFAZ ---
+# Uso: python grabador.py [--puerto 3333] [--formato texto|binario] [--directorio DIR]
+#                         [--rotar-mb 100] [--rotar-min 60] [--por-puerto] [--paciente NOMBRE]
+#                         [--indice sesiones.db | --sin-indice]
+# Captura de larga duracion en servidores: recibe de todos los puentes UART-UDP con el mismo
+# ReceptorUDP que las interfaces y escribe un historial por dispositivo (mismo formato que
+# monitor_multiple.py), rotando el archivo por tamaño o por tiempo. No importa PyQt5 ni
+# matplotlib; el unico trabajo por muestra es el parseo y el encolado al hilo escritor.
+# Los cambios de estado de las alarmas (alarmas.py) quedan en el historial de cada dispositivo.
+# Cada archivo cerrado (al rotar o al terminar) se añade al indice de sesiones en un hilo aparte.
+FS_ECG = 500
+INTERVALO_ESTADO = 10.0   # s entre lineas de estado por consola
+
+
+class SesionDispositivo:
+    """Historial de un puente: escritor actual, parte, perdidas ya anotadas y alarmas"""
+
+    def __init__(self, origen, alarmas=None):
+        self.origen = origen
+        self.alarmas = MotorAlarmas(alarmas)
+        self.escritor = None
+        self.inicio = 0.0
+        self.parte = 0
+        self.fallo = None    # Instante del ultimo error al abrir un archivo (no se reintenta hasta rotar)
+        self.perdidos_registrados = 0
+
+
+class Grabador:
+    def __init__(self, directorio=".", formato="texto", paciente="Anonimo", rotar_bytes=100 << 20,
+                 rotar_segundos=3600, ip=UDP_IP, puerto=UDP_PORT, por_puerto=False, alarmas=None,
+                 indice=RUTA_INDICE):
+        self.directorio = directorio
+        self.config_alarmas = alarmas
+        self.formato = formato
+        self.paciente = paciente
+        self.rotar_bytes = rotar_bytes
+        self.rotar_segundos = rotar_segundos
+        self.sesiones = {}     # origen -> SesionDispositivo
+        self.cerrando = []     # Escritores rotados que aun vacian su cola
+        self.muestras = 0
+        self.fin = threading.Event()
+        self.receptor = ReceptorUDP(self.al_recibir, ip, puerto, por_puerto, periodico=self.revisar_alarmas)
+        self.indice = indice   # None: no se indexa
+        self.por_indexar = queue.Queue()   # Escritores cerrados (o vaciando su cola) pendientes de indexar
+        self.hilo_indice = threading.Thread(target=self.indexar, daemon=True)
+        if indice:
+            self.hilo_indice.start()
+
+    def nombre_archivo(self, sesion, ahora):
+        dispositivo = sesion.origen.replace(".", "-").replace(":", "_")
+        extension = ".ecgb" if self.formato == "binario" else ".txt"
+        timestamp_str = ahora.strftime("%Y%m%d_%H%M%S")
+        nombre = f"Historial_{self.paciente}_{dispositivo}_{timestamp_str}_p{sesion.parte:03d}{extension}"
+        return os.path.join(self.directorio, nombre)
+
+    def abrir(self, sesion):
+        """Abre la siguiente parte del historial de 'sesion'; el escritor anterior se cierra sin esperar"""
+        ahora = datetime.datetime.now()
+        sesion.parte += 1
+        if self.formato == "binario":
+            cabecera = {
+                "paciente": self.paciente, "edad": "?", "inicio": ahora.isoformat(), "fs": FS_ECG,
+                "dtype": "int16", "dispositivo": sesion.origen, "parte": sesion.parte,
+            }
+        else:
+            cabecera = [
+                "=== LOG DE SISTEMA DE TELEMETRIA ===",
+                f"PACIENTE: {self.paciente} | EDAD: ? | DISPOSITIVO: {sesion.origen}",
+                f"INICIO SESION: {ahora}",
+                f"PARTE: {sesion.parte}",
+                "====================================",
+                "TIMESTAMP,TIPO,DETALLE,VALOR",
+            ]
+        anterior = sesion.escritor
+        try:
+            sesion.escritor = crear_escritor(self.formato, self.nombre_archivo(sesion, ahora), cabecera)
+        except OSError as e:
+            # Disco lleno o de solo lectura: se sigue con el archivo anterior (si lo hay) y no se
+            # reintenta en cada lote sino al cumplirse el siguiente intervalo de rotacion
+            sesion.parte -= 1   # La parte no llego a existir: se reutiliza el numero
+            sesion.fallo = time.monotonic()
+            print(f"Error Disco ({sesion.origen}): {e}")
+            return
+        sesion.escritor.start()
+        sesion.inicio = time.monotonic()
+        sesion.fallo = None
+        if anterior:
+            anterior.registrar("SISTEMA", "ROTACION DE ARCHIVO", str(sesion.parte))
+            # No bloquea aunque la cola este llena: el hilo del escritor termina solo al vaciarla
+            anterior.cerrar(timeout=0)
+            self.cerrando.append(anterior)
+            self.indexar_al_terminar(anterior)
+        sesion.escritor.registrar("SISTEMA", "INICIO DE GRABACION", str(sesion.parte))
+
+    def indexar_al_terminar(self, escritor):
+        if self.indice:
+            self.por_indexar.put(escritor)
+
+    def indexar(self):
+        """Hilo del indice: espera a que cada escritor vacie su cola y añade su historial al indice"""
+        try:
+            indice = IndiceSesiones(self.indice)  # Conexion propia de este hilo
+        except Exception as e:
+            print(f"Error de indice: {e}")
+            return
+        try:
+            while True:
+                escritor = self.por_indexar.get()
+                if escritor is None:
+                    break
+                escritor.join()
+                try:
+                    indice.indexar(escritor.filename, forzar=True)
+                except Exception as e:
+                    print(f"Error de indice ({os.path.basename(escritor.filename)}): {e}")
+        finally:
+            indice.cerrar()
+
+    def toca_abrir(self, sesion):
+        """True si hay que abrir (o rotar) el archivo de 'sesion'"""
+        ahora = time.monotonic()
+        if sesion.fallo is not None:
+            return ahora - sesion.fallo >= self.rotar_segundos
+        escritor = sesion.escritor
+        return (escritor is None or escritor.bytes_escritos >= self.rotar_bytes
+                or ahora - sesion.inicio >= self.rotar_segundos)
+
+    def al_recibir(self, lote):
+        # Hilo del receptor: es el unico que crea, rota y escribe en los escritores
+        for origen, (muestras, stats) in lote.items():
+            sesion = self.sesiones.get(origen)
+            if sesion is None:
+                sesion = self.sesiones[origen] = SesionDispositivo(origen, self.config_alarmas)
+                print(f"Nuevo dispositivo: {origen}")
+            if self.toca_abrir(sesion):
+                self.abrir(sesion)
+            escritor = sesion.escritor
+            if escritor is None:
+                continue
+            if len(muestras):
+                escritor.registrar("ECG", "Muestra", muestras)
+                self.muestras += len(muestras)
+            for spo2, hr in stats:
+                escritor.registrar("VITALES", "SPO2/HR", f"{spo2}/{hr}")
+            perdidos = self.receptor.enlaces[origen].perdidos
+            if perdidos > sesion.perdidos_registrados:
+                escritor.registrar("ENLACE", "DATAGRAMAS PERDIDOS", str(perdidos - sesion.perdidos_registrados))
+                sesion.perdidos_registrados = perdidos
+            for t in sesion.alarmas.procesar(muestras, stats):
+                escritor.registrar(t.tipo, t.detalle, t.valor)
+
+    def revisar_alarmas(self):
+        for sesion in self.sesiones.values():
+            for t in sesion.alarmas.revisar():
+                if sesion.escritor:
+                    sesion.escritor.registrar(t.tipo, t.detalle, t.valor)
+                print(f"{sesion.origen}: {t.detalle}")
+
+    def estado(self, muestras_s):
+        sesiones = list(self.sesiones.values())
+        escritores = [s.escritor for s in sesiones if s.escritor]
+        cola = sum(e.profundidad for e in escritores)
+        descartados = sum(e.descartados for e in escritores)
+        errores = sum(1 for e in escritores if e.error)
+        texto = (f"{len(sesiones)} dispositivos | {self.receptor.datagramas} datagramas | "
+                 f"{muestras_s:.0f} muestras/s | Cola: {cola} | Descartados: {descartados}")
+        if self.receptor.errores:
+            texto += f" | Errores de recepcion: {self.receptor.errores}"
+        return texto + (f" | Errores de disco: {errores}" if errores else "")
+
+    def ejecutar(self, intervalo=INTERVALO_ESTADO):
+        hilo = threading.Thread(target=self.receptor.ejecutar, daemon=True)
+        hilo.start()
+        print(f"Grabando en {os.path.abspath(self.directorio)} (Ctrl+C para terminar)")
+        try:
+            while True:
+                muestras_previas = self.muestras
+                if self.fin.wait(intervalo):
+                    break
+                print(self.estado((self.muestras - muestras_previas) / intervalo))
+                self.cerrando = [e for e in self.cerrando if e.is_alive()]
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.receptor.detener()
+            hilo.join()
+            self.receptor.cerrar()
+            self.cerrar()
+
+    def cerrar(self):
+        for sesion in self.sesiones.values():
+            if sesion.escritor:
+                sesion.escritor.registrar("SISTEMA", "FIN DE GRABACION", "")
+                sesion.escritor.cerrar()
+                self.indexar_al_terminar(sesion.escritor)
+        for escritor in self.cerrando:
+            escritor.join()
+        if self.hilo_indice.is_alive():
+            self.por_indexar.put(None)
+            self.hilo_indice.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grabador de historiales ECG sin interfaz grafica")
+    parser.add_argument("--ip", default=UDP_IP)
+    parser.add_argument("--puerto", type=int, default=UDP_PORT)
+    parser.add_argument("--formato", choices=("texto", "binario"), default="texto")
+    parser.add_argument("--directorio", default=".", help="Carpeta de los historiales")
+    parser.add_argument("--paciente", default="Anonimo", help="Nombre que se pone en los historiales")
+    parser.add_argument("--rotar-mb", type=float, default=100, help="Tamaño maximo de cada archivo (MB)")
+    parser.add_argument("--rotar-min", type=float, default=60, help="Duracion maxima de cada archivo (minutos)")
+    parser.add_argument("--por-puerto", action="store_true", help="Separar dispositivos por ip:puerto")
+    parser.add_argument("--alarmas", help="JSON con las reglas de alarma (por defecto alarmas.REGLAS_DEFECTO)")
+    parser.add_argument("--indice", default=RUTA_INDICE, help="Indice de sesiones donde se añade cada archivo cerrado")
+    parser.add_argument("--sin-indice", action="store_true", help="No indexar los archivos cerrados")
+    parser.add_argument("--estado", type=float, default=INTERVALO_ESTADO, help="Segundos entre lineas de estado")
+    args = parser.parse_args()
+
+    os.makedirs(args.directorio, exist_ok=True)
+    try:
+        grabador = Grabador(args.directorio, args.formato, args.paciente, int(args.rotar_mb * (1 << 20)),
+                            args.rotar_min * 60, args.ip, args.puerto, args.por_puerto, args.alarmas,
+                            None if args.sin_indice else args.indice)
+    except OSError as e:
+        print(f"Error binding socket: {e}")
+        sys.exit(1)
+    # Servicios (systemd, docker stop) terminan con SIGTERM; Ctrl+C llega como KeyboardInterrupt
+    signal.signal(signal.SIGTERM, lambda *_: grabador.fin.set())
+    grabador.ejecutar(args.estado)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# --- BACKENDS DE DIBUJO PARA LA CURVA ECG ---
+# Todos exponen la misma interfaz:
+#   grafica.widget        -> QWidget que se inserta en el layout
+#   grafica.dibujar(y)    -> redibuja la curva con el barrido actual (eje x fijo)
+#   grafica.fijar_eje(x, unidad) -> cambia ese eje fijo (p.ej. al medirse la frecuencia de muestreo)
+#   grafica.mostrar(x, y) -> dibuja una curva con eje x propio (revision de historiales)
+
+Y_MIN = 0
+Y_MAX = 4096
+
+
+class GraficaMatplotlib:
+    """Canvas matplotlib con blitting: ejes y rejilla se cachean, solo se repinta la linea"""
+    nombre = "matplotlib"
+
+    def __init__(self, eje_x, titulo='ECG', unidad='s'):
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+
+        self.fig = Figure(figsize=(5, 4), dpi=100, facecolor='#121212')
+        self.ax = self.fig.add_subplot(111)
+        self.ax.set_facecolor('#000000')
+        self.ax.set_title(titulo, color='white')
+        self.ax.tick_params(axis='x', colors='white')
+        self.ax.tick_params(axis='y', colors='white')
+        self.ax.set_ylim(Y_MIN, Y_MAX)
+        self.ax.set_xlim(eje_x[0], eje_x[-1])
+        self.ax.set_xlabel(unidad, color='white')
+        self.ax.grid(True, color='#333333', linestyle='--')
+        self.line, = self.ax.plot(eje_x, [float('nan')] * len(eje_x), color='#00FF00', linewidth=1.5, animated=True)
+        self.canvas = FigureCanvas(self.fig)
+        self.canvas.mpl_connect('draw_event', self.capturar_fondo)
+        self.fondo = None
+        self.widget = self.canvas
+
+    def capturar_fondo(self, event):
+        """Guarda el fondo estatico (ejes, rejilla) tras un redibujado completo"""
+        self.fondo = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
+
+    def dibujar(self, y):
+        self.line.set_ydata(y)
+        if self.fondo is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.fondo)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.ax.bbox)
+
+    def fijar_eje(self, eje_x, unidad='s'):
+        self.line.set_xdata(eje_x)
+        self.ax.set_xlim(eje_x[0], eje_x[-1])
+        self.ax.set_xlabel(unidad, color='white')
+        self.fondo = None  # Los ejes cambiaron: el siguiente dibujar() repinta todo y vuelve a capturarlo
+        self.canvas.draw_idle()
+
+    def mostrar(self, x, y):
+        """Dibuja una curva con su propio eje x (revision de sesiones grabadas)"""
+        self.line.set_data(x, y)
+        if len(x):
+            self.ax.set_xlim(x[0], x[-1])
+        self.canvas.draw_idle()
+
+
+class GraficaPyqtgraph:
+    """PlotWidget de pyqtgraph con decimado por picos y recorte a la vista"""
+    nombre = "pyqtgraph"
+
+    def __init__(self, eje_x, titulo='ECG', unidad='s', opengl=False):
+        import pyqtgraph as pg
+
+        pg.setConfigOptions(antialias=False, useOpenGL=opengl)
+        self.eje_x = eje_x
+        self.widget = pg.PlotWidget()
+        self.widget.setBackground('#000000')
+        plot = self.widget.getPlotItem()
+        plot.setTitle(titulo, color='w')
+        plot.setLabel('bottom', unidad)
+        plot.setXRange(eje_x[0], eje_x[-1], padding=0)
+        plot.setYRange(Y_MIN, Y_MAX, padding=0)
+        plot.disableAutoRange()
+        plot.setMouseEnabled(x=False, y=False)
+        plot.hideButtons()
+        plot.showGrid(x=True, y=True, alpha=0.3)
+        plot.setDownsampling(auto=True, mode='peak')
+        plot.setClipToView(True)
+        self.curva = plot.plot(pen=pg.mkPen('#00FF00', width=1.5))
+
+    def dibujar(self, y):
+        # connect='finite' corta la linea en el hueco (NaN) del barrido
+        self.curva.setData(self.eje_x, y, connect='finite')
+
+    def fijar_eje(self, eje_x, unidad='s'):
+        self.eje_x = eje_x
+        plot = self.widget.getPlotItem()
+        plot.setLabel('bottom', unidad)
+        plot.setXRange(eje_x[0], eje_x[-1], padding=0)
+
+    def mostrar(self, x, y):
+        """Dibuja una curva con su propio eje x (revision de sesiones grabadas)"""
+        self.curva.setData(x, y, connect='finite')
+        if len(x):
+            self.widget.getPlotItem().setXRange(x[0], x[-1], padding=0)
+
+
+class GraficaPyqtgraphGL(GraficaPyqtgraph):
+    nombre = "pyqtgraph-opengl"
+
+    def __init__(self, eje_x, titulo='ECG', unidad='s'):
+        super().__init__(eje_x, titulo, unidad, opengl=True)
+
+
+BACKENDS = {
+    GraficaMatplotlib.nombre: GraficaMatplotlib,
+    GraficaPyqtgraph.nombre: GraficaPyqtgraph,
+    GraficaPyqtgraphGL.nombre: GraficaPyqtgraphGL,
+}
+
+
+def crear_grafica(nombre, eje_x, titulo='ECG', unidad='s'):
+    """Crea el backend pedido; si no existe o falta la libreria, vuelve a matplotlib"""
+    try:
+        return BACKENDS[nombre](eje_x, titulo, unidad)
+    except (KeyError, ImportError) as e:
+        print(f"Backend grafico '{nombre}' no disponible ({e}), usando matplotlib")
+        return GraficaMatplotlib(eje_x, titulo, unidad)
@@ -0,0 +1,87 @@
+import datetime
+
+# --- LECTURA DE LOS HISTORIALES DE TEXTO ---
+# Soporta los dos formatos que escriben las interfaces:
+#   Historial_*.txt (registro+eventos.py)  -> TIMESTAMP,TIPO,DETALLE,VALOR
+#       ECG:     hh:mm:ss.mmm,ECG,Muestra,<valor>
+#       Vitales: hh:mm:ss.mmm,VITALES,SPO2/HR,<spo2>/<hr>
+#   registro_*.txt (interfaz_registro.py) -> TIMESTAMP,TIPO_DATO,VALOR1,VALOR2
+#       ECG:     hh:mm:ss.mmm,ECG,<valor>,
+#       Vitales: hh:mm:ss.mmm,STATS,<spo2>,<hr>
+
+
+def leer_cabecera(f):
+    """Lee la cabecera hasta la fila de columnas y devuelve un dict con paciente, edad, inicio y formato"""
+    info = {"paciente": "", "edad": "", "dispositivo": "", "inicio": None, "columnas": [], "lineas": 0}
+    for linea in f:
+        info["lineas"] += 1
+        linea = linea.strip()
+        if linea.startswith("TIMESTAMP,"):
+            info["columnas"] = linea.split(",")
+            break
+        if linea.startswith("PACIENTE:"):
+            # "PACIENTE: X | EDAD: Y [| DISPOSITIVO: Z]" o solo "PACIENTE: X"
+            partes = [p.strip() for p in linea.split("|")]
+            info["paciente"] = partes[0][len("PACIENTE:"):].strip()
+            for p in partes[1:]:
+                if p.startswith("EDAD:"):
+                    info["edad"] = p[len("EDAD:"):].strip()
+                elif p.startswith("DISPOSITIVO:"):
+                    info["dispositivo"] = p[len("DISPOSITIVO:"):].strip()
+        elif linea.startswith("EDAD:"):
+            info["edad"] = linea[len("EDAD:"):].strip()
+        elif linea.startswith("INICIO SESION:") or linea.startswith("FECHA:"):
+            try:
+                info["inicio"] = datetime.datetime.fromisoformat(linea.split(":", 1)[1].strip())
+            except ValueError:
+                pass
+    return info
+
+
+def hora_a_segundos(t_txt):
+    """'hh:mm:ss.mmm' -> segundos desde medianoche"""
+    h, m, s = t_txt.split(":")
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+
+def clasificar(tipo, detalle, valor):
+    """Normaliza un registro de cualquiera de los dos formatos.
+
+    Devuelve ("ECG", muestra), ("STATS", (spo2, hr)) o ("EVENTO", (tipo, detalle, valor)).
+    """
+    if tipo == "ECG":
+        return "ECG", float(valor if detalle == "Muestra" else detalle)
+    if tipo == "VITALES":
+        spo2, hr = str(valor).split("/")
+        return "STATS", (int(spo2), int(hr))
+    if tipo == "STATS":
+        return "STATS", (int(detalle), int(valor))
+    return "EVENTO", (tipo, str(detalle), str(valor))
+
+
+def iterar_registros(path):
+    """Devuelve (cabecera, generador) con los registros (instante datetime, clase, dato) del archivo"""
+    f = open(path, "r", encoding="utf-8", errors="replace")
+    cabecera = leer_cabecera(f)
+
+    def generador():
+        inicio = cabecera["inicio"] or datetime.datetime.fromtimestamp(0)
+        dia = datetime.datetime.combine(inicio.date(), datetime.time())
+        previo = None
+        with f:
+            for linea in f:
+                partes = linea.rstrip("\n").split(",", 3)
+                if len(partes) < 4:
+                    continue
+                try:
+                    segundos = hora_a_segundos(partes[0])
+                    clase, dato = clasificar(partes[1], partes[2], partes[3])
+                except ValueError:
+                    continue
+                # Las horas no llevan fecha: si retroceden es que pasamos la medianoche
+                if previo is not None and segundos < previo - 43200:
+                    dia += datetime.timedelta(days=1)
+                previo = segundos
+                yield dia + datetime.timedelta(seconds=segundos), clase, dato
+
+    return cabecera, generador()
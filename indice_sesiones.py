@@ -0,0 +1,196 @@
+import os
+import glob
+import time
+import sqlite3
+import argparse
+import datetime
+
+from lector_sesion import abrir_sesion
+
+# --- INDICE DE SESIONES ---
+# Uso: python indice_sesiones.py [--directorio .] [--paciente X] [--desde 2025-12-01] [--hasta 2025-12-31]
+#                                [--tipo ALARMA] [--detalle HIPOXIA] [--sesiones]
+# Base SQLite con la cabecera de cada historial (paciente, edad, dispositivo, inicio, duracion)
+# y sus eventos (ALARMA, INFO, SISTEMA, ENLACE) con su fecha y hora absolutas, para buscar por
+# paciente, rango de fechas y tipo de evento sin volver a leer los archivos.
+# Se actualiza de forma incremental: indexar() al cerrar una grabacion y actualizar() para
+# recoger los historiales nuevos o modificados de una carpeta (solo se abren los que cambiaron
+# de tamaño o de fecha). Los archivos se leen con lector_sesion, asi que vale para .txt y .ecgb.
+RUTA_INDICE = os.environ.get("MONITOR_INDICE", "sesiones.db")
+PATRONES = ("Historial_*.txt", "Historial_*.ecgb", "registro_*.txt")
+VERSION_ESQUEMA = 1
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S.%f"  # Texto ordenable: los rangos se comparan como cadenas
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS sesiones (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    paciente TEXT, edad TEXT, dispositivo TEXT,
+    inicio TEXT, fin TEXT, duracion REAL, n_muestras INTEGER,
+    tamano INTEGER, mtime_ns INTEGER
+);
+CREATE TABLE IF NOT EXISTS eventos (
+    sesion INTEGER NOT NULL REFERENCES sesiones(id) ON DELETE CASCADE,
+    instante TEXT, t REAL, tipo TEXT, detalle TEXT, valor TEXT
+);
+CREATE INDEX IF NOT EXISTS sesiones_paciente ON sesiones(paciente, inicio);
+CREATE INDEX IF NOT EXISTS eventos_tipo ON eventos(tipo, instante);
+CREATE INDEX IF NOT EXISTS eventos_sesion ON eventos(sesion);
+"""
+
+
+def a_texto(fecha):
+    return fecha.strftime(FORMATO_FECHA) if fecha else None
+
+
+def _limite(fecha, fin=False):
+    """date/datetime/'AAAA-MM-DD[ hh:mm]' -> texto comparable; una fecha sola cubre el dia entero"""
+    if fecha is None or isinstance(fecha, datetime.datetime):
+        return a_texto(fecha)
+    if isinstance(fecha, str):
+        fecha = datetime.datetime.fromisoformat(fecha) if len(fecha) > 10 else datetime.date.fromisoformat(fecha)
+        if isinstance(fecha, datetime.datetime):
+            return a_texto(fecha)
+    return a_texto(datetime.datetime.combine(fecha, datetime.time.max if fin else datetime.time.min))
+
+
+class IndiceSesiones:
+    """Conexion al indice; usar una instancia por hilo (sqlite3 no comparte conexiones)"""
+
+    def __init__(self, ruta=RUTA_INDICE):
+        self.ruta = ruta
+        self.conexion = sqlite3.connect(ruta, timeout=10)
+        self.conexion.row_factory = sqlite3.Row
+        self.conexion.execute("PRAGMA foreign_keys = ON")
+        self.conexion.execute("PRAGMA journal_mode = WAL")  # Busquedas mientras otro hilo indexa
+        if self.conexion.execute("PRAGMA user_version").fetchone()[0] != VERSION_ESQUEMA:
+            self.conexion.executescript("DROP TABLE IF EXISTS eventos; DROP TABLE IF EXISTS sesiones;")
+            self.conexion.execute(f"PRAGMA user_version = {VERSION_ESQUEMA}")
+        self.conexion.executescript(ESQUEMA)
+
+    def indexar(self, path, forzar=False):
+        """(Re)indexa un historial si cambio desde la ultima vez; devuelve True si lo leyo"""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        fila = self.conexion.execute("SELECT tamano, mtime_ns FROM sesiones WHERE path = ?", (path,)).fetchone()
+        if fila and not forzar and (fila["tamano"], fila["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+            return False
+
+        lector = abrir_sesion(path)
+        try:
+            meta = lector.metadatos
+            inicio = datetime.datetime.fromisoformat(meta["inicio"]) if meta.get("inicio") else None
+            fin = inicio + datetime.timedelta(seconds=lector.duracion) if inicio else None
+            eventos = [(a_texto(inicio + datetime.timedelta(seconds=t)) if inicio else None, t, tipo, detalle, valor)
+                       for t, tipo, detalle, valor in lector.eventos]
+            with self.conexion:
+                self.conexion.execute("DELETE FROM sesiones WHERE path = ?", (path,))
+                cursor = self.conexion.execute(
+                    "INSERT INTO sesiones (path, paciente, edad, dispositivo, inicio, fin, duracion, n_muestras, "
+                    "tamano, mtime_ns) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (path, meta.get("paciente") or "", meta.get("edad") or "", meta.get("dispositivo") or "",
+                     a_texto(inicio), a_texto(fin), lector.duracion, lector.n_muestras, st.st_size, st.st_mtime_ns))
+                self.conexion.executemany(
+                    "INSERT INTO eventos (sesion, instante, t, tipo, detalle, valor) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(cursor.lastrowid,) + e for e in eventos])
+        finally:
+            lector.cerrar()
+        return True
+
+    def actualizar(self, directorio="."):
+        """Indexa lo nuevo o modificado de 'directorio' y olvida lo borrado -> (indexados, eliminados)"""
+        directorio = os.path.abspath(directorio)
+        indexados = 0
+        for patron in PATRONES:
+            for path in glob.glob(os.path.join(directorio, patron)):
+                try:
+                    indexados += self.indexar(path)
+                except (OSError, ValueError) as e:
+                    print(f"No se pudo indexar {path}: {e}")
+        desaparecidos = [(fila["path"],) for fila in self.conexion.execute("SELECT path FROM sesiones")
+                         if os.path.dirname(fila["path"]) == directorio and not os.path.exists(fila["path"])]
+        with self.conexion:
+            self.conexion.executemany("DELETE FROM sesiones WHERE path = ?", desaparecidos)
+        return indexados, len(desaparecidos)
+
+    def buscar_sesiones(self, paciente=None, desde=None, hasta=None):
+        """Sesiones del paciente (subcadena, sin distinguir mayusculas) que se solapan con [desde, hasta]"""
+        condiciones, parametros = [], []
+        if paciente:
+            condiciones.append("paciente LIKE ?")
+            parametros.append(f"%{paciente}%")
+        if desde is not None:
+            condiciones.append("fin >= ?")
+            parametros.append(_limite(desde))
+        if hasta is not None:
+            condiciones.append("inicio <= ?")
+            parametros.append(_limite(hasta, fin=True))
+        donde = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        return [dict(fila) for fila in self.conexion.execute(
+            f"SELECT * FROM sesiones {donde} ORDER BY inicio", parametros)]
+
+    def buscar_eventos(self, paciente=None, desde=None, hasta=None, tipo=None, detalle=None):
+        """Eventos con los datos de su sesion; 'detalle' es una subcadena (p.ej. "HIPOXIA")"""
+        condiciones, parametros = [], []
+        if paciente:
+            condiciones.append("s.paciente LIKE ?")
+            parametros.append(f"%{paciente}%")
+        if desde is not None:
+            condiciones.append("e.instante >= ?")
+            parametros.append(_limite(desde))
+        if hasta is not None:
+            condiciones.append("e.instante <= ?")
+            parametros.append(_limite(hasta, fin=True))
+        if tipo:
+            condiciones.append("e.tipo = ?")
+            parametros.append(tipo)
+        if detalle:
+            condiciones.append("e.detalle LIKE ?")
+            parametros.append(f"%{detalle}%")
+        donde = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        return [dict(fila) for fila in self.conexion.execute(
+            "SELECT e.instante, e.t, e.tipo, e.detalle, e.valor, s.path, s.paciente, s.dispositivo "
+            f"FROM eventos e JOIN sesiones s ON s.id = e.sesion {donde} ORDER BY e.instante", parametros)]
+
+    def pacientes(self):
+        return [fila[0] for fila in self.conexion.execute("SELECT DISTINCT paciente FROM sesiones ORDER BY paciente")]
+
+    def cerrar(self):
+        self.conexion.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indice y busqueda de historiales")
+    parser.add_argument("--directorio", default=".", help="Carpeta de los historiales a indexar")
+    parser.add_argument("--indice", default=RUTA_INDICE, help="Base SQLite del indice")
+    parser.add_argument("--paciente", help="Nombre o parte del nombre")
+    parser.add_argument("--desde", help="AAAA-MM-DD[ hh:mm]")
+    parser.add_argument("--hasta", help="AAAA-MM-DD[ hh:mm]")
+    parser.add_argument("--tipo", help="ALARMA, INFO, SISTEMA, ENLACE...")
+    parser.add_argument("--detalle", help="Texto del evento, p.ej. HIPOXIA")
+    parser.add_argument("--sesiones", action="store_true", help="Listar sesiones en vez de eventos")
+    args = parser.parse_args()
+
+    indice = IndiceSesiones(args.indice)
+    try:
+        inicio = time.perf_counter()
+        indexados, eliminados = indice.actualizar(args.directorio)
+        print(f"Indice actualizado: {indexados} historiales leidos, {eliminados} eliminados "
+              f"({time.perf_counter() - inicio:.2f} s)")
+        inicio = time.perf_counter()
+        if args.sesiones:
+            filas = indice.buscar_sesiones(args.paciente, args.desde, args.hasta)
+            for s in filas:
+                print(f"{(s['inicio'] or '-')[:19]:<21}{s['duracion']:>8.0f} s  {s['paciente']:<20}{os.path.basename(s['path'])}")
+        else:
+            filas = indice.buscar_eventos(args.paciente, args.desde, args.hasta, args.tipo, args.detalle)
+            for e in filas:
+                print(f"{(e['instante'] or '-')[:23]:<25}{e['tipo']:<9}{e['detalle']} {e['valor']}  "
+                      f"[{e['paciente']}] {os.path.basename(e['path'])}")
+        print(f"{len(filas)} resultados en {(time.perf_counter() - inicio) * 1e3:.1f} ms")
+    finally:
+        indice.cerrar()
+
+
+if __name__ == "__main__":
+    main()
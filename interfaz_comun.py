@@ -0,0 +1,279 @@
+import os
+import time
+import threading
+import numpy as np
+from PyQt5.QtWidgets import QFrame, QLabel, QVBoxLayout
+from PyQt5.QtCore import QThread, Qt, pyqtSignal
+from PyQt5.QtGui import QFont
+
+from receptor import ReceptorUDP
+from buffer_circular import EntradaBarrido
+from alarmas import MotorAlarmas, OrigenHR
+from metricas import metricas
+
+# --- CODIGO COMUN DE LAS INTERFACES ---
+# registro+eventos.py, interfaz_registro.py y monitor_multiple.py comparten la configuracion,
+# el hilo receptor (socket en run(), scipy cargado en otro hilo, DSP y alarmas por flujo) y el
+# estado de lo que se muestra (origen de la FC y alarmas activas). Aqui no se importa scipy ni el
+# backend de dibujo: cada interfaz los carga cuando los necesita (arranque diferido).
+
+# --- CONFIGURACIÓN UDP ---
+UDP_IP = "0.0.0.0"
+UDP_PORT = int(os.environ.get("MONITOR_PUERTO", "3333"))
+
+# --- CONFIGURACIÓN GRÁFICA ---
+FS_ECG = 500          # Hz nominal (FS en STM32_main.c): solo dimensiona el barrido; el eje x usa la medida
+VENTANA_SEG = 4       # Segundos visibles en el barrido (a FS_ECG)
+FPS_GRAFICA = int(os.environ.get("MONITOR_FPS", "30"))  # Redibujados por segundo
+HUECO_BARRIDO = 25    # Muestras borradas delante del cursor
+BACKEND_GRAFICA = os.environ.get("MONITOR_GRAFICA", "pyqtgraph")  # "pyqtgraph", "pyqtgraph-opengl" o "matplotlib"
+
+# --- CONFIGURACIÓN DSP ---
+DSP_ACTIVO = os.environ.get("MONITOR_DSP", "1") != "0"            # Filtrado + FC por deteccion de R en el PC
+FRECUENCIA_RED = float(os.environ.get("MONITOR_RED", "50"))        # Hz del notch (50 o 60)
+FS_DSP = float(os.environ.get("MONITOR_FS", "0")) or None         # 0: medir la frecuencia real al arrancar
+CENTRO_ADC = 2048                                                 # La señal filtrada se centra en la grafica
+CONFIG_ALARMAS = os.environ.get("MONITOR_ALARMAS") or None        # JSON de reglas (por defecto alarmas.REGLAS_DEFECTO)
+
+
+def crear_dsp():
+    """ProcesadorDSP configurado, o None con MONITOR_DSP=0 o sin scipy (se grafica la señal cruda del STM32)"""
+    if not DSP_ACTIVO:
+        return None
+    try:
+        from dsp import ProcesadorDSP  # Importa scipy (~1 s) la primera vez: se llama en un hilo aparte
+    except ImportError:
+        return None
+    return ProcesadorDSP(FS_DSP, FRECUENCIA_RED, CENTRO_ADC)
+
+
+def eje_barrido(capacidad, fs=None):
+    """-> (eje x, unidad) del barrido: en segundos con la frecuencia real (medida por el DSP o
+    MONITOR_FS); sin ella, en muestras (la nominal FS_ECG no coincide con la del puente)"""
+    if fs:
+        return np.arange(capacidad) / fs, "s"
+    return np.arange(capacidad, dtype=np.float64), "muestras"
+
+
+class CanalECG:
+    """Procesado de un flujo (un dispositivo): paso de crudo a filtrado, DSP y alarmas"""
+
+    def __init__(self):
+        self.entrada = EntradaBarrido(FS_ECG * VENTANA_SEG)
+        self.dsp = None
+        self.alarmas = MotorAlarmas(CONFIG_ALARMAS)
+        self.fs_informada = False
+
+    def fs_nueva(self):
+        """Frecuencia de muestreo del DSP la primera vez que se conoce; despues (o sin DSP), None"""
+        if self.fs_informada or self.dsp is None or not self.dsp.fs:
+            return None
+        self.fs_informada = True
+        return self.dsp.fs
+
+    def procesar(self, muestras, stats, con_dsp):
+        """-> (bloque para la grafica, [FC de cada latido], [Transicion])"""
+        filtradas, frecuencias = muestras, []
+        if len(muestras):
+            if self.dsp is None and con_dsp:
+                self.dsp = crear_dsp()  # scipy ya esta importado: no bloquea
+            filtradas, latidos = self.entrada.procesar(self.dsp, muestras)
+            frecuencias = [hr for _, hr in latidos if hr]
+        return filtradas, frecuencias, self.alarmas.procesar(muestras, stats, frecuencias)
+
+
+class WorkerReceptor(QThread):
+    """Hilo receptor de las interfaces: el socket se abre en run() y scipy se carga en otro hilo;
+    hasta entonces se reparten las muestras sin filtrar"""
+    sig_error = pyqtSignal(str)    # No se pudo abrir el socket (p.ej. puerto ocupado)
+
+    def __init__(self, por_puerto=False):
+        super().__init__()
+        self.por_puerto = por_puerto
+        self.con_dsp = False   # True cuando cargar_dsp() termina con scipy disponible
+        self.receptor = None
+        self.parar = False
+
+    @property
+    def enlaces(self):
+        # Copia: el hilo receptor anade origenes nuevos mientras la GUI la recorre
+        return dict(self.receptor.enlaces) if self.receptor else {}
+
+    def run(self):
+        try:
+            self.receptor = ReceptorUDP(self.repartir, UDP_IP, UDP_PORT, self.por_puerto,
+                                        periodico=self.revisar_alarmas)
+        except OSError as e:
+            print(f"Error binding socket: {e}")
+            self.sig_error.emit(f"No se pudo abrir el puerto UDP: {e}")
+            return
+        threading.Thread(target=self.cargar_dsp, daemon=True).start()
+        if metricas:
+            metricas.fuente("datagramas", lambda: self.receptor.datagramas)
+            metricas.fuente("bytes recibidos", lambda: self.receptor.bytes_recibidos)
+            metricas.fuente("errores de recepcion", lambda: self.receptor.errores)
+        if not self.parar:  # stop() pudo llegar antes de abrir el socket
+            self.receptor.ejecutar()
+
+    def cargar_dsp(self):
+        self.con_dsp = crear_dsp() is not None
+
+    def repartir(self, lote):
+        raise NotImplementedError
+
+    def revisar_alarmas(self):
+        raise NotImplementedError
+
+    def stop(self):
+        self.parar = True
+        if self.receptor:
+            self.receptor.detener()
+        self.wait()
+        if self.receptor:
+            self.receptor.cerrar()
+
+
+class DataWorker(WorkerReceptor):
+    """Monitor de un dispositivo: todos los origenes se tratan como un solo flujo"""
+    sig_ecg = pyqtSignal(object, object, float)  # (crudas, filtradas, llegada) muestras drenadas en un despertar
+    sig_stats = pyqtSignal(int, int)
+    sig_latido = pyqtSignal(int)          # FC latido a latido detectada en el ECG
+    sig_alarmas = pyqtSignal(object)      # [Transicion], solo cuando alguna regla cambia de estado
+    sig_fs = pyqtSignal(float)            # Frecuencia de muestreo medida por el DSP (una vez)
+
+    def __init__(self):
+        super().__init__()
+        self.canal = CanalECG()
+
+    def repartir(self, lote):
+        # Un solo evento Qt por despertar del selector en vez de uno por muestra
+        llegada = self.receptor.ultimo_despertar
+        if metricas:
+            metricas.observar("llegada->parseo", time.perf_counter() - llegada)
+        for muestras, stats in lote.values():
+            # El filtrado y las alarmas se evaluan aqui, fuera del hilo de la GUI
+            filtradas, frecuencias, transiciones = self.canal.procesar(muestras, stats, self.con_dsp)
+            if len(muestras):
+                if metricas:
+                    metricas.observar("llegada->dsp", time.perf_counter() - llegada)
+                    metricas.contar("muestras", len(muestras))
+                    metricas.contar("señales emitidas")
+                self.sig_ecg.emit(muestras, filtradas, llegada)
+                fs = self.canal.fs_nueva()
+                if fs:
+                    self.sig_fs.emit(fs)
+            for hr in frecuencias:
+                self.sig_latido.emit(int(round(hr)))
+            for spo2, hr in stats:
+                self.sig_stats.emit(spo2, hr)
+            if transiciones:
+                self.sig_alarmas.emit(transiciones)
+
+    def revisar_alarmas(self):
+        transiciones = self.canal.alarmas.revisar()
+        if transiciones:
+            self.sig_alarmas.emit(transiciones)
+
+
+class PantallaHR:
+    """FC en pantalla: la del ECG mientras haya latidos; si caduca (electrodos sueltos), la del oximetro.
+
+    'mostrar(hr, origen, cambio)' pinta el valor; 'cambio' indica que el origen no es el de antes.
+    """
+
+    def __init__(self, mostrar):
+        self.mostrar = mostrar
+        self.origen_hr = OrigenHR()
+        self.mostrada = None   # Origen de la FC en pantalla: "ECG", "oximetro" o None
+
+    def _mostrar(self, hr, origen):
+        cambio = origen != self.mostrada
+        self.mostrada = origen
+        self.mostrar(hr, origen, cambio)
+
+    def latido(self, hr):
+        self.origen_hr.latido()
+        self._mostrar(hr, "ECG")
+
+    def oximetro(self, hr):
+        if not self.origen_hr.ecg():
+            self._mostrar(hr, "oximetro")
+
+    def revisar(self):
+        # Sin latidos recientes no se deja en pantalla la ultima FC del ECG
+        if self.mostrada == "ECG" and not self.origen_hr.ecg():
+            self._mostrar("--", None)
+
+
+class AlarmasActivas:
+    """Alarmas en pantalla a partir de las transiciones del motor (solo llegan cambios de estado)"""
+
+    def __init__(self):
+        self.activas = {}   # nombre de regla -> Transicion que la activo
+
+    @property
+    def parametros(self):
+        return {t.parametro for t in self.activas.values()}
+
+    @property
+    def texto(self):
+        return " | ".join(t.detalle for t in self.activas.values())
+
+    def aplicar(self, transiciones):
+        """Devuelve los parametros que entraron o salieron de alarma (lo unico que hay que repintar)"""
+        antes = self.parametros
+        for t in transiciones:
+            if t.activa:
+                self.activas[t.nombre] = t
+            else:
+                self.activas.pop(t.nombre, None)
+        return antes ^ self.parametros
+
+
+class Indexador:
+    """Añade al indice de sesiones cada historial cerrado (al detener la grabacion o al cerrar la
+    ventana) en un HiloIndexado, sin bloquear la GUI"""
+
+    def __init__(self):
+        self.hilos = []   # HiloIndexado en curso (busqueda_sesiones.py)
+
+    def indexar(self, filename):
+        from busqueda_sesiones import HiloIndexado
+        hilo = HiloIndexado([filename])
+        hilo.sig_fin.connect(lambda mensaje: print(mensaje) if mensaje.startswith("Error") else None)
+        self.hilos = [h for h in self.hilos if h.isRunning()] + [hilo]
+        hilo.start()
+
+    def esperar(self):
+        for hilo in self.hilos:
+            hilo.wait()
+
+
+# --- PANELES DE DATOS (monitores de un dispositivo) ---
+def estilo_panel(color_borde, alarma=False):
+    if alarma:
+        return "border: 2px solid red; border-radius: 10px; background-color: #330000; margin: 10px;"
+    return f"border: 2px solid {color_borde}; border-radius: 10px; background-color: #1E1E1E; margin: 10px;"
+
+
+def crear_panel_dato(titulo, unidad, color_borde):
+    frame = QFrame()
+    frame.setStyleSheet(estilo_panel(color_borde))
+    layout = QVBoxLayout(frame)
+    lbl_titulo = QLabel(titulo)
+    lbl_titulo.setAlignment(Qt.AlignCenter)
+    lbl_titulo.setStyleSheet("color: white; font-size: 14px; border: none;")
+    lbl_valor = QLabel("--")
+    lbl_valor.setAlignment(Qt.AlignCenter)
+    lbl_valor.setFont(QFont("Arial", 50, QFont.Bold))
+    lbl_valor.setStyleSheet(f"color: {color_borde}; border: none;")
+    lbl_unidad = QLabel(unidad)
+    lbl_unidad.setAlignment(Qt.AlignCenter)
+    lbl_unidad.setStyleSheet("color: gray; font-size: 12px; border: none;")
+    layout.addWidget(lbl_titulo)
+    layout.addWidget(lbl_valor)
+    layout.addWidget(lbl_unidad)
+    frame.valor_label = lbl_valor
+    frame.unidad_label = lbl_unidad
+    frame.color = color_borde
+    return frame
@@ -1,65 +1,18 @@
 import sys
-import time
-import socket
 import datetime 
 import numpy as np
-from collections import deque
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QWidget, 
                              QLabel, QHBoxLayout, QFrame, QLineEdit, QPushButton, QMessageBox)
-from PyQt5.QtCore import QThread, pyqtSignal, Qt
-from PyQt5.QtGui import QFont
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-
-# --- CONFIGURACIÓN UDP ---
-UDP_IP = "0.0.0.0"
-UDP_PORT = 3333   
-
-class DataWorker(QThread):
-    sig_ecg = pyqtSignal(float)
-    sig_stats = pyqtSignal(int, int)
-
-    def __init__(self):
-        super().__init__()
-        self.running = True
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.sock.bind((UDP_IP, UDP_PORT))
-        self.sock.settimeout(0.5)
-
-    def run(self):
-        while self.running:
-            try:
-                data, addr = self.sock.recvfrom(2048)
-                text = data.decode('utf-8')
-                lines = text.splitlines()
-
-                for line in lines:
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    if line.startswith("S:"):
-                        try:
-                            partes = line[2:].split(',')
-                            if len(partes) == 2:
-                                spo2 = int(partes[0])
-                                hr = int(partes[1])
-                                self.sig_stats.emit(spo2, hr)
-                        except ValueError:
-                            pass
-                    else:
-                        try:
-                            valor_ecg = float(line)
-                            self.sig_ecg.emit(valor_ecg)
-                        except ValueError:
-                            pass
-            except socket.timeout:
-                continue
-
-    def stop(self):
-        self.running = False
-        self.wait()
-        self.sock.close()
+from PyQt5.QtCore import QTimer, Qt
+from protocolo import resumen_enlace
+from buffer_circular import BufferCircular
+from graficos import crear_grafica
+from escritor_sesion import EscritorSesion
+from interfaz_comun import (FS_ECG, VENTANA_SEG, FPS_GRAFICA, HUECO_BARRIDO, BACKEND_GRAFICA, DataWorker,
+                            FS_DSP, PantallaHR, AlarmasActivas, Indexador, crear_panel_dato, estilo_panel,
+                            eje_barrido)
+# Arranque diferido como en registro+eventos.py: scipy (dsp) se carga en un hilo aparte, el socket
+# se abre en el hilo del receptor y el backend de dibujo tras el primer cuadro de la ventana
 
 class MonitorVital(QMainWindow):
     def __init__(self):
@@ -68,10 +21,17 @@ class MonitorVital(QMainWindow):
         self.setGeometry(100, 100, 1000, 600)
         self.setStyleSheet("background-color: #121212; color: #00FF00;")
         
-        self.data_buffer = deque([0]*200, maxlen=200)
+        self.buffer_ecg = BufferCircular(FS_ECG * VENTANA_SEG)
+        self.y_pantalla = np.full(self.buffer_ecg.capacidad, np.nan, dtype=np.float32)
+        self.datos_nuevos = False
+        self.fs = FS_DSP  # Frecuencia de muestreo real para el eje x; la mide el DSP si no se fija
+        self.pantalla_hr = PantallaHR(self.mostrar_hr)
         
         self.is_recording = False
-        self.file_handle = None
+        self.escritor = None
+        self.archivo_actual = None
+        self.indexador = Indexador()
+        self.alarmas_activas = AlarmasActivas()
         
         self.initUI()
         self.init_worker()
@@ -81,25 +41,28 @@ class MonitorVital(QMainWindow):
         self.setCentralWidget(central_widget)
         main_layout = QHBoxLayout(central_widget)
 
-        plot_layout = QVBoxLayout()
-        self.fig = Figure(figsize=(5, 4), dpi=100, facecolor='#121212')
-        self.ax = self.fig.add_subplot(111)
-        self.ax.set_facecolor('#000000')
-        self.ax.set_title('ECG', color='white')
-        self.ax.tick_params(axis='x', colors='white')
-        self.ax.tick_params(axis='y', colors='white')
-        self.ax.set_ylim(0, 4096)
-        self.ax.grid(True, color='#333333', linestyle='--')
-        self.line, = self.ax.plot([], [], color='#00FF00', linewidth=1.5)
-        self.canvas = FigureCanvas(self.fig)
-        plot_layout.addWidget(self.canvas)
+        self.plot_layout = plot_layout = QVBoxLayout()
+        self.grafica = None  # Se crea en cargar_grafica(), con la ventana ya en pantalla
+        self.lbl_cargando = QLabel("Cargando grafica...")
+        self.lbl_cargando.setStyleSheet("color: gray;")
+        self.lbl_cargando.setAlignment(Qt.AlignCenter)
+        plot_layout.addWidget(self.lbl_cargando, stretch=1)
+
+        self.lbl_alarma = QLabel("")
+        self.lbl_alarma.setStyleSheet("color: #FF3333; font-size: 14px; font-weight: bold;")
+        self.lbl_alarma.setAlignment(Qt.AlignCenter)
+        plot_layout.addWidget(self.lbl_alarma)
+
+        self.timer_grafica = QTimer(self)
+        self.timer_grafica.timeout.connect(self.refrescar_grafica)
+        self.timer_grafica.start(int(1000 / FPS_GRAFICA))
 
         stats_layout = QVBoxLayout()
         
-        self.lbl_hr = self.crear_panel_dato("FRECUENCIA CARDIACA", "BPM", "#FF3333")
+        self.lbl_hr = crear_panel_dato("FRECUENCIA CARDIACA", "BPM", "#FF3333")
         stats_layout.addWidget(self.lbl_hr)
         
-        self.lbl_spo2 = self.crear_panel_dato("SATURACIÓN O2", "%", "#3399FF")
+        self.lbl_spo2 = crear_panel_dato("SATURACIÓN O2", "%", "#3399FF")
         stats_layout.addWidget(self.lbl_spo2)
 
         control_frame = QFrame()
@@ -138,38 +101,69 @@ class MonitorVital(QMainWindow):
         self.lbl_estado.setAlignment(Qt.AlignCenter)
         control_layout.addWidget(self.lbl_estado)
 
+        # Estado del hilo escritor (cola pendiente y registros descartados)
+        self.lbl_cola = QLabel("")
+        self.lbl_cola.setStyleSheet("color: gray; font-size: 10px; border: none;")
+        self.lbl_cola.setAlignment(Qt.AlignCenter)
+        control_layout.addWidget(self.lbl_cola)
+
+        self.timer_cola = QTimer(self)
+        self.timer_cola.timeout.connect(self.actualizar_estado_escritor)
+
+        self.lbl_enlace = QLabel("")
+        self.lbl_enlace.setStyleSheet("color: gray; font-size: 10px; border: none;")
+        self.lbl_enlace.setAlignment(Qt.AlignCenter)
+        control_layout.addWidget(self.lbl_enlace)
+
+        self.timer_enlace = QTimer(self)
+        self.timer_enlace.timeout.connect(self.actualizar_estado_enlace)
+        self.timer_enlace.start(500)
+
         stats_layout.addWidget(control_frame)
         stats_layout.addStretch()
 
         main_layout.addLayout(plot_layout, stretch=3)
         main_layout.addLayout(stats_layout, stretch=1)
 
-    def crear_panel_dato(self, titulo, unidad, color_borde):
-        frame = QFrame()
-        frame.setStyleSheet(f"border: 2px solid {color_borde}; border-radius: 10px; background-color: #1E1E1E; margin: 10px;")
-        layout = QVBoxLayout(frame)
-        lbl_titulo = QLabel(titulo)
-        lbl_titulo.setAlignment(Qt.AlignCenter)
-        lbl_titulo.setStyleSheet("color: white; font-size: 14px; border: none;")
-        lbl_valor = QLabel("--")
-        lbl_valor.setAlignment(Qt.AlignCenter)
-        lbl_valor.setFont(QFont("Arial", 50, QFont.Bold))
-        lbl_valor.setStyleSheet(f"color: {color_borde}; border: none;")
-        lbl_unidad = QLabel(unidad)
-        lbl_unidad.setAlignment(Qt.AlignCenter)
-        lbl_unidad.setStyleSheet("color: gray; font-size: 12px; border: none;")
-        layout.addWidget(lbl_titulo)
-        layout.addWidget(lbl_valor)
-        layout.addWidget(lbl_unidad)
-        frame.valor_label = lbl_valor
-        return frame
-
     def init_worker(self):
         self.worker = DataWorker()
         self.worker.sig_ecg.connect(self.actualizar_grafica)
         self.worker.sig_stats.connect(self.actualizar_stats)
+        self.worker.sig_latido.connect(self.actualizar_latido)
+        self.worker.sig_alarmas.connect(self.actualizar_alarmas)
+        self.worker.sig_fs.connect(self.fijar_fs)
         self.worker.start()
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.grafica is None:
+            QTimer.singleShot(0, self.cargar_grafica)  # Tras el primer cuadro de la ventana
+
+    def cargar_grafica(self):
+        """Crea la grafica importando el backend de dibujo; no hace nada si ya existe"""
+        if self.grafica is not None:
+            return
+        eje_x, unidad = eje_barrido(self.buffer_ecg.capacidad, self.fs)
+        self.grafica = crear_grafica(BACKEND_GRAFICA, eje_x, unidad=unidad)
+        self.plot_layout.replaceWidget(self.lbl_cargando, self.grafica.widget)
+        self.lbl_cargando.deleteLater()
+
+    def fijar_fs(self, fs):
+        self.fs = fs
+        if self.grafica is not None:
+            self.grafica.fijar_eje(*eje_barrido(self.buffer_ecg.capacidad, fs))
+
+    def actualizar_estado_enlace(self):
+        self.pantalla_hr.revisar()
+        self.lbl_enlace.setText(resumen_enlace(self.worker.enlaces.values()))
+
+    def actualizar_estado_escritor(self):
+        if not self.escritor:
+            return
+        texto = f"Cola: {self.escritor.profundidad} | Descartados: {self.escritor.descartados}"
+        if self.escritor.error:
+            texto += f" | Error al escribir: {self.escritor.error}"
+        self.lbl_cola.setText(texto)
 
     def toggle_recording(self):
         if not self.is_recording:
@@ -183,14 +177,18 @@ class MonitorVital(QMainWindow):
             filename = f"registro_{nombre}_{timestamp_str}.txt"
             
             try:
-                self.file_handle = open(filename, "w")
-                self.file_handle.write("========================================\n")
-                self.file_handle.write(f"REGISTRO DE SIGNOS VITALES\n")
-                self.file_handle.write(f"FECHA: {datetime.datetime.now()}\n")
-                self.file_handle.write(f"PACIENTE: {nombre}\n")
-                self.file_handle.write(f"EDAD: {edad}\n")
-                self.file_handle.write("========================================\n")
-                self.file_handle.write("TIMESTAMP,TIPO_DATO,VALOR1,VALOR2\n")
+                self.escritor = EscritorSesion(filename, [
+                    "========================================",
+                    "REGISTRO DE SIGNOS VITALES",
+                    f"FECHA: {datetime.datetime.now()}",
+                    f"PACIENTE: {nombre}",
+                    f"EDAD: {edad}",
+                    "========================================",
+                    "TIMESTAMP,TIPO_DATO,VALOR1,VALOR2",
+                ])
+                self.escritor.start()
+                self.archivo_actual = filename
+                self.timer_cola.start(500)
                 
                 self.is_recording = True
                 self.btn_record.setText("DETENER GRABACIÓN")
@@ -205,9 +203,12 @@ class MonitorVital(QMainWindow):
                 self.lbl_estado.setText(f"Error al crear archivo: {e}")
 
         else:
-            if self.file_handle:
-                self.file_handle.close()
-                self.file_handle = None
+            self.timer_cola.stop()
+            if self.escritor:
+                self.escritor.cerrar()
+                self.actualizar_estado_escritor()
+                self.escritor = None
+                self.indexador.indexar(self.archivo_actual)
             
             self.is_recording = False
             self.btn_record.setText("INICIAR GRABACIÓN")
@@ -219,33 +220,53 @@ class MonitorVital(QMainWindow):
             self.input_nombre.setEnabled(True)
             self.input_edad.setEnabled(True)
 
-    def actualizar_grafica(self, valor):
-        self.data_buffer.append(valor)
-        self.line.set_data(np.arange(len(self.data_buffer)), list(self.data_buffer))
-        self.ax.set_xlim(0, len(self.data_buffer))
-        self.canvas.draw_idle()
+    def actualizar_grafica(self, muestras, filtradas, llegada):
+        self.buffer_ecg.escribir(filtradas)
+        self.datos_nuevos = True
         
-        if self.is_recording and self.file_handle:
-            t_actual = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            self.file_handle.write(f"{t_actual},ECG,{valor:.2f},\n")
+        if self.is_recording and self.escritor:
+            self.escritor.registrar("ECG", muestras, "")
+
+    def refrescar_grafica(self):
+        if not self.datos_nuevos or self.grafica is None:
+            return
+        self.datos_nuevos = False
+
+        self.grafica.dibujar(self.buffer_ecg.vista_barrido(self.y_pantalla, HUECO_BARRIDO))
+
+    def mostrar_hr(self, hr, origen, cambio):
+        self.lbl_hr.valor_label.setText(str(hr))
+        if cambio:
+            self.lbl_hr.unidad_label.setText(f"BPM ({origen})" if origen else "BPM")
+
+    def actualizar_latido(self, hr):
+        self.pantalla_hr.latido(hr)
 
     def actualizar_stats(self, spo2, hr):
         self.lbl_spo2.valor_label.setText(str(spo2))
-        self.lbl_hr.valor_label.setText(str(hr))
-        
-        if spo2 < 90 and spo2 > 0:
-            self.lbl_spo2.setStyleSheet("border: 2px solid red; background-color: #330000; margin: 10px;")
-        else:
-            self.lbl_spo2.setStyleSheet("border: 2px solid #3399FF; background-color: #1E1E1E; margin: 10px;")
+        self.pantalla_hr.oximetro(hr)
             
-        if self.is_recording and self.file_handle:
-            t_actual = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            self.file_handle.write(f"{t_actual},STATS,{spo2},{hr}\n")
+        if self.is_recording and self.escritor:
+            self.escritor.registrar("STATS", spo2, hr)
+
+    def actualizar_alarmas(self, transiciones):
+        """Solo llegan cambios de estado: se registran y se repinta lo que cambio"""
+        if self.is_recording and self.escritor:
+            for t in transiciones:
+                self.escritor.registrar(t.tipo, t.detalle, t.valor)
+        cambios = self.alarmas_activas.aplicar(transiciones)
+        paneles = {"spo2": self.lbl_spo2, "hr": self.lbl_hr}
+        for parametro in cambios & paneles.keys():
+            panel = paneles[parametro]
+            panel.setStyleSheet(estilo_panel(panel.color, parametro in self.alarmas_activas.parametros))
+        self.lbl_alarma.setText(self.alarmas_activas.texto)
 
     def closeEvent(self, event):
-        if self.file_handle:
-            self.file_handle.close()
+        if self.escritor:
+            self.escritor.cerrar()
+            self.indexador.indexar(self.archivo_actual)
         self.worker.stop()
+        self.indexador.esperar()
         event.accept()
 
 if __name__ == "__main__":
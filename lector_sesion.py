@@ -0,0 +1,400 @@
+import os
+import io
+import mmap
+import struct
+import datetime
+import numpy as np
+
+from historial_texto import leer_cabecera, clasificar, hora_a_segundos
+import formato_binario
+
+# --- LECTOR DE SESIONES GRABADAS ---
+# Abre Historial_*.txt, registro_*.txt o .ecgb sin cargarlos enteros: el archivo se
+# mapea en memoria y un indice de puntos de control (cada PASO muestras ECG: posicion
+# en el archivo, tiempo y min/max del tramo) permite servir cualquier ventana de tiempo
+# leyendo solo los bytes que la cubren. El indice de los .txt se guarda junto al
+# archivo (<archivo>.idx.npz) y se reconstruye si el archivo cambia.
+PASO = 1024
+VERSION_INDICE = 1
+TROZO = 8 << 20  # Bytes analizados por iteracion al construir el indice
+
+# Posiciones de los digitos de "hh:mm:ss.mmm" y peso de cada uno en segundos
+_POS_HORA = np.array([0, 1, 3, 4, 6, 7, 9, 10, 11])
+_PESO_HORA = np.array([36000, 3600, 600, 60, 10, 1, 0.1, 0.01, 0.001])
+
+
+def decimar_minmax(t, y, n_tramos):
+    """Reduce (t, y) a n_tramos pares min/max intercalados, conservando los picos del QRS"""
+    n = len(y) // n_tramos * n_tramos
+    if n_tramos <= 0 or n == 0:
+        return t, y
+    bloques = y[:n].reshape(n_tramos, -1)
+    t_tramo = t[:n].reshape(n_tramos, -1)[:, 0]
+    t_out = np.repeat(t_tramo, 2)
+    y_out = np.column_stack((bloques.min(axis=1), bloques.max(axis=1))).ravel()
+    return t_out, y_out
+
+
+class LectorSesion:
+    """Base comun: indice de puntos de control y consultas por tiempo"""
+
+    def __init__(self, path):
+        self.path = path
+        self.metadatos = {}
+        self.cp_idx = np.zeros(0, np.int64)    # Indice de la primera muestra de cada tramo
+        self.cp_t = np.zeros(0, np.float64)    # Segundos desde el inicio de la sesion
+        self.cp_min = np.zeros(0, np.float32)
+        self.cp_max = np.zeros(0, np.float32)
+        self.n_muestras = 0
+        self.t_fin = 0.0
+        self.eventos = []                      # (t, tipo, detalle, valor)
+        self.stats = np.zeros((0, 3))          # Columnas: t, spo2, hr
+
+    @property
+    def duracion(self):
+        return self.t_fin
+
+    def _ejes_interp(self):
+        if self.n_muestras == 0:
+            return np.array([0.0]), np.array([0.0])
+        return (np.append(self.cp_idx, self.n_muestras - 1).astype(np.float64),
+                np.append(self.cp_t, self.t_fin))
+
+    def tiempo_de(self, indices):
+        idx, t = self._ejes_interp()
+        return np.interp(indices, idx, t)
+
+    def indice_de(self, t):
+        idx, tiempos = self._ejes_interp()
+        return np.interp(t, tiempos, idx)
+
+    def muestras(self, i0, i1):
+        raise NotImplementedError
+
+    def ventana(self, t0, t1):
+        """Muestras ECG entre t0 y t1 (segundos desde el inicio) -> (t, y)"""
+        i0 = max(0, int(np.floor(self.indice_de(t0))))
+        i1 = min(self.n_muestras, int(np.ceil(self.indice_de(t1))) + 1)
+        if i1 <= i0:
+            return np.zeros(0), np.zeros(0, np.float32)
+        return self.tiempo_de(np.arange(i0, i1)), self.muestras(i0, i1)
+
+    def ventana_decimada(self, t0, t1, n_max=4000):
+        """Como ventana() pero con como mucho ~n_max puntos (envolvente min/max)"""
+        i0 = max(0, int(np.floor(self.indice_de(t0))))
+        i1 = min(self.n_muestras, int(np.ceil(self.indice_de(t1))) + 1)
+        if i1 - i0 <= n_max:
+            return self.ventana(t0, t1)
+
+        k0 = np.searchsorted(self.cp_idx, i0, side="right") - 1
+        k1 = np.searchsorted(self.cp_idx, i1, side="left")
+        if (k1 - k0) * 2 >= n_max // 4:
+            # Ventana muy larga: basta el min/max precalculado de cada tramo
+            t = np.repeat(self.cp_t[k0:k1], 2)
+            y = np.column_stack((self.cp_min[k0:k1], self.cp_max[k0:k1])).ravel()
+            return t, y
+        t, y = self.ventana(t0, t1)
+        return decimar_minmax(t, y, n_max // 2)
+
+    def resumen(self):
+        """Envolvente min/max de toda la sesion (un par por tramo del indice)"""
+        return np.repeat(self.cp_t, 2), np.column_stack((self.cp_min, self.cp_max)).ravel()
+
+    def cerrar(self):
+        pass
+
+
+class LectorTexto(LectorSesion):
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.f = open(path, "rb")
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        cabecera = leer_cabecera(io.TextIOWrapper(io.BytesIO(self.mm[:4096]), encoding="utf-8", errors="replace"))
+        self.inicio_datos = sum(len(l) for l in self.mm[:4096].splitlines(keepends=True)[:cabecera["lineas"]])
+        self.metadatos = {
+            "paciente": cabecera["paciente"],
+            "edad": cabecera["edad"],
+            "dispositivo": cabecera["dispositivo"],
+            "inicio": cabecera["inicio"].isoformat() if cabecera["inicio"] else None,
+        }
+        # Historial_*: hh:mm:ss.mmm,ECG,Muestra,<v>   registro_*: hh:mm:ss.mmm,ECG,<v>,
+        self.formato_registro = "TIPO_DATO" in cabecera["columnas"]
+        inicio = cabecera["inicio"]
+        self.seg_inicio = (inicio.hour * 3600 + inicio.minute * 60 + inicio.second + inicio.microsecond / 1e6) if inicio else None
+
+        self.path_indice = path + ".idx.npz"
+        if not self._cargar_indice():
+            self._construir_indice()
+            self._guardar_indice()
+        self.t_fin = float(self._t_fin)
+        self._leer_eventos()
+
+    # --- Analisis vectorizado de lineas ---
+
+    def _parsear(self, inicio, fin):
+        """Analiza mm[inicio:fin] (lineas completas) -> inicios, segundos del dia, es_ecg, valores ECG"""
+        buf = np.frombuffer(self.mm, dtype=np.uint8, count=fin - inicio, offset=inicio)
+        nl = np.flatnonzero(buf == 10)
+        if len(nl) == 0:
+            vacio = np.zeros(0, np.int64)
+            return vacio, np.zeros(0), np.zeros(0, bool), np.zeros(0, np.float32)
+        starts = np.concatenate(([0], nl[:-1] + 1))
+        ends = nl - (buf[np.maximum(nl - 1, 0)] == 13)  # Tolera finales de linea \r\n
+
+        validas = (ends - starts) >= 17
+        starts, ends = starts[validas], ends[validas]
+        validas = (buf[starts + 2] == 58) & (buf[starts + 5] == 58) & (buf[starts + 8] == 46) & (buf[starts + 12] == 44)
+        starts, ends = starts[validas], ends[validas]
+
+        digitos = buf[starts[:, None] + _POS_HORA].astype(np.float64) - 48
+        segundos = digitos @ _PESO_HORA
+        es_ecg = (buf[starts + 13] == 69) & (buf[starts + 14] == 67) & (buf[starts + 15] == 71) & (buf[starts + 16] == 44)
+
+        ini_v = starts[es_ecg] + (17 if self.formato_registro else 25)
+        fin_v = ends[es_ecg] - (1 if self.formato_registro else 0)
+        mm = self.mm
+        try:
+            valores = np.array([mm[a + inicio:b + inicio] for a, b in zip(ini_v.tolist(), fin_v.tolist())], dtype=np.float32)
+        except ValueError:
+            valores = np.array([_a_float(mm[a + inicio:b + inicio]) for a, b in zip(ini_v.tolist(), fin_v.tolist())], dtype=np.float32)
+        return starts + inicio, segundos, es_ecg, valores
+
+    def _trozos(self, inicio, fin):
+        """Divide [inicio, fin) en trozos de ~TROZO bytes que terminan en salto de linea"""
+        while inicio < fin:
+            corte = min(inicio + TROZO, fin)
+            if corte < fin:
+                nl = self.mm.rfind(b"\n", inicio, corte)
+                corte = nl + 1 if nl >= inicio else fin
+            yield inicio, corte
+            inicio = corte
+
+    # --- Indice ---
+
+    def _construir_indice(self):
+        cp_off, cp_t, mins, maxs = [], [], [], []
+        ev_off = []
+        pendientes = np.zeros(0, np.float32)
+        n = 0
+        previo, dias = None, 0.0
+        t_fin = 0.0
+
+        for a, b in self._trozos(self.inicio_datos, len(self.mm)):
+            starts, segundos, es_ecg, valores = self._parsear(a, b)
+            if len(starts) == 0:
+                continue
+            if self.seg_inicio is None:
+                self.seg_inicio = segundos[0]
+
+            # Tiempo relativo al inicio con cambio de dia si la hora retrocede
+            crudo = segundos - self.seg_inicio
+            ref = crudo[0] if previo is None else previo
+            saltos = np.diff(np.concatenate(([ref], crudo))) < -43200
+            rel = crudo + dias + 86400.0 * np.cumsum(saltos)
+            dias += 86400.0 * saltos.sum()
+            previo = crudo[-1]
+
+            ev_off.append(starts[~es_ecg])
+            ecg_starts, ecg_t = starts[es_ecg], rel[es_ecg]
+            m = len(ecg_starts)
+            if m:
+                primero = (-n) % PASO
+                cp_off.append(ecg_starts[primero::PASO])
+                cp_t.append(ecg_t[primero::PASO])
+                t_fin = ecg_t[-1]
+
+                todos = np.concatenate((pendientes, valores))
+                nb = len(todos) // PASO
+                bloques = todos[:nb * PASO].reshape(nb, PASO)
+                mins.append(bloques.min(axis=1))
+                maxs.append(bloques.max(axis=1))
+                pendientes = todos[nb * PASO:]
+                n += m
+
+        if len(pendientes):
+            mins.append(np.array([pendientes.min()]))
+            maxs.append(np.array([pendientes.max()]))
+
+        unir = lambda partes, dtype: np.concatenate(partes).astype(dtype) if partes else np.zeros(0, dtype)
+        self.cp_off = unir(cp_off, np.int64)
+        self.cp_t = unir(cp_t, np.float64)
+        self.cp_min = unir(mins, np.float32)
+        self.cp_max = unir(maxs, np.float32)
+        self.cp_idx = np.arange(len(self.cp_off), dtype=np.int64) * PASO
+        self.ev_off = unir(ev_off, np.int64)
+        self.n_muestras = n
+        self._t_fin = t_fin
+
+    def _firma(self):
+        st = os.stat(self.path)
+        return np.array([st.st_size, st.st_mtime_ns, VERSION_INDICE, PASO], dtype=np.int64)
+
+    def _cargar_indice(self):
+        try:
+            with np.load(self.path_indice) as d:
+                if not np.array_equal(d["firma"], self._firma()):
+                    return False
+                self.cp_off, self.cp_t = d["cp_off"], d["cp_t"]
+                self.cp_min, self.cp_max = d["cp_min"], d["cp_max"]
+                self.ev_off = d["ev_off"]
+                self.n_muestras = int(d["n_muestras"])
+                self._t_fin = float(d["t_fin"])
+                self.seg_inicio = float(d["seg_inicio"])
+        except (OSError, KeyError, ValueError):
+            return False
+        self.cp_idx = np.arange(len(self.cp_off), dtype=np.int64) * PASO
+        return True
+
+    def _guardar_indice(self):
+        try:
+            np.savez(self.path_indice, firma=self._firma(), cp_off=self.cp_off, cp_t=self.cp_t,
+                     cp_min=self.cp_min, cp_max=self.cp_max, ev_off=self.ev_off,
+                     n_muestras=self.n_muestras, t_fin=self._t_fin, seg_inicio=self.seg_inicio or 0.0)
+        except OSError as e:
+            print(f"No se pudo guardar el indice {self.path_indice}: {e}")
+
+    def _leer_eventos(self):
+        """Las lineas que no son ECG (vitales, alarmas, sistema) son pocas: se leen todas"""
+        stats = []
+        dias, previo = 0.0, None
+        for off in self.ev_off.tolist():
+            fin = self.mm.find(b"\n", off)
+            linea = self.mm[off:fin if fin >= 0 else len(self.mm)].decode("utf-8", "replace").rstrip("\r")
+            partes = linea.split(",", 3)
+            if len(partes) < 4:
+                continue
+            try:
+                seg = hora_a_segundos(partes[0])
+                clase, dato = clasificar(partes[1], partes[2], partes[3])
+            except ValueError:
+                continue
+            rel = seg - (self.seg_inicio or 0.0)
+            if previo is not None and rel < previo - 43200:
+                dias += 86400.0
+            previo = rel
+            t = rel + dias
+            if clase == "STATS":
+                stats.append((t,) + dato)
+            else:
+                self.eventos.append((t,) + tuple(dato))
+        if stats:
+            self.stats = np.array(stats, dtype=np.float64)
+
+    def muestras(self, i0, i1):
+        if i1 <= i0:
+            return np.zeros(0, np.float32)
+        k0 = i0 // PASO
+        k1 = (i1 - 1) // PASO + 1
+        a = int(self.cp_off[k0])
+        b = int(self.cp_off[k1]) if k1 < len(self.cp_off) else len(self.mm)
+        valores = np.concatenate([self._parsear(x, y)[3] for x, y in self._trozos(a, b)] or [np.zeros(0, np.float32)])
+        base = k0 * PASO
+        return valores[i0 - base:i1 - base]
+
+    def cerrar(self):
+        self.mm.close()
+        self.f.close()
+
+
+def _a_float(texto):
+    try:
+        return float(texto)
+    except ValueError:
+        return np.nan
+
+
+class LectorBinario(LectorSesion):
+    """.ecgb: el indice son las cabeceras de bloque; se recorre solo saltando los datos"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.f = open(path, "rb")
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.metadatos, _ = formato_binario.iterar_bloques(self.mm)
+        self.dtype = np.dtype(self.metadatos.get("dtype", "int16"))
+        self._indexar()
+
+    def _indexar(self):
+        inicio = self.metadatos.get("inicio")
+        t0 = datetime.datetime.fromisoformat(inicio).timestamp() if inicio else None
+
+        largo = formato_binario.CAB.unpack_from(self.mm, 0)[2]
+        pos = formato_binario.CAB.size + largo
+        fin = len(self.mm)
+        off, idx, tiempos, largos, stats = [], [], [], [], []
+        try:
+            while pos < fin:
+                tipo = self.mm[pos:pos + 1]
+                if tipo == b"E":
+                    _, indice, instante, n = formato_binario.BLOQUE_ECG.unpack_from(self.mm, pos)
+                    pos += formato_binario.BLOQUE_ECG.size
+                    if t0 is None:
+                        t0 = instante
+                    off.append(pos)
+                    idx.append(indice)
+                    tiempos.append(instante - t0)
+                    largos.append(n)
+                    pos += n * self.dtype.itemsize
+                elif tipo == b"S":
+                    _, indice, instante, spo2, hr = formato_binario.BLOQUE_STATS.unpack_from(self.mm, pos)
+                    pos += formato_binario.BLOQUE_STATS.size
+                    stats.append((instante - (t0 or instante), spo2, hr))
+                elif tipo == b"V":
+                    _, indice, instante, n = formato_binario.BLOQUE_EVENTO.unpack_from(self.mm, pos)
+                    pos += formato_binario.BLOQUE_EVENTO.size
+                    texto = self.mm[pos:pos + n].decode("utf-8")
+                    pos += n
+                    self.eventos.append((instante - (t0 or instante),) + tuple(texto.split(formato_binario.SEP, 2)))
+                else:
+                    break
+        except struct.error:
+            pass  # Archivo truncado
+
+        self.bl_off = np.array(off, dtype=np.int64)
+        self.bl_idx = np.array(idx, dtype=np.int64)
+        self.bl_n = np.array(largos, dtype=np.int64)
+        bl_t = np.array(tiempos, dtype=np.float64)
+        self.n_muestras = int(self.bl_idx[-1] + self.bl_n[-1]) if len(idx) else 0
+        if stats:
+            self.stats = np.array(stats, dtype=np.float64)
+
+        # Puntos de control: primer bloque de cada tramo de ~PASO muestras
+        if len(idx):
+            sel = np.flatnonzero(np.diff(np.concatenate(([-1], self.bl_idx // PASO))) > 0)
+            self.cp_idx = self.bl_idx[sel]
+            self.cp_t = bl_t[sel]
+            self.t_fin = float(bl_t[-1])
+            self._calcular_envolvente()
+
+    def _calcular_envolvente(self):
+        mins, maxs = [], []
+        limites = np.append(self.cp_idx, self.n_muestras)
+        for a, b in zip(limites[:-1], limites[1:]):
+            y = self.muestras(int(a), int(b))
+            mins.append(y.min())
+            maxs.append(y.max())
+        self.cp_min = np.array(mins, dtype=np.float32)
+        self.cp_max = np.array(maxs, dtype=np.float32)
+
+    def muestras(self, i0, i1):
+        b0 = np.searchsorted(self.bl_idx, i0, side="right") - 1
+        b1 = np.searchsorted(self.bl_idx, i1, side="left")
+        partes = [np.frombuffer(self.mm, dtype=self.dtype, count=int(n), offset=int(off))
+                  for off, n in zip(self.bl_off[b0:b1], self.bl_n[b0:b1])]
+        if not partes:
+            return np.zeros(0, np.float32)
+        y = np.concatenate(partes).astype(np.float32)
+        base = int(self.bl_idx[b0])
+        return y[i0 - base:i1 - base]
+
+    def cerrar(self):
+        self.mm.close()
+        self.f.close()
+
+
+def abrir_sesion(path):
+    if path.endswith(formato_binario.EXTENSION):
+        return LectorBinario(path)
+    return LectorTexto(path)
@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import bisect
+import threading
+
+# --- INSTRUMENTACION ---
+# Contadores (total y ritmo) e histogramas de latencia de la cadena
+#   llegada (despertar del receptor) -> parseo/DSP -> slot de la GUI -> dibujo -> disco
+# Se activa con MONITOR_METRICAS=1. Desactivada, 'metricas' es None y cada punto de medida
+# cuesta un "if metricas:"; los contadores que ya existen (ReceptorUDP, escritores) se leen
+# con fuente() solo al pedir una instantanea.
+ACTIVAS = os.environ.get("MONITOR_METRICAS", "0") == "1"
+LIMITES_MS = [0.05 * 2 ** i for i in range(19)]  # Cubetas logaritmicas de 0.05 ms a ~13 s
+
+
+class Histograma:
+    def __init__(self):
+        self.cuentas = [0] * (len(LIMITES_MS) + 1)
+        self.n = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, ms):
+        self.cuentas[bisect.bisect_left(LIMITES_MS, ms)] += 1
+        self.n += 1
+        self.suma += ms
+        if ms > self.maximo:
+            self.maximo = ms
+
+    def percentil(self, p):
+        """Limite superior de la cubeta que contiene el percentil p (0-100)"""
+        objetivo = self.n * p / 100
+        acumulado = 0
+        for i, cuenta in enumerate(self.cuentas):
+            acumulado += cuenta
+            if acumulado >= objetivo and cuenta:
+                return min(LIMITES_MS[i], self.maximo) if i < len(LIMITES_MS) else self.maximo
+        return self.maximo
+
+    def resumen(self):
+        if not self.n:
+            return {"n": 0}
+        return {
+            "n": self.n, "media_ms": self.suma / self.n, "p50_ms": self.percentil(50),
+            "p95_ms": self.percentil(95), "p99_ms": self.percentil(99), "max_ms": self.maximo,
+        }
+
+
+class Metricas:
+    """Registro de contadores e histogramas; seguro entre hilos"""
+
+    def __init__(self):
+        self.cerrojo = threading.Lock()
+        self.contadores = {}
+        self.histogramas = {}
+        self.fuentes = {}      # nombre -> funcion que devuelve un total (contadores ajenos)
+        self.medidores = {}    # nombre -> funcion que devuelve un valor instantaneo (profundidad de colas)
+        self.inicio = time.monotonic()
+        self.previo = (self.inicio, {})
+
+    def contar(self, nombre, n=1):
+        with self.cerrojo:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + n
+
+    def observar(self, nombre, segundos):
+        with self.cerrojo:
+            histograma = self.histogramas.get(nombre)
+            if histograma is None:
+                histograma = self.histogramas[nombre] = Histograma()
+            histograma.registrar(segundos * 1e3)
+
+    def fuente(self, nombre, funcion):
+        self.fuentes[nombre] = funcion
+
+    def medidor(self, nombre, funcion):
+        self.medidores[nombre] = funcion
+
+    @staticmethod
+    def _leer(funciones):
+        valores = {}
+        for nombre, funcion in funciones.items():
+            try:
+                valores[nombre] = funcion()
+            except Exception as e:
+                print(f"Metrica {nombre}: {e}")
+        return valores
+
+    def instantanea(self):
+        """Dict serializable: totales, ritmo desde la instantanea anterior, medidores y latencias"""
+        ahora = time.monotonic()
+        with self.cerrojo:
+            totales = dict(self.contadores)
+            latencias = {nombre: h.resumen() for nombre, h in self.histogramas.items()}
+        totales.update(self._leer(self.fuentes))
+        t_previo, previos = self.previo
+        intervalo = max(ahora - t_previo, 1e-9)
+        self.previo = (ahora, totales)
+        return {
+            "segundos": ahora - self.inicio,
+            "contadores": {nombre: {"total": total, "por_s": (total - previos.get(nombre, 0)) / intervalo}
+                           for nombre, total in totales.items()},
+            "medidores": self._leer(self.medidores),
+            "latencias": latencias,
+        }
+
+
+def formatear(instantanea):
+    """Texto del panel de diagnostico"""
+    lineas = [f"{nombre}: {c['total']:.0f} ({c['por_s']:.0f}/s)" for nombre, c in instantanea["contadores"].items()]
+    lineas += [f"{nombre}: {valor}" for nombre, valor in instantanea["medidores"].items()]
+    for nombre, r in instantanea["latencias"].items():
+        if r["n"]:
+            lineas.append(f"{nombre}: p50 {r['p50_ms']:.1f} | p95 {r['p95_ms']:.1f} | max {r['max_ms']:.1f} ms")
+    return "\n".join(lineas)
+
+
+def volcar(path, instantaneas):
+    """Escribe {origen: instantanea} en JSON (p.ej. {"gui": ..., "analisis": ...})"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(instantaneas, f, indent=2, ensure_ascii=False)
+
+
+metricas = Metricas() if ACTIVAS else None
@@ -0,0 +1,304 @@
+import os
+import sys
+import math
+import datetime
+import numpy as np
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QGridLayout, QWidget,
+                             QLabel, QFrame, QLineEdit, QPushButton)
+from PyQt5.QtCore import QTimer, pyqtSignal
+from PyQt5.QtGui import QFont
+
+from protocolo import resumen_enlace
+from buffer_circular import BufferCircular
+from graficos import crear_grafica
+from escritor_sesion import EscritorSesion
+from interfaz_comun import (FS_ECG, VENTANA_SEG, HUECO_BARRIDO, BACKEND_GRAFICA, FS_DSP, WorkerReceptor, CanalECG,
+                            PantallaHR, AlarmasActivas, Indexador, eje_barrido)
+
+# --- CONFIGURACIÓN ---
+MAX_DISPOSITIVOS = 16
+FPS_GRAFICA = int(os.environ.get("MONITOR_FPS", "20"))  # Menos que en el monitor individual: hasta 16 curvas
+DEMUX_POR_PUERTO = os.environ.get("MONITOR_DEMUX", "ip") == "puerto"  # "puerto" para simuladores en un mismo PC
+
+
+class ReceptorWorker(WorkerReceptor):
+    """Un solo hilo y un solo socket para todos los puentes; un evento Qt por despertar"""
+    sig_lote = pyqtSignal(object)  # {origen: (crudas, filtradas, stats, [fc, ...], [Transicion, ...])}
+    sig_fs = pyqtSignal(str, float)  # (origen, frecuencia de muestreo medida por su DSP), una vez por puente
+
+    def __init__(self):
+        super().__init__(DEMUX_POR_PUERTO)
+        self.canales = {}   # origen -> CanalECG (cada puente con su estado de filtros y alarmas)
+
+    def repartir(self, lote):
+        salida = {}
+        medidas = []
+        for origen, (muestras, stats) in lote.items():
+            canal = self.canales.get(origen)
+            if canal is None:
+                canal = self.canales[origen] = CanalECG()
+            filtradas, frecuencias, transiciones = canal.procesar(muestras, stats, self.con_dsp)
+            salida[origen] = (muestras, filtradas, stats, frecuencias, transiciones)
+            fs = canal.fs_nueva()
+            if fs:
+                medidas.append((origen, fs))
+        self.sig_lote.emit(salida)
+        for origen, fs in medidas:  # Despues del lote: el panel se crea al recibir el primero
+            self.sig_fs.emit(origen, fs)
+
+    def revisar_alarmas(self):
+        vacio = np.zeros(0)
+        salida = {}
+        for origen, canal in self.canales.items():
+            transiciones = canal.alarmas.revisar()
+            if transiciones:
+                salida[origen] = (vacio, vacio, [], [], transiciones)
+        if salida:
+            self.sig_lote.emit(salida)
+
+
+class PanelMonitor(QFrame):
+    """Curva, vitales y grabacion de un dispositivo (un puente UART-UDP)"""
+
+    def __init__(self, origen, indexador):
+        super().__init__()
+        self.origen = origen
+        self.indexador = indexador
+        self.buffer_ecg = BufferCircular(FS_ECG * VENTANA_SEG)
+        self.y_pantalla = np.full(self.buffer_ecg.capacidad, np.nan, dtype=np.float32)
+        self.datos_nuevos = False
+        self.escritor = None
+        self.archivo_actual = None
+        self.alarmas_activas = AlarmasActivas()
+        self.pantalla_hr = PantallaHR(self.mostrar_hr)
+        self.initUI()
+
+    def initUI(self):
+        self.setObjectName("panel")
+        self.setStyleSheet("QFrame#panel { border: 1px solid #333333; border-radius: 5px; }")
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+
+        eje_x, unidad = eje_barrido(self.buffer_ecg.capacidad, FS_DSP)
+        self.grafica = crear_grafica(BACKEND_GRAFICA, eje_x, self.origen, unidad)
+        layout.addWidget(self.grafica.widget, stretch=1)
+
+        fila = QHBoxLayout()
+        self.lbl_hr = self.crear_valor("#FF3333")
+        self.lbl_spo2 = self.crear_valor("#3399FF")
+        self.lbl_origen_hr = QLabel("HR")
+        fila.addWidget(self.lbl_origen_hr)
+        fila.addWidget(self.lbl_hr)
+        fila.addWidget(QLabel("SpO2"))
+        fila.addWidget(self.lbl_spo2)
+
+        self.input_nombre = QLineEdit()
+        self.input_nombre.setPlaceholderText("Paciente")
+        self.input_nombre.setStyleSheet("background-color: #333333; color: white; padding: 2px; border: none;")
+        fila.addWidget(self.input_nombre)
+
+        self.btn_record = QPushButton("REC")
+        self.btn_record.setStyleSheet("background-color: #004400; color: white; font-weight: bold; padding: 4px;")
+        self.btn_record.clicked.connect(self.toggle_recording)
+        fila.addWidget(self.btn_record)
+        layout.addLayout(fila)
+
+        self.lbl_enlace = QLabel("")
+        self.lbl_enlace.setStyleSheet("color: gray; font-size: 10px; border: none;")
+        layout.addWidget(self.lbl_enlace)
+
+    def crear_valor(self, color):
+        lbl = QLabel("--")
+        lbl.setFont(QFont("Arial", 18, QFont.Bold))
+        lbl.setStyleSheet(f"color: {color}; border: none;")
+        return lbl
+
+    def escribir_log(self, tipo, mensaje, valor=""):
+        if self.escritor:
+            self.escritor.registrar(tipo, mensaje, valor)
+
+    def toggle_recording(self):
+        if not self.escritor:
+            nombre = self.input_nombre.text().strip() or "Anonimo"
+            dispositivo = self.origen.replace(".", "-").replace(":", "_")
+            timestamp_str = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"Historial_{nombre}_{dispositivo}_{timestamp_str}.txt"
+            try:
+                self.escritor = EscritorSesion(filename, [
+                    "=== LOG DE SISTEMA DE TELEMETRIA ===",
+                    f"PACIENTE: {nombre} | EDAD: ? | DISPOSITIVO: {self.origen}",
+                    f"INICIO SESION: {datetime.datetime.now()}",
+                    "====================================",
+                    "TIMESTAMP,TIPO,DETALLE,VALOR",
+                ])
+            except OSError as e:
+                self.setToolTip(f"Error Disco: {e}")
+                return
+            self.escritor.start()
+            self.archivo_actual = filename
+            self.escribir_log("SISTEMA", "INICIO DE GRABACION", "")
+            self.btn_record.setText("STOP")
+            self.btn_record.setStyleSheet("background-color: #AA0000; color: white; font-weight: bold; padding: 4px;")
+            self.input_nombre.setEnabled(False)
+        else:
+            self.escribir_log("SISTEMA", "FIN DE GRABACION", "")
+            self.escritor.cerrar()
+            self.escritor = None
+            self.indexador.indexar(self.archivo_actual)
+            self.btn_record.setText("REC")
+            self.btn_record.setStyleSheet("background-color: #004400; color: white; font-weight: bold; padding: 4px;")
+            self.input_nombre.setEnabled(True)
+
+    def recibir(self, muestras, filtradas, stats, frecuencias, transiciones):
+        if len(muestras):
+            self.buffer_ecg.escribir(filtradas)
+            self.datos_nuevos = True
+            self.escribir_log("ECG", "Muestra", muestras)
+        if frecuencias:
+            self.pantalla_hr.latido(int(round(frecuencias[-1])))
+        for spo2, hr in stats:
+            self.actualizar_stats(spo2, hr)
+        if transiciones:
+            self.actualizar_alarmas(transiciones)
+
+    def mostrar_hr(self, hr, origen, cambio):
+        self.lbl_hr.setText(str(hr))
+        if cambio:
+            self.lbl_origen_hr.setText("HR ECG" if origen == "ECG" else "HR")
+
+    def actualizar_stats(self, spo2, hr):
+        self.lbl_spo2.setText(str(spo2))
+        self.pantalla_hr.oximetro(hr)
+        self.escribir_log("VITALES", "SPO2/HR", f"{spo2}/{hr}")
+
+    def actualizar_alarmas(self, transiciones):
+        for t in transiciones:
+            self.escribir_log(t.tipo, t.detalle, t.valor)
+        # Solo se reestiliza lo que cambio de estado
+        for parametro in self.alarmas_activas.aplicar(transiciones):
+            activa = parametro in self.alarmas_activas.parametros
+            if parametro == "spo2":
+                self.lbl_spo2.setStyleSheet("color: red; background-color: #330000; border: none;" if activa
+                                            else "color: #3399FF; border: none;")
+            elif parametro == "hr":
+                self.lbl_hr.setStyleSheet("color: red; background-color: #330000; border: none;" if activa
+                                          else "color: #FF3333; border: none;")
+            elif parametro == "ecg":
+                borde = "2px solid red" if activa else "1px solid #333333"
+                self.setStyleSheet(f"QFrame#panel {{ border: {borde}; border-radius: 5px; }}")
+        self.setToolTip(self.alarmas_activas.texto)
+
+    def fijar_fs(self, fs):
+        self.grafica.fijar_eje(*eje_barrido(self.buffer_ecg.capacidad, fs))
+
+    def refrescar(self):
+        if not self.datos_nuevos:
+            return
+        self.datos_nuevos = False
+        self.grafica.dibujar(self.buffer_ecg.vista_barrido(self.y_pantalla, HUECO_BARRIDO))
+
+    def cerrar(self):
+        if self.escritor:
+            self.escribir_log("SISTEMA", "CIERRE DE APLICACION", "")
+            self.escritor.cerrar()
+            self.escritor = None
+            self.indexador.indexar(self.archivo_actual)
+
+
+class MonitorMultiple(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Monitor Signos Vitales - MULTI DISPOSITIVO")
+        self.setGeometry(50, 50, 1400, 900)
+        self.setStyleSheet("background-color: #121212; color: #00FF00;")
+        self.paneles = {}
+        self.ignorados = set()
+        self.indexador = Indexador()   # Compartido por los paneles: closeEvent espera a todos
+        self.initUI()
+        self.init_worker()
+
+    def initUI(self):
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        layout = QVBoxLayout(central_widget)
+
+        self.lbl_estado = QLabel("Esperando puentes UART-UDP...")
+        self.lbl_estado.setStyleSheet("color: gray; font-size: 11px;")
+        layout.addWidget(self.lbl_estado)
+
+        self.grid = QGridLayout()
+        layout.addLayout(self.grid, stretch=1)
+
+        # Un solo temporizador repinta todos los paneles con datos nuevos
+        self.timer_grafica = QTimer(self)
+        self.timer_grafica.timeout.connect(self.refrescar_graficas)
+        self.timer_grafica.start(int(1000 / FPS_GRAFICA))
+
+        self.timer_enlace = QTimer(self)
+        self.timer_enlace.timeout.connect(self.actualizar_estado_enlaces)
+        self.timer_enlace.start(500)
+
+    def init_worker(self):
+        self.worker = ReceptorWorker()
+        self.worker.sig_lote.connect(self.repartir)
+        self.worker.sig_error.connect(self.mostrar_error)
+        self.worker.sig_fs.connect(self.fijar_fs)
+        self.worker.start()
+
+    def mostrar_error(self, texto):
+        self.lbl_estado.setText(texto)
+        self.lbl_estado.setStyleSheet("color: red; font-size: 11px;")
+
+    def panel_de(self, origen):
+        panel = self.paneles.get(origen)
+        if panel is None and origen not in self.ignorados:
+            if len(self.paneles) >= MAX_DISPOSITIVOS:
+                self.ignorados.add(origen)
+                self.lbl_estado.setText(f"Limite de {MAX_DISPOSITIVOS} dispositivos: ignorando {origen}")
+                return None
+            panel = PanelMonitor(origen, self.indexador)
+            self.paneles[origen] = panel
+            self.reordenar_grid()
+        return panel
+
+    def reordenar_grid(self):
+        columnas = math.ceil(math.sqrt(len(self.paneles)))
+        for i, panel in enumerate(self.paneles.values()):
+            self.grid.addWidget(panel, i // columnas, i % columnas)
+        self.lbl_estado.setText(f"Dispositivos conectados: {len(self.paneles)}")
+
+    def repartir(self, lote):
+        for origen, datos in lote.items():
+            panel = self.panel_de(origen)
+            if panel:
+                panel.recibir(*datos)
+
+    def fijar_fs(self, origen, fs):
+        panel = self.paneles.get(origen)
+        if panel:
+            panel.fijar_fs(fs)
+
+    def refrescar_graficas(self):
+        for panel in self.paneles.values():
+            panel.refrescar()
+
+    def actualizar_estado_enlaces(self):
+        enlaces = self.worker.enlaces
+        for origen, panel in self.paneles.items():
+            panel.pantalla_hr.revisar()
+            if origen in enlaces:
+                panel.lbl_enlace.setText(resumen_enlace([enlaces[origen]]))
+
+    def closeEvent(self, event):
+        for panel in self.paneles.values():
+            panel.cerrar()
+        self.worker.stop()
+        self.indexador.esperar()
+        event.accept()
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = MonitorMultiple()
+    window.show()
+    sys.exit(app.exec_())
@@ -0,0 +1,196 @@
+import time
+import queue
+import threading
+import multiprocessing
+
+from receptor import ReceptorUDP
+from buffer_circular import BufferCompartido, EntradaBarrido
+from escritor_sesion import crear_escritor
+from alarmas import MotorAlarmas
+from metricas import metricas
+
+# --- PROCESO DE ANALISIS ---
+# Recepcion, parseo, DSP y escritura del historial corren en un proceso aparte (con su propio
+# GIL); la GUI solo lee las muestras filtradas de un BufferCompartido y dibuja.
+# Por las colas solo viajan mensajes pequeños (tuplas):
+#   GUI -> analisis:  ("grabar", formato, filename, cabecera) | ("log", tipo, detalle, valor)
+#                     ("parar",) | ("salir",)
+#   analisis -> GUI:  ("stats", spo2, hr) | ("latido", hr) | ("alarmas", [Transicion])
+#                     ("enlaces", {origen: Reensamblador}) | ("metricas", instantanea) con MONITOR_METRICAS=1
+#                     ("escritor", profundidad, descartados, error) | ("cerrado", filename) | ("error", texto)
+#                     ("fs", hz) una vez, cuando el DSP conoce la frecuencia de muestreo
+# Sin imports de Qt: el hijo arranca con "spawn" y no carga la GUI.
+INTERVALO_ESTADO = 0.5   # s entre envios del estado de enlaces y escritor
+
+
+def ejecutar_analisis(nombre_buffer, capacidad, control, eventos, config):
+    """Punto de entrada del proceso hijo"""
+    buffer = BufferCompartido(capacidad, nombre=nombre_buffer)
+    alarmas = MotorAlarmas(config.get("alarmas"))
+    estado = {"escritor": None, "dsp": None, "fs": None}
+    entrada = EntradaBarrido(capacidad)
+
+    def al_recibir(lote):
+        if metricas:
+            metricas.observar("llegada->parseo", time.perf_counter() - receptor.ultimo_despertar)
+        for muestras, stats in lote.values():
+            frecuencias = []
+            if len(muestras):
+                filtradas, latidos = entrada.procesar(estado["dsp"], muestras)
+                buffer.escribir(filtradas)
+                if estado["fs"] is None and estado["dsp"] and estado["dsp"].fs:
+                    estado["fs"] = estado["dsp"].fs
+                    eventos.put(("fs", estado["fs"]))
+                if metricas:
+                    metricas.observar("llegada->buffer", time.perf_counter() - receptor.ultimo_despertar)
+                    metricas.contar("muestras", len(muestras))
+                escritor = estado["escritor"]
+                if escritor:
+                    escritor.registrar("ECG", "Muestra", muestras)
+                frecuencias = [hr for _, hr in latidos if hr]
+                for hr in frecuencias:
+                    eventos.put(("latido", int(round(hr))))
+            for spo2, hr in stats:
+                eventos.put(("stats", spo2, hr))  # La GUI registra VITALES y los cambios de alarma
+            transiciones = alarmas.procesar(muestras, stats, frecuencias)
+            if transiciones:
+                eventos.put(("alarmas", transiciones))
+
+    def revisar_alarmas():
+        transiciones = alarmas.revisar()
+        if transiciones:
+            eventos.put(("alarmas", transiciones))
+
+    try:
+        receptor = ReceptorUDP(al_recibir, config["ip"], config["puerto"], periodico=revisar_alarmas)
+    except OSError as e:
+        receptor = None
+        eventos.put(("error", f"Error binding socket: {e}"))
+    if receptor:
+        hilo = threading.Thread(target=receptor.ejecutar, daemon=True)
+        hilo.start()
+        if metricas:
+            metricas.fuente("datagramas", lambda: receptor.datagramas)
+            metricas.fuente("bytes recibidos", lambda: receptor.bytes_recibidos)
+            metricas.fuente("errores de recepcion", lambda: receptor.errores)
+
+    # scipy se importa con el receptor ya en marcha (hasta entonces, muestras sin filtrar);
+    # las ordenes de la GUI esperan en la cola mientras tanto
+    if config.get("dsp", True):
+        try:
+            from dsp import ProcesadorDSP
+            estado["dsp"] = ProcesadorDSP(config.get("fs"), config["red"], config.get("centro", 0.0))
+        except ImportError:
+            pass
+
+    def informar_escritor(escritor):
+        eventos.put(("escritor", escritor.profundidad, escritor.descartados,
+                     str(escritor.error) if escritor.error else None))
+
+    ultimo_estado = 0.0
+    while True:
+        try:
+            mensaje = control.get(timeout=INTERVALO_ESTADO)
+        except queue.Empty:
+            mensaje = None
+
+        if mensaje:
+            orden = mensaje[0]
+            if orden == "salir":
+                break
+            elif orden == "grabar":
+                try:
+                    escritor = crear_escritor(*mensaje[1:])
+                    escritor.start()
+                    estado["escritor"] = escritor
+                except OSError as e:
+                    eventos.put(("escritor", 0, 0, str(e)))
+            elif orden == "log" and estado["escritor"]:
+                estado["escritor"].registrar(*mensaje[1:])
+            elif orden == "parar" and estado["escritor"]:
+                escritor, estado["escritor"] = estado["escritor"], None
+                escritor.cerrar()
+                informar_escritor(escritor)
+                eventos.put(("cerrado", escritor.filename))  # Archivo completo: ya se puede indexar
+
+        ahora = time.monotonic()
+        if ahora - ultimo_estado >= INTERVALO_ESTADO:
+            ultimo_estado = ahora
+            if receptor:
+                eventos.put(("enlaces", dict(receptor.enlaces)))
+            if estado["escritor"]:
+                informar_escritor(estado["escritor"])
+            if metricas:
+                eventos.put(("metricas", metricas.instantanea()))
+
+    if estado["escritor"]:
+        estado["escritor"].cerrar()
+    if receptor:
+        receptor.detener()
+        hilo.join()
+        receptor.cerrar()
+    buffer.cerrar()
+    eventos.cancel_join_thread()  # Si la GUI ya no lee, no esperar a vaciar la cola al salir
+
+
+class ClienteAnalisis:
+    """Lado GUI: crea el buffer compartido y las colas y lanza el proceso de analisis"""
+
+    def __init__(self, capacidad, **config):
+        contexto = multiprocessing.get_context("spawn")
+        self.buffer = BufferCompartido(capacidad)
+        self.control = contexto.Queue()
+        self.eventos = contexto.Queue()
+        self.proceso = contexto.Process(
+            target=ejecutar_analisis, daemon=True,
+            args=(self.buffer.nombre, capacidad, self.control, self.eventos, config))
+
+    def start(self):
+        self.proceso.start()
+
+    def enviar(self, *mensaje):
+        self.control.put(mensaje)
+
+    def recibir(self, maximo=1000):
+        """Mensajes pendientes del proceso de analisis, sin bloquear"""
+        mensajes = []
+        while len(mensajes) < maximo:
+            try:
+                mensajes.append(self.eventos.get_nowait())
+            except queue.Empty:
+                break
+        return mensajes
+
+    def detener(self, timeout=5.0):
+        if self.proceso.is_alive():
+            self.enviar("salir")
+            self.proceso.join(timeout)
+            if self.proceso.is_alive():
+                self.proceso.terminate()
+                self.proceso.join()
+        self.buffer.cerrar()
+
+
+class EscritorRemoto:
+    """Misma interfaz que EscritorSesion; el archivo lo escribe el proceso de analisis"""
+
+    def __init__(self, cliente, formato, filename, cabecera):
+        self.cliente = cliente
+        self.orden = ("grabar", formato, filename, cabecera)
+        self.profundidad = 0
+        self.descartados = 0
+        self.error = None
+
+    def start(self):
+        self.cliente.enviar(*self.orden)
+
+    def registrar(self, tipo, detalle, valor=""):
+        self.cliente.enviar("log", tipo, detalle, valor)
+
+    def actualizar(self, profundidad, descartados, error):
+        self.profundidad = profundidad
+        self.descartados = descartados
+        self.error = error
+
+    def cerrar(self, timeout=5.0):
+        self.cliente.enviar("parar")
@@ -0,0 +1,261 @@
+import struct
+import numpy as np
+
+# --- FORMATO DE TEXTO DEL PUENTE UART-UDP ---
+# Cada datagrama trae una o varias lineas:
+#   "<valor>\n"       -> muestra ECG (ADC filtrado)
+#   "S:<spo2>,<hr>\n" -> estadisticas del oximetro
+PREFIJO_STATS = b"S:"
+
+
+def parsear_datagrama(data):
+    """Convierte uno o varios datagramas (bytes) en un bloque NumPy de muestras ECG y una lista de (spo2, hr)"""
+    stats = []
+
+    # Las lineas S: son escasas (una por segundo): se recortan del bloque sin recorrer el resto
+    pos = data.find(PREFIJO_STATS)
+    if pos >= 0:
+        trozos = []
+        previo = 0
+        while pos >= 0:
+            fin = data.find(b"\n", pos)
+            if fin < 0:
+                fin = len(data)
+            trozos.append(data[previo:pos])
+            try:
+                partes = data[pos + 2:fin].split(b",")
+                if len(partes) == 2:
+                    stats.append((int(partes[0]), int(partes[1])))
+            except ValueError:
+                pass
+            previo = fin
+            pos = data.find(PREFIJO_STATS, fin)
+        trozos.append(data[previo:])
+        data = b"\n".join(trozos)
+    lineas = data.split()
+
+    # Camino rapido: la conversion de todo el bloque se hace en C de una vez
+    try:
+        return np.array(lineas, dtype=np.float64), stats
+    except ValueError:
+        pass
+
+    # Alguna linea corrupta (p.ej. cortada entre dos datagramas): se descarta solo esa
+    muestras = []
+    for line in lineas:
+        try:
+            muestras.append(float(line))
+        except ValueError:
+            pass
+    return np.array(muestras, dtype=np.float64), stats
+
+
+# --- MODO ENMARCADO (UART-UDP.c con MODO_TRAMA = 1 o 2) ---
+# Cada datagrama lleva una cabecera de 8 bytes (little-endian):
+#   magia (0xEC) | tipo | secuencia uint16 | contador uint32
+# 'secuencia' sube en 1 por datagrama. Los datagramas sin la magia se tratan como
+# texto plano (firmware antiguo). Segun 'tipo':
+#   TRAMA_TEXTO   -> texto crudo de la UART; 'contador' = '\n' enviados antes de este
+#                    datagrama. Con FLAG_CONTINUA el texto empieza a mitad de una linea
+#                    (el resto iba al final del datagrama anterior).
+#   TRAMA_BINARIA -> n_muestras uint16 | n_stats uint8 | n_muestras x uint16 | n_stats x (spo2, hr) int16
+#                    'contador' = muestras enviadas antes de este datagrama.
+MAGIA_TRAMA = 0xEC
+TRAMA_TEXTO = 0x01
+TRAMA_BINARIA = 0x02
+FLAG_CONTINUA = 0x80
+CABECERA_TRAMA = struct.Struct("<BBHI")
+CABECERA_BINARIA = struct.Struct("<HB")
+CABECERA_COMPLETA = struct.Struct("<BBHIHB")   # CABECERA_TRAMA + CABECERA_BINARIA
+DTYPE_MUESTRA = np.dtype("<u2")
+DTYPE_STATS = np.dtype("<i2")
+VENTANA_SECUENCIA = 1 << 15   # Saltos hacia atras menores que esto son paquetes desordenados
+MAX_FRAGMENTO = 32            # Bytes maximos de una linea partida en modo texto plano
+
+
+def decodificar_binaria(data, offset=CABECERA_TRAMA.size):
+    """Cuerpo de una TRAMA_BINARIA -> (muestras np.ndarray, [(spo2, hr), ...]) sin recorrer muestra a muestra"""
+    if len(data) < offset + CABECERA_BINARIA.size:
+        raise ValueError("trama binaria cortada")
+    n_muestras, n_stats = CABECERA_BINARIA.unpack_from(data, offset)
+    offset += CABECERA_BINARIA.size
+    if len(data) != offset + 2 * n_muestras + 4 * n_stats:
+        raise ValueError(f"trama binaria de {len(data)} bytes no cuadra con {n_muestras} muestras y {n_stats} stats")
+    muestras = np.frombuffer(data, DTYPE_MUESTRA, n_muestras, offset)
+    stats = []
+    if n_stats:
+        valores = np.frombuffer(data, DTYPE_STATS, 2 * n_stats, offset + 2 * n_muestras)
+        stats = [tuple(par) for par in valores.reshape(-1, 2).tolist()]
+    return muestras, stats
+
+
+def codificar_binaria(seq, contador, muestras, stats=()):
+    """Trama binaria completa (lo que envia UART-UDP.c con MODO_TRAMA = 2)"""
+    muestras = np.clip(np.asarray(muestras), 0, 0xFFFF).astype(DTYPE_MUESTRA)
+    return (CABECERA_TRAMA.pack(MAGIA_TRAMA, TRAMA_BINARIA, seq & 0xFFFF, contador & 0xFFFFFFFF)
+            + CABECERA_BINARIA.pack(len(muestras), len(stats))
+            + muestras.tobytes()
+            + np.asarray(stats, dtype=DTYPE_STATS).tobytes())
+
+
+class Reensamblador:
+    """Estado del enlace de un puente: secuencia, reensamblado de lineas y contadores de calidad"""
+
+    def __init__(self):
+        self.enmarcado = False
+        self.binario = False
+        self.datagramas = 0
+        self.perdidos = 0          # Datagramas que faltan en la secuencia
+        self.reordenados = 0       # Datagramas que llegaron tarde (ya contados como perdidos; se descartan)
+        self.truncados = 0         # Lineas partidas que no se pudieron completar
+        self.muestras_perdidas = 0 # Muestras dentro de los datagramas perdidos (lineas, en modo texto)
+        self.malformados = 0       # Tramas binarias cortadas o con longitudes incoherentes (se descartan)
+        self.esperado = None       # Proxima secuencia esperada
+        self.contador_esperado = 0
+        self.fragmento = b""       # Inicio de linea pendiente del datagrama anterior
+
+    def procesar(self, datagramas):
+        """Convierte los datagramas de un drenado en (muestras, stats) actualizando los contadores"""
+        textos = []    # Lineas completas pendientes de parsear
+        crudos = []    # Muestras uint16 (bytes) de tramas binarias pendientes de convertir
+        bloques = []   # Arrays ya convertidos, en orden de llegada
+        stats = []
+        for data in datagramas:
+            self.datagramas += 1
+            if len(data) < CABECERA_TRAMA.size or data[0] != MAGIA_TRAMA:
+                if crudos:
+                    self._volcar_binario(crudos, bloques)
+                self._plano(data, textos)
+                continue
+            self.enmarcado = True
+            if data[1] == TRAMA_BINARIA:
+                self.binario = True
+                if textos:
+                    self._volcar_texto(textos, bloques, stats)
+                self._binaria(data, crudos, stats)
+            else:
+                if crudos:
+                    self._volcar_binario(crudos, bloques)
+                self._texto(data, textos)
+        if textos:
+            self._volcar_texto(textos, bloques, stats)
+        if crudos:
+            self._volcar_binario(crudos, bloques)
+
+        if not bloques:
+            return np.empty(0, dtype=np.float64), stats
+        if len(bloques) == 1:
+            return bloques[0], stats
+        return np.concatenate(bloques), stats
+
+    def _volcar_texto(self, textos, bloques, stats):
+        muestras, s = parsear_datagrama(b"\n".join(textos))
+        textos.clear()
+        if len(muestras):
+            bloques.append(muestras)
+        stats.extend(s)
+
+    def _volcar_binario(self, crudos, bloques):
+        # Un solo np.frombuffer para todas las tramas binarias seguidas del drenado
+        bloques.append(np.frombuffer(b"".join(crudos), DTYPE_MUESTRA).astype(np.float64))
+        crudos.clear()
+
+    def _secuencia(self, seq, contador):
+        """Comprueba la secuencia; devuelve (aceptar, hubo_hueco)"""
+        if self.esperado is None or seq == self.esperado:
+            return True, False
+        salto = (seq - self.esperado) & 0xFFFF
+        if seq == 0 and contador == 0:
+            return True, True  # El puente se reinicio: se empieza de cero sin contar perdidas
+        if salto >= VENTANA_SECUENCIA:
+            # Llego tarde: su hueco ya se conto como perdido y la curva ya avanzo
+            self.reordenados += 1
+            return False, False
+        self.perdidos += salto
+        self.muestras_perdidas += max(0, contador - self.contador_esperado)
+        return True, True
+
+    def _binaria(self, data, crudos, stats):
+        # Un datagrama cortado o corrupto se descarta entero: nunca debe tumbar al receptor
+        if len(data) < CABECERA_COMPLETA.size:
+            self.malformados += 1
+            return
+        _, _, seq, contador, n_muestras, n_stats = CABECERA_COMPLETA.unpack_from(data)
+        inicio = CABECERA_COMPLETA.size
+        fin = inicio + 2 * n_muestras
+        if len(data) != fin + 4 * n_stats:  # El puente envia la longitud exacta; sobrar tambien es corrupcion
+            self.malformados += 1
+            return
+        if seq != self.esperado:
+            aceptar, _ = self._secuencia(seq, contador)
+            if not aceptar:
+                return
+        self.esperado = (seq + 1) & 0xFFFF
+        self.contador_esperado = contador + n_muestras
+        self.fragmento = b""
+        if n_muestras:
+            crudos.append(data[inicio:fin])
+        if n_stats:
+            valores = np.frombuffer(data, DTYPE_STATS, 2 * n_stats, fin)
+            stats.extend(tuple(par) for par in valores.reshape(-1, 2).tolist())
+
+    def _plano(self, data, textos):
+        # El puente antiguo reenvia trozos de la UART que casi nunca acaban en '\n': sin
+        # unir la linea partida, "2034" llegaria como dos muestras falsas "20" y "34"
+        if not self.fragmento and b"\n" not in data:
+            textos.append(data)  # Un valor suelto sin '\n' (emisores de prueba): como siempre
+            return
+        texto = self.fragmento + data
+        corte = texto.rfind(b"\n")
+        if corte < 0:
+            if len(texto) > MAX_FRAGMENTO:
+                textos.append(texto)
+                texto = b""
+            self.fragmento = texto
+            return
+        self.fragmento = texto[corte + 1:]
+        textos.append(texto[:corte])
+
+    def _texto(self, data, textos):
+        _, tipo, seq, lineas = CABECERA_TRAMA.unpack_from(data)
+        cuerpo = data[CABECERA_TRAMA.size:]
+
+        aceptar, hueco = self._secuencia(seq, lineas)
+        if not aceptar:
+            return
+        if hueco or self.esperado is None:
+            if self.fragmento:
+                self.truncados += 1
+            self.fragmento = b""
+            if tipo & FLAG_CONTINUA:
+                # La cabeza de esta linea se perdio con el hueco (o antes de conectarnos)
+                corte = cuerpo.find(b"\n")
+                cuerpo = cuerpo[corte + 1:] if corte >= 0 else b""
+                if hueco:
+                    self.truncados += 1
+
+        self.esperado = (seq + 1) & 0xFFFF
+        self.contador_esperado = lineas + data.count(b"\n", CABECERA_TRAMA.size)
+
+        # Solo se entregan lineas completas; el resto espera al siguiente datagrama
+        texto = self.fragmento + cuerpo
+        corte = texto.rfind(b"\n")
+        if corte < 0:
+            self.fragmento = texto
+            return
+        self.fragmento = texto[corte + 1:]
+        textos.append(texto[:corte])
+
+
+def resumen_enlace(enlaces):
+    """Texto de estado para la GUI con los contadores sumados de uno o varios enlaces"""
+    enlaces = list(enlaces)
+    if not enlaces:
+        return "Enlace: sin datos"
+    if not any(e.enmarcado for e in enlaces):
+        return "Enlace: texto plano (sin secuencia)"
+    modo = "binario" if any(e.binario for e in enlaces) else "texto"
+    perdidos = sum(e.perdidos for e in enlaces)
+    reordenados = sum(e.reordenados for e in enlaces)
+    truncados = sum(e.truncados for e in enlaces)
+    return f"Enlace {modo}: Perdidos: {perdidos} | Desordenados: {reordenados} | Truncados: {truncados}"
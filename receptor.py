@@ -0,0 +1,141 @@
+import time
+import socket
+import selectors
+
+from protocolo import Reensamblador
+
+# --- CONFIGURACIÓN UDP ---
+UDP_IP = "0.0.0.0"
+UDP_PORT = 3333
+TAM_DATAGRAMA = 4096
+BUFFER_SOCKET = 1 << 20     # Buffer de recepcion del SO para absorber rafagas de varios puentes
+MAX_POR_DESPERTAR = 1000    # Datagramas maximos leidos por despertar antes de entregar el lote
+
+
+class ReceptorUDP:
+    """Bucle unico de recepcion (selectors) para uno o varios puentes UART-UDP.
+
+    Los datagramas se separan por IP de origen: cada puente es un dispositivo.
+    Con por_puerto=True la clave es "ip:puerto" (varios simuladores en una misma maquina).
+    'al_recibir' recibe un dict {origen: (muestras np.ndarray, [(spo2, hr), ...])}
+    con todo lo que llego en un mismo despertar del selector.
+
+    El socket es no bloqueante y se lee con recvfrom_into sobre un bytearray
+    reutilizado; detener() despierta al selector por un socketpair, asi que el
+    hilo termina al instante en vez de esperar a un timeout.
+    Con 'periodico' el selector espera como mucho 'periodo' s y llama a periodico()
+    en el mismo hilo al menos cada 'periodo' s (p.ej. alarmas de "sin datos").
+    Un error inesperado (socket, parseo, al_recibir) se imprime y se cuenta en 'errores'
+    pero no detiene el bucle: la recepcion sigue con el siguiente datagrama.
+    """
+
+    def __init__(self, al_recibir, ip=UDP_IP, puerto=UDP_PORT, por_puerto=False, periodico=None, periodo=0.5):
+        self.al_recibir = al_recibir
+        self.por_puerto = por_puerto
+        self.periodico = periodico
+        self.periodo = periodo if periodico else None
+        self.running = True
+        self.datagramas = 0
+        self.bytes_recibidos = 0
+        self.despertares = 0
+        self.errores = 0
+        self.ultimo_despertar = 0.0   # time.perf_counter() del ultimo drenado (llegada del lote)
+        self.enlaces = {}   # origen -> Reensamblador (secuencia y contadores de calidad del enlace)
+
+        self.buffer = bytearray(TAM_DATAGRAMA)
+        self.vista = memoryview(self.buffer)
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, BUFFER_SOCKET)
+        except OSError:
+            pass
+        self.sock.bind((ip, puerto))
+        self.sock.setblocking(False)
+
+        # Extremo de lectura en el selector; detener() escribe en el otro
+        self.despertador, self.aviso = socket.socketpair()
+        self.despertador.setblocking(False)
+
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.sock, selectors.EVENT_READ)
+        self.selector.register(self.despertador, selectors.EVENT_READ)
+
+    @property
+    def puerto(self):
+        return self.sock.getsockname()[1]
+
+    def ejecutar(self):
+        ultimo = time.monotonic()
+        while self.running:
+            try:
+                for key, _ in self.selector.select(self.periodo):
+                    if key.fileobj is self.despertador:
+                        continue
+                    lote = self._drenar()
+                    if lote:
+                        self.al_recibir(lote)
+                if self.periodico and time.monotonic() - ultimo >= self.periodo:
+                    ultimo = time.monotonic()
+                    self.periodico()
+            except Exception as e:
+                self._error("Error receiving", e)
+                time.sleep(0.01)  # Si el error se repite (p.ej. socket roto) no se quema la CPU
+
+    def _drenar(self):
+        self.despertares += 1
+        self.ultimo_despertar = time.perf_counter()
+        por_origen = {}
+        recvfrom_into = self.sock.recvfrom_into
+        vista = self.vista
+        n_datagramas = 0
+        for _ in range(MAX_POR_DESPERTAR):
+            try:
+                n, addr = recvfrom_into(self.buffer)
+            except BlockingIOError:
+                break
+            except ConnectionResetError:
+                continue  # Windows avisa asi de un ICMP "puerto inalcanzable"
+            except OSError as e:
+                self._error("Error receiving", e)
+                break
+            origen = f"{addr[0]}:{addr[1]}" if self.por_puerto else addr[0]
+            por_origen.setdefault(origen, []).append(vista[:n].tobytes())
+            n_datagramas += 1
+            self.bytes_recibidos += n
+        self.datagramas += n_datagramas
+
+        # Un solo parseo por origen para todo lo drenado; cada datagrama conserva sus lineas
+        lote = {}
+        for origen, datos in por_origen.items():
+            try:
+                lote[origen] = self.enlace(origen).procesar(datos)
+            except Exception as e:
+                # Se pierde lo drenado de ese origen, no el hilo; la linea a medias se descarta
+                if origen in self.enlaces:
+                    self.enlaces[origen].fragmento = b""
+                self._error(f"Error parsing {origen}", e)
+        return lote
+
+    def _error(self, contexto, e):
+        self.errores += 1
+        print(f"{contexto}: {e}")
+
+    def enlace(self, origen):
+        enlace = self.enlaces.get(origen)
+        if enlace is None:
+            enlace = self.enlaces[origen] = Reensamblador()
+        return enlace
+
+    def detener(self):
+        self.running = False
+        try:
+            self.aviso.send(b"x")
+        except OSError:
+            pass
+
+    def cerrar(self):
+        self.selector.close()
+        self.sock.close()
+        self.despertador.close()
+        self.aviso.close()
@@ -1,64 +1,91 @@
+import os
 import sys
 import time
-import socket
 import datetime
 import numpy as np
-from collections import deque
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QWidget, 
                              QLabel, QHBoxLayout, QFrame, QLineEdit, QPushButton, QMessageBox)
-from PyQt5.QtCore import QThread, pyqtSignal, Qt
-from PyQt5.QtGui import QFont
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal, Qt
+from protocolo import resumen_enlace
+from buffer_circular import BufferCircular
+from graficos import crear_grafica
+from escritor_sesion import EscritorSesion
+from formato_binario import EscritorBinario, EXTENSION
+from metricas import metricas, formatear, volcar
+from interfaz_comun import (UDP_IP, UDP_PORT, FS_ECG, VENTANA_SEG, FPS_GRAFICA, HUECO_BARRIDO, BACKEND_GRAFICA,
+                            DSP_ACTIVO, FRECUENCIA_RED, FS_DSP, CENTRO_ADC, CONFIG_ALARMAS, DataWorker,
+                            PantallaHR, AlarmasActivas, Indexador, crear_panel_dato, estilo_panel, eje_barrido)
+# Arranque diferido: scipy (dsp), el backend de dibujo, el proceso de analisis y las ventanas de
+# revision/busqueda se importan al usarlos, no al cargar el modulo. El socket se abre en el hilo
+# del receptor, que reparte muestras sin filtrar hasta que otro hilo termina de cargar scipy, y la
+# grafica se crea tras el primer cuadro de la ventana (bench_arranque.py mide el tiempo hasta el
+# primer cuadro y hasta la primera muestra).
 
 
-UDP_IP = "0.0.0.0"
-UDP_PORT = 3333
+FORMATO_REGISTRO = os.environ.get("MONITOR_FORMATO", "texto")     # "texto" (Historial_*.txt) o "binario" (.ecgb)
 
-class DataWorker(QThread):
-    sig_ecg = pyqtSignal(float)
+# --- ARQUITECTURA ---
+# "hilo": DataWorker (QThread) en el mismo interprete que la GUI.
+# "proceso": recepcion, DSP, alarmas y escritura en otro proceso (proceso_analisis.py); la GUI lee
+#            las muestras de memoria compartida y solo dibuja y registra eventos.
+ARQUITECTURA = os.environ.get("MONITOR_ARQUITECTURA", "hilo")
+INTERVALO_SONDEO_MS = 20  # Lectura de los mensajes del proceso de analisis
+
+class ProcesoWorker(QObject):
+    """Misma interfaz que DataWorker, pero el trabajo se hace en el proceso de analisis"""
     sig_stats = pyqtSignal(int, int)
+    sig_latido = pyqtSignal(int)
+    sig_alarmas = pyqtSignal(object)
+    sig_cerrado = pyqtSignal(str)         # Historial cerrado por el proceso de analisis
+    sig_fs = pyqtSignal(float)
 
-    def __init__(self):
+    def __init__(self, capacidad):
         super().__init__()
-        self.running = True
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        try:
-            self.sock.bind((UDP_IP, UDP_PORT))
-        except Exception as e:
-            print(f"Error binding socket: {e}")
-        self.sock.settimeout(0.5)
+        from proceso_analisis import ClienteAnalisis
+        self.cliente = ClienteAnalisis(capacidad, ip=UDP_IP, puerto=UDP_PORT, fs=FS_DSP, red=FRECUENCIA_RED,
+                                       centro=CENTRO_ADC, dsp=DSP_ACTIVO, alarmas=CONFIG_ALARMAS)
+        self.buffer = self.cliente.buffer  # Lo escribe el proceso de analisis
+        self.enlaces = {}
+        self.escritor = None
+        self.metricas = None  # Ultima instantanea de metricas del proceso de analisis
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.atender)
 
-    def run(self):
-        while self.running:
-            try:
-                data, addr = self.sock.recvfrom(2048)
-                text = data.decode('utf-8')
-                lines = text.splitlines()
-
-                for line in lines:
-                    line = line.strip()
-                    if not line: continue
-
-                    if line.startswith("S:"):
-                        try:
-                            partes = line[2:].split(',')
-                            if len(partes) == 2:
-                                self.sig_stats.emit(int(partes[0]), int(partes[1]))
-                        except ValueError: pass
-                    else:
-                        try:
-                            self.sig_ecg.emit(float(line))
-                        except ValueError: pass
-            except socket.timeout:
-                continue
-            except Exception as e:
-                print(f"Error receiving: {e}")
+    def start(self):
+        self.cliente.start()
+        self.timer.start(INTERVALO_SONDEO_MS)
+
+    def crear_escritor(self, formato, filename, cabecera):
+        from proceso_analisis import EscritorRemoto
+        self.escritor = EscritorRemoto(self.cliente, formato, filename, cabecera)
+        return self.escritor
+
+    def atender(self):
+        for mensaje in self.cliente.recibir():
+            tipo = mensaje[0]
+            if tipo == "stats":
+                self.sig_stats.emit(*mensaje[1:])
+            elif tipo == "latido":
+                self.sig_latido.emit(mensaje[1])
+            elif tipo == "alarmas":
+                self.sig_alarmas.emit(mensaje[1])
+            elif tipo == "enlaces":
+                self.enlaces = mensaje[1]
+            elif tipo == "escritor" and self.escritor:
+                self.escritor.actualizar(*mensaje[1:])
+            elif tipo == "cerrado":
+                self.sig_cerrado.emit(mensaje[1])
+            elif tipo == "fs":
+                self.sig_fs.emit(mensaje[1])
+            elif tipo == "metricas":
+                self.metricas = mensaje[1]
+            elif tipo == "error":
+                print(mensaje[1])
 
     def stop(self):
-        self.running = False
-        self.wait()
-        self.sock.close()
+        self.timer.stop()
+        self.cliente.detener()
+        self.atender()  # Lo que llego antes de salir (p.ej. "cerrado" del historial que se acaba de parar)
 
 class MonitorVital(QMainWindow):
     def __init__(self):
@@ -67,10 +94,20 @@ class MonitorVital(QMainWindow):
         self.setGeometry(100, 100, 1000, 600)
         self.setStyleSheet("background-color: #121212; color: #00FF00;")
         
-        self.data_buffer = deque([0]*200, maxlen=200)
+        self.buffer_ecg = BufferCircular(FS_ECG * VENTANA_SEG)
+        self.y_pantalla = np.full(self.buffer_ecg.capacidad, np.nan, dtype=np.float32)
+        self.total_dibujado = 0
+        self.fs = FS_DSP  # Frecuencia de muestreo real para el eje x; la mide el DSP si no se fija
+        self.llegada_sin_dibujar = None  # Llegada del lote mas antiguo aun no dibujado (metricas)
+        self.pantalla_hr = PantallaHR(self.mostrar_hr)
         self.is_recording = False
-        self.file_handle = None
-        self.alarma_activa = False 
+        self.escritor = None
+        self.perdidos_registrados = 0
+        self.alarmas_activas = AlarmasActivas()
+        self.ventanas_revision = []
+        self.ventana_busqueda = None
+        self.archivo_actual = None
+        self.indexador = Indexador()
         
         self.initUI()
         self.init_worker()
@@ -80,23 +117,26 @@ class MonitorVital(QMainWindow):
         self.setCentralWidget(central_widget)
         main_layout = QHBoxLayout(central_widget)
 
-        plot_layout = QVBoxLayout()
-        self.fig = Figure(figsize=(5, 4), dpi=100, facecolor='#121212')
-        self.ax = self.fig.add_subplot(111)
-        self.ax.set_facecolor('#000000')
-        self.ax.set_title('ECG', color='white')
-        self.ax.tick_params(axis='x', colors='white')
-        self.ax.tick_params(axis='y', colors='white')
-        self.ax.set_ylim(0, 4096)
-        self.ax.grid(True, color='#333333', linestyle='--')
-        self.line, = self.ax.plot([], [], color='#00FF00', linewidth=1.5)
-        self.canvas = FigureCanvas(self.fig)
-        plot_layout.addWidget(self.canvas)
+        self.plot_layout = plot_layout = QVBoxLayout()
+        self.grafica = None  # Se crea en cargar_grafica(), con la ventana ya en pantalla
+        self.lbl_cargando = QLabel("Cargando grafica...")
+        self.lbl_cargando.setStyleSheet("color: gray;")
+        self.lbl_cargando.setAlignment(Qt.AlignCenter)
+        plot_layout.addWidget(self.lbl_cargando, stretch=1)
+
+        self.lbl_alarma = QLabel("")
+        self.lbl_alarma.setStyleSheet("color: #FF3333; font-size: 14px; font-weight: bold;")
+        self.lbl_alarma.setAlignment(Qt.AlignCenter)
+        plot_layout.addWidget(self.lbl_alarma)
+
+        self.timer_grafica = QTimer(self)
+        self.timer_grafica.timeout.connect(self.refrescar_grafica)
+        self.timer_grafica.start(int(1000 / FPS_GRAFICA))
 
         stats_layout = QVBoxLayout()
-        self.lbl_hr = self.crear_panel_dato("FRECUENCIA CARDIACA", "BPM", "#FF3333")
+        self.lbl_hr = crear_panel_dato("FRECUENCIA CARDIACA", "BPM", "#FF3333")
         stats_layout.addWidget(self.lbl_hr)
-        self.lbl_spo2 = self.crear_panel_dato("SATURACIÓN O2", "%", "#3399FF")
+        self.lbl_spo2 = crear_panel_dato("SATURACIÓN O2", "%", "#3399FF")
         stats_layout.addWidget(self.lbl_spo2)
 
         control_frame = QFrame()
@@ -117,65 +157,150 @@ class MonitorVital(QMainWindow):
         self.btn_record.setStyleSheet("background-color: #004400; color: white; font-weight: bold; padding: 10px; border-radius: 5px;")
         self.btn_record.clicked.connect(self.toggle_recording)
         control_layout.addWidget(self.btn_record)
+
+        self.btn_revisar = QPushButton("REVISAR HISTORIAL")
+        self.btn_revisar.setStyleSheet("background-color: #333333; color: white; padding: 6px; border-radius: 5px;")
+        self.btn_revisar.clicked.connect(self.abrir_revision)
+        control_layout.addWidget(self.btn_revisar)
+
+        self.btn_buscar = QPushButton("BUSCAR SESIONES")
+        self.btn_buscar.setStyleSheet("background-color: #333333; color: white; padding: 6px; border-radius: 5px;")
+        self.btn_buscar.clicked.connect(self.abrir_busqueda)
+        control_layout.addWidget(self.btn_buscar)
         
         self.lbl_estado = QLabel("Sistema Listo")
         self.lbl_estado.setStyleSheet("color: gray; font-size: 10px; border: none;")
         self.lbl_estado.setAlignment(Qt.AlignCenter)
         control_layout.addWidget(self.lbl_estado)
 
+        self.lbl_cola = QLabel("")
+        self.lbl_cola.setStyleSheet("color: gray; font-size: 10px; border: none;")
+        self.lbl_cola.setAlignment(Qt.AlignCenter)
+        control_layout.addWidget(self.lbl_cola)
+
+        self.timer_cola = QTimer(self)
+        self.timer_cola.timeout.connect(self.actualizar_estado_escritor)
+
+        self.lbl_enlace = QLabel("")
+        self.lbl_enlace.setStyleSheet("color: gray; font-size: 10px; border: none;")
+        self.lbl_enlace.setAlignment(Qt.AlignCenter)
+        control_layout.addWidget(self.lbl_enlace)
+
+        self.timer_enlace = QTimer(self)
+        self.timer_enlace.timeout.connect(self.actualizar_estado_enlace)
+        self.timer_enlace.start(500)
+
+        if metricas:
+            # Panel de diagnostico (MONITOR_METRICAS=1)
+            self.lbl_metricas = QLabel("")
+            self.lbl_metricas.setStyleSheet("color: gray; font-size: 9px; font-family: monospace; border: none;")
+            control_layout.addWidget(self.lbl_metricas)
+
+            self.btn_metricas = QPushButton("VOLCAR METRICAS")
+            self.btn_metricas.setStyleSheet("background-color: #333333; color: white; padding: 4px; border-radius: 5px;")
+            self.btn_metricas.clicked.connect(self.volcar_metricas)
+            control_layout.addWidget(self.btn_metricas)
+
+            metricas.medidor("cola escritor", lambda: self.escritor.profundidad if self.escritor else 0)
+            self.timer_metricas = QTimer(self)
+            self.timer_metricas.timeout.connect(self.actualizar_metricas)
+            self.timer_metricas.start(1000)
+
         stats_layout.addWidget(control_frame)
         stats_layout.addStretch()
 
         main_layout.addLayout(plot_layout, stretch=3)
         main_layout.addLayout(stats_layout, stretch=1)
 
-    def crear_panel_dato(self, titulo, unidad, color_borde):
-        frame = QFrame()
-        frame.setStyleSheet(f"border: 2px solid {color_borde}; border-radius: 10px; background-color: #1E1E1E; margin: 10px;")
-        layout = QVBoxLayout(frame)
-        lbl_titulo = QLabel(titulo)
-        lbl_titulo.setAlignment(Qt.AlignCenter)
-        lbl_titulo.setStyleSheet("color: white; font-size: 14px; border: none;")
-        lbl_valor = QLabel("--")
-        lbl_valor.setAlignment(Qt.AlignCenter)
-        lbl_valor.setFont(QFont("Arial", 50, QFont.Bold))
-        lbl_valor.setStyleSheet(f"color: {color_borde}; border: none;")
-        lbl_unidad = QLabel(unidad)
-        lbl_unidad.setAlignment(Qt.AlignCenter)
-        lbl_unidad.setStyleSheet("color: gray; font-size: 12px; border: none;")
-        layout.addWidget(lbl_titulo)
-        layout.addWidget(lbl_valor)
-        layout.addWidget(lbl_unidad)
-        frame.valor_label = lbl_valor
-        return frame
-
     def init_worker(self):
-        self.worker = DataWorker()
-        self.worker.sig_ecg.connect(self.actualizar_grafica)
+        if ARQUITECTURA == "proceso":
+            self.worker = ProcesoWorker(self.buffer_ecg.capacidad)
+            self.buffer_ecg = self.worker.buffer
+            self.worker.sig_cerrado.connect(self.indexador.indexar)
+        else:
+            self.worker = DataWorker()
+            self.worker.sig_ecg.connect(self.actualizar_grafica)
         self.worker.sig_stats.connect(self.actualizar_stats)
+        self.worker.sig_latido.connect(self.actualizar_latido)
+        self.worker.sig_alarmas.connect(self.actualizar_alarmas)
+        self.worker.sig_fs.connect(self.fijar_fs)
         self.worker.start()
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.grafica is None:
+            QTimer.singleShot(0, self.cargar_grafica)  # Tras el primer cuadro de la ventana
+
+    def cargar_grafica(self):
+        """Crea la grafica importando el backend de dibujo; no hace nada si ya existe"""
+        if self.grafica is not None:
+            return
+        eje_x, unidad = eje_barrido(self.buffer_ecg.capacidad, self.fs)
+        self.grafica = crear_grafica(BACKEND_GRAFICA, eje_x, unidad=unidad)
+        self.plot_layout.replaceWidget(self.lbl_cargando, self.grafica.widget)
+        self.lbl_cargando.deleteLater()
+
+    def fijar_fs(self, fs):
+        self.fs = fs
+        if self.grafica is not None:
+            self.grafica.fijar_eje(*eje_barrido(self.buffer_ecg.capacidad, fs))
+
     def escribir_log(self, tipo, mensaje, valor=""):
-        """Escribe una línea en el archivo si estamos grabando"""
-        if self.is_recording and self.file_handle:
-            t_actual = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            linea = f"{t_actual},{tipo},{mensaje},{valor}\n"
-            self.file_handle.write(linea)
+        """Encola una línea (o un bloque np.ndarray de muestras) para el hilo escritor si estamos grabando"""
+        if self.is_recording and self.escritor:
+            self.escritor.registrar(tipo, mensaje, valor)
+
+    def actualizar_estado_enlace(self):
+        self.pantalla_hr.revisar()
+        enlaces = self.worker.enlaces
+        self.lbl_enlace.setText(resumen_enlace(enlaces.values()))
+        # Deja constancia en el historial de los huecos de la señal
+        perdidos = sum(e.perdidos for e in enlaces.values())
+        if self.is_recording and perdidos > self.perdidos_registrados:
+            self.escribir_log("ENLACE", "DATAGRAMAS PERDIDOS", str(perdidos - self.perdidos_registrados))
+        self.perdidos_registrados = perdidos
+
+    def actualizar_estado_escritor(self):
+        if not self.escritor:
+            return
+        texto = f"Cola: {self.escritor.profundidad} | Descartados: {self.escritor.descartados}"
+        if self.escritor.error:
+            texto += f" | Error Disco: {self.escritor.error}"
+        self.lbl_cola.setText(texto)
 
     def toggle_recording(self):
         if not self.is_recording:
             nombre = self.input_nombre.text().strip() or "Anonimo"
             edad = self.input_edad.text().strip() or "?"
-            timestamp_str = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"Historial_{nombre}_{timestamp_str}.txt"
+            ahora = datetime.datetime.now()
+            timestamp_str = ahora.strftime("%Y%m%d_%H%M%S")
             
             try:
-                self.file_handle = open(filename, "w")
-                self.file_handle.write("=== LOG DE SISTEMA DE TELEMETRIA ===\n")
-                self.file_handle.write(f"PACIENTE: {nombre} | EDAD: {edad}\n")
-                self.file_handle.write(f"INICIO SESION: {datetime.datetime.now()}\n")
-                self.file_handle.write("====================================\n")
-                self.file_handle.write("TIMESTAMP,TIPO,DETALLE,VALOR\n")
+                if FORMATO_REGISTRO == "binario":
+                    filename = f"Historial_{nombre}_{timestamp_str}{EXTENSION}"
+                    cabecera = {
+                        "paciente": nombre, "edad": edad, "inicio": ahora.isoformat(),
+                        "fs": FS_ECG, "dtype": "int16",
+                    }
+                else:
+                    filename = f"Historial_{nombre}_{timestamp_str}.txt"
+                    cabecera = [
+                        "=== LOG DE SISTEMA DE TELEMETRIA ===",
+                        f"PACIENTE: {nombre} | EDAD: {edad}",
+                        f"INICIO SESION: {ahora}",
+                        "====================================",
+                        "TIMESTAMP,TIPO,DETALLE,VALOR",
+                    ]
+                if ARQUITECTURA == "proceso":
+                    # El archivo lo abre el proceso de analisis; un error de disco llega por lbl_cola
+                    self.escritor = self.worker.crear_escritor(FORMATO_REGISTRO, filename, cabecera)
+                elif FORMATO_REGISTRO == "binario":
+                    self.escritor = EscritorBinario(filename, cabecera)
+                else:
+                    self.escritor = EscritorSesion(filename, cabecera)
+                self.escritor.start()
+                self.archivo_actual = filename
+                self.timer_cola.start(500)
                 
                 self.is_recording = True
                 self.escribir_log("SISTEMA", "INICIO DE GRABACION", "")
@@ -191,9 +316,13 @@ class MonitorVital(QMainWindow):
                 self.lbl_estado.setText(f"Error Disco: {e}")
         else:
             self.escribir_log("SISTEMA", "FIN DE GRABACION", "") 
-            if self.file_handle:
-                self.file_handle.close()
-                self.file_handle = None
+            self.timer_cola.stop()
+            if self.escritor:
+                self.escritor.cerrar()
+                self.actualizar_estado_escritor()
+                self.escritor = None
+                if ARQUITECTURA != "proceso":
+                    self.indexador.indexar(self.archivo_actual)  # En modo "proceso" llega con sig_cerrado
             
             self.is_recording = False
             self.btn_record.setText("INICIAR REGISTRO")
@@ -203,36 +332,117 @@ class MonitorVital(QMainWindow):
             self.input_nombre.setEnabled(True)
             self.input_edad.setEnabled(True)
 
-    def actualizar_grafica(self, valor):
-        self.data_buffer.append(valor)
-        self.line.set_data(np.arange(len(self.data_buffer)), list(self.data_buffer))
-        self.ax.set_xlim(0, len(self.data_buffer))
-        self.canvas.draw_idle()
+    def abrir_revision(self):
+        from ventana_revision import VentanaRevision, elegir_historial
+        path = elegir_historial(self)
+        if not path:
+            return
+        try:
+            ventana = VentanaRevision(path)
+        except (OSError, ValueError) as e:
+            self.lbl_estado.setText(f"Error al abrir historial: {e}")
+            return
+        self.ventanas_revision = [v for v in self.ventanas_revision if v.isVisible()] + [ventana]
+        ventana.show()
+
+    def abrir_busqueda(self):
+        if self.ventana_busqueda is None or not self.ventana_busqueda.isVisible():
+            from busqueda_sesiones import VentanaBusqueda
+            try:
+                self.ventana_busqueda = VentanaBusqueda()
+            except Exception as e:
+                self.lbl_estado.setText(f"Error de indice: {e}")
+                return
+        self.ventana_busqueda.show()
+        self.ventana_busqueda.raise_()
+
+    def actualizar_grafica(self, muestras, filtradas, llegada):
+        self.buffer_ecg.escribir(filtradas)
+        if metricas:
+            metricas.observar("llegada->GUI", time.perf_counter() - llegada)
+            metricas.contar("señales atendidas")
+            if self.llegada_sin_dibujar is None:
+                self.llegada_sin_dibujar = llegada
         
-        self.escribir_log("ECG", "Muestra", f"{valor:.2f}")
+        self.escribir_log("ECG", "Muestra", muestras)
+
+    def refrescar_grafica(self):
+        # Solo se redibuja si llegaron muestras (en modo "proceso" las escribe otro proceso)
+        total = self.buffer_ecg.total
+        if total == self.total_dibujado or self.grafica is None:
+            return
+        self.total_dibujado = total
+
+        inicio = time.perf_counter()
+        self.grafica.dibujar(self.buffer_ecg.vista_barrido(self.y_pantalla, HUECO_BARRIDO))
+        if metricas:
+            fin = time.perf_counter()
+            metricas.observar("dibujo", fin - inicio)
+            metricas.contar("cuadros")
+            if self.llegada_sin_dibujar is not None:
+                metricas.observar("llegada->dibujo", fin - self.llegada_sin_dibujar)
+                self.llegada_sin_dibujar = None
+            elif ARQUITECTURA == "proceso":
+                # El proceso de analisis solo deja el instante de su ultima escritura
+                metricas.observar("escritura->dibujo", fin - self.buffer_ecg.instante)
+
+    def mostrar_hr(self, hr, origen, cambio):
+        self.lbl_hr.valor_label.setText(str(hr))
+        if cambio:
+            self.lbl_hr.unidad_label.setText(f"BPM ({origen})" if origen else "BPM")
+
+    def actualizar_latido(self, hr):
+        self.pantalla_hr.latido(hr)
 
     def actualizar_stats(self, spo2, hr):
+        if metricas:
+            metricas.contar("stats")
         self.lbl_spo2.valor_label.setText(str(spo2))
-        self.lbl_hr.valor_label.setText(str(hr))
-        
-        if spo2 < 90 and spo2 > 0:
-            self.lbl_spo2.setStyleSheet("border: 2px solid red; background-color: #330000; margin: 10px;")
-            if not self.alarma_activa:
-                self.escribir_log("ALARMA", "HIPOXIA DETECTADA", str(spo2))
-                self.alarma_activa = True
-        else:
-            self.lbl_spo2.setStyleSheet("border: 2px solid #3399FF; background-color: #1E1E1E; margin: 10px;")
-            if self.alarma_activa:
-                 self.escribir_log("INFO", "NIVEL O2 NORMALIZADO", str(spo2))
-                 self.alarma_activa = False
-            
+        self.pantalla_hr.oximetro(hr)
         self.escribir_log("VITALES", "SPO2/HR", f"{spo2}/{hr}")
 
+    def actualizar_alarmas(self, transiciones):
+        """Solo llegan cambios de estado: se registran y se repinta lo que cambio"""
+        for t in transiciones:
+            self.escribir_log(t.tipo, t.detalle, t.valor)
+        cambios = self.alarmas_activas.aplicar(transiciones)
+        paneles = {"spo2": self.lbl_spo2, "hr": self.lbl_hr}
+        for parametro in cambios & paneles.keys():
+            panel = paneles[parametro]
+            panel.setStyleSheet(estilo_panel(panel.color, parametro in self.alarmas_activas.parametros))
+        self.lbl_alarma.setText(self.alarmas_activas.texto)
+
+    def instantaneas_metricas(self):
+        instantaneas = {"gui": metricas.instantanea()}
+        if getattr(self.worker, "metricas", None):
+            instantaneas["analisis"] = self.worker.metricas
+        return instantaneas
+
+    def actualizar_metricas(self):
+        instantaneas = self.instantaneas_metricas()
+        contadores = instantaneas["gui"]["contadores"]
+        if "señales emitidas" in contadores:
+            en_cola = contadores["señales emitidas"]["total"] - contadores.get("señales atendidas", {"total": 0})["total"]
+            instantaneas["gui"]["medidores"]["señales en cola"] = en_cola
+        self.lbl_metricas.setText("\n".join(f"[{origen}]\n{formatear(i)}" for origen, i in instantaneas.items()))
+
+    def volcar_metricas(self):
+        path = f"metricas_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        try:
+            volcar(path, self.instantaneas_metricas())
+            self.lbl_estado.setText(f"Metricas: {path}")
+        except OSError as e:
+            self.lbl_estado.setText(f"Error Disco: {e}")
+
     def closeEvent(self, event):
-        if self.file_handle:
+        if self.escritor:
             self.escribir_log("SISTEMA", "CIERRE DE APLICACION", "")
-            self.file_handle.close()
+            self.escritor.cerrar()
+            if ARQUITECTURA != "proceso":
+                self.indexador.indexar(self.archivo_actual)  # En modo "proceso" llega con sig_cerrado en stop()
+        self.timer_grafica.stop()  # En modo "proceso" el buffer compartido se libera en stop()
         self.worker.stop()
+        self.indexador.esperar()
         event.accept()
 
 if __name__ == "__main__":
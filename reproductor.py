@@ -0,0 +1,164 @@
+import sys
+import time
+import heapq
+import socket
+import argparse
+import numpy as np
+
+from lector_sesion import abrir_sesion
+from protocolo import codificar_binaria
+from sintetico import ecg_sintetico
+
+# --- REPRODUCTOR DE SESIONES POR UDP ---
+# Uso: python reproductor.py [Historial_*.txt | registro_*.txt | *.ecgb | sintetico[:lpm] ...]
+#                            [--velocidad 1] [--dispositivos 1] [--lineas 20] [--duracion S] [--binario]
+# Envia sesiones grabadas (o ECG sintetico) al puerto del monitor como lo haria el puente
+# UART-UDP: lineas "<valor>\n" y "S:spo2,hr\n" en el orden y con los tiempos originales.
+# --velocidad 1 = tiempo real, N = N veces mas rapido, 0 = tan rapido como se pueda.
+# Cada dispositivo simulado usa su propio socket (puerto de origen distinto; en el monitor
+# multiple usar MONITOR_DEMUX=puerto) y recorre las fuentes en orden circular.
+# Tambien es el generador de carga de bench_ingesta.py.
+FS_SINTETICO = 500
+SEGUNDOS_SINTETICO = 60
+LINEAS_DATAGRAMA = 20
+
+
+def cargar_fuente(nombre, fs=FS_SINTETICO, segundos=SEGUNDOS_SINTETICO):
+    """Sesion grabada o 'sintetico[:lpm]' -> (muestras, t de cada muestra, stats [t, spo2, hr])"""
+    if nombre.startswith("sintetico"):
+        lpm = float(nombre.split(":", 1)[1]) if ":" in nombre else 72.0
+        n = int(fs * segundos)
+        t = np.arange(n) / fs
+        stats = np.column_stack((np.arange(0, segundos, 1.0), np.full(int(np.ceil(segundos)), 97),
+                                 np.full(int(np.ceil(segundos)), round(lpm))))
+        return ecg_sintetico(n, fs, lpm), t, stats
+    lector = abrir_sesion(nombre)
+    try:
+        muestras = lector.muestras(0, lector.n_muestras)
+        t = lector.tiempo_de(np.arange(lector.n_muestras))
+        stats = lector.stats
+    finally:
+        lector.cerrar()
+    return muestras, t, stats
+
+
+def generar_datagramas(muestras, t, stats, lineas=LINEAS_DATAGRAMA, binario=False):
+    """Trocea la sesion en datagramas -> [(t de envio, bytes, n muestras)]; los S: van en su hueco"""
+    enteros = np.clip(np.round(muestras), 0, 65535).astype(np.int64)
+    cortes = np.arange(0, len(enteros), lineas)
+    t_corte = t[np.minimum(cortes + lineas - 1, len(t) - 1)] if len(t) else np.zeros(0)
+    # Cada lectura del oximetro va en el primer datagrama que sale despues de ella
+    destino_stats = np.searchsorted(t_corte, stats[:, 0]) if len(stats) else np.zeros(0, np.int64)
+    por_datagrama = {}
+    for k, (spo2, hr) in zip(destino_stats.tolist(), stats[:, 1:].astype(int).tolist()):
+        por_datagrama.setdefault(min(k, len(cortes) - 1), []).append((spo2, hr))
+
+    datagramas = []
+    for k, i in enumerate(cortes.tolist()):
+        bloque = enteros[i:i + lineas]
+        vitales = por_datagrama.get(k, ())
+        if binario:
+            datos = codificar_binaria(k & 0xFFFF, i, bloque, vitales)
+        else:
+            datos = "".join(f"{v}\n" for v in bloque.tolist()).encode()
+            datos += "".join(f"S:{spo2},{hr}\n" for spo2, hr in vitales).encode()
+        datagramas.append((float(t_corte[k]), datos, len(bloque)))
+    return datagramas
+
+
+class Reproductor:
+    """Envia las fuentes por UDP simulando 'dispositivos' puentes a la vez"""
+
+    def __init__(self, fuentes, ip="127.0.0.1", puerto=3333, dispositivos=1, velocidad=1.0,
+                 lineas=LINEAS_DATAGRAMA, binario=False):
+        self.destino = (ip, puerto)
+        self.velocidad = velocidad
+        cargadas = [cargar_fuente(f) for f in fuentes]
+        self.sesiones = [generar_datagramas(*c, lineas=lineas, binario=binario) for c in cargadas]
+        self.sesiones = [s for s in self.sesiones if s]
+        if not self.sesiones:
+            raise ValueError("Ninguna fuente tiene muestras ECG")
+        self.socks = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(dispositivos)]
+        self.muestras = 0
+        self.datagramas = 0
+        self.errores = 0
+        self.activo = True
+
+    def _agenda(self, duracion):
+        """(t, dispositivo, datagrama) en orden de envio; cada sesion se repite hasta 'duracion'"""
+        def recorrido(d):
+            sesion = self.sesiones[d % len(self.sesiones)]
+            periodo = sesion[-1][0] + (sesion[-1][0] - sesion[0][0]) / max(1, len(sesion) - 1)
+            vuelta = 0
+            while True:
+                for t, datos, n in sesion:
+                    t_envio = t - sesion[0][0] + vuelta * periodo
+                    if duracion is not None and t_envio >= duracion:
+                        return
+                    yield t_envio, d, datos, n
+                vuelta += 1
+                if duracion is None:
+                    return
+        return heapq.merge(*(recorrido(d) for d in range(len(self.socks))), key=lambda x: x[0])
+
+    def ejecutar(self, duracion=None):
+        """Envia hasta agotar las sesiones (o durante 'duracion' s de sesion) y devuelve un resumen"""
+        inicio = time.perf_counter()
+        for t, d, datos, n in self._agenda(duracion):
+            if not self.activo:
+                break
+            if self.velocidad > 0:
+                espera = inicio + t / self.velocidad - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+            try:
+                self.socks[d].sendto(datos, self.destino)
+                self.datagramas += 1
+                self.muestras += n
+            except OSError:
+                self.errores += 1  # Buffer de envio lleno (solo a velocidad maxima)
+        segundos = time.perf_counter() - inicio
+        return {"muestras": self.muestras, "datagramas": self.datagramas, "errores": self.errores,
+                "segundos": segundos, "muestras_s": self.muestras / max(segundos, 1e-9)}
+
+    def detener(self):
+        """Termina ejecutar() (llamado desde otro hilo) tras el datagrama en curso"""
+        self.activo = False
+
+    def cerrar(self):
+        for s in self.socks:
+            s.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduce sesiones ECG por UDP como uno o varios puentes UART-UDP")
+    parser.add_argument("fuentes", nargs="*", default=["sintetico"],
+                        help="Historiales .txt/.ecgb o sintetico[:lpm] (por defecto sintetico)")
+    parser.add_argument("--ip", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=3333)
+    parser.add_argument("--velocidad", type=float, default=1.0, help="1 = tiempo real, N = N veces, 0 = maxima")
+    parser.add_argument("--dispositivos", type=int, default=1, help="Puentes simulados (un socket cada uno)")
+    parser.add_argument("--lineas", type=int, default=LINEAS_DATAGRAMA, help="Muestras ECG por datagrama")
+    parser.add_argument("--duracion", type=float, help="Segundos de sesion a enviar, repitiendo las fuentes")
+    parser.add_argument("--binario", action="store_true", help="Tramas binarias con secuencia (MODO_TRAMA = 2)")
+    args = parser.parse_args()
+
+    try:
+        reproductor = Reproductor(args.fuentes, args.ip, args.puerto, args.dispositivos, args.velocidad,
+                                  args.lineas, args.binario)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    try:
+        r = reproductor.ejecutar(args.duracion)
+    except KeyboardInterrupt:
+        r = None
+    finally:
+        reproductor.cerrar()
+    if r:
+        print(f"Enviadas {r['muestras']} muestras en {r['datagramas']} datagramas, {r['segundos']:.1f} s "
+              f"({r['muestras_s']:.0f} muestras/s, {r['errores']} errores de envio)")
+
+
+if __name__ == "__main__":
+    main()
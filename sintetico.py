@@ -0,0 +1,24 @@
+import numpy as np
+
+# Onda PQRST aproximada como suma de gaussianas: (posicion en el latido [0-1], amplitud ADC, ancho)
+ONDAS_PQRST = (
+    (0.16, 120.0, 0.025),   # P
+    (0.25, -150.0, 0.008),  # Q
+    (0.27, 1400.0, 0.010),  # R
+    (0.29, -300.0, 0.008),  # S
+    (0.55, 300.0, 0.040),   # T
+)
+LINEA_BASE = 1950.0  # Valor tipico del ADC en reposo (ver Historial_*.txt)
+
+
+def ecg_sintetico(n, fs=500, bpm=75, inicio=0, ruido=8.0, rng=None):
+    """Genera n muestras de ECG tipo ADC de 12 bits a partir de la muestra 'inicio'"""
+    t = (np.arange(inicio, inicio + n) / fs) * (bpm / 60.0)
+    fase = t - np.floor(t)
+    y = np.full(n, LINEA_BASE)
+    for centro, amplitud, ancho in ONDAS_PQRST:
+        y += amplitud * np.exp(-0.5 * ((fase - centro) / ancho) ** 2)
+    if ruido:
+        rng = rng if rng is not None else np.random.default_rng()
+        y += rng.normal(0.0, ruido, n)
+    return np.clip(y, 0, 4095).astype(np.float32)
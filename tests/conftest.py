@@ -0,0 +1,32 @@
+import os
+import sys
+import datetime
+
+import pytest
+
+# Los modulos del monitor estan en la raiz del repositorio, sin paquete
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+INICIO = datetime.datetime(2025, 12, 18, 9, 30, 0)
+
+
+@pytest.fixture
+def escribir_historial():
+    """Escribe un Historial_*.txt como el de registro+eventos.py: ECG con vitales cada segundo y eventos"""
+
+    def escribir(path, muestras, fs=500, paciente="Ana Ruiz", inicio=INICIO, eventos=()):
+        """eventos: [(indice de muestra, tipo, detalle, valor)], se escriben tras esa muestra"""
+        eventos = {i: (tipo, detalle, valor) for i, tipo, detalle, valor in eventos}
+        lineas = ["=== LOG DE SISTEMA DE TELEMETRIA ===", f"PACIENTE: {paciente} | EDAD: 54",
+                  f"INICIO SESION: {inicio}", "====================================", "TIMESTAMP,TIPO,DETALLE,VALOR"]
+        for i, v in enumerate(muestras):
+            hora = (inicio + datetime.timedelta(seconds=i / fs)).strftime("%H:%M:%S.%f")[:-3]
+            lineas.append(f"{hora},ECG,Muestra,{v:.2f}")
+            if i % fs == fs - 1:
+                lineas.append(f"{hora},VITALES,SPO2/HR,{95 + i // fs}/7{i // fs}")
+            if i in eventos:
+                lineas.append(f"{hora},{','.join(eventos[i])}")
+        path.write_text("\n".join(lineas) + "\n", encoding="utf-8")
+        return path
+
+    return escribir
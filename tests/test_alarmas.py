@@ -0,0 +1,74 @@
+import numpy as np
+
+from alarmas import MotorAlarmas, ReglaUmbral, ReglaSinDatos, OrigenHR
+
+
+def test_umbral_exige_duracion():
+    regla = ReglaUmbral("hipoxia", "spo2", bajo=90, duracion=5)
+    assert regla.evaluar(85, 0.0) is None
+    assert regla.evaluar(85, 4.9) is None
+    transicion = regla.evaluar(85, 5.0)
+    assert transicion.activa and transicion.tipo == "ALARMA" and transicion.valor == "85"
+
+
+def test_umbral_interrupcion_reinicia_la_cuenta():
+    regla = ReglaUmbral("hipoxia", "spo2", bajo=90, duracion=5)
+    regla.evaluar(85, 0.0)
+    regla.evaluar(95, 3.0)
+    assert regla.evaluar(85, 6.0) is None
+    assert regla.evaluar(85, 11.0).activa
+
+
+def test_umbral_histeresis():
+    regla = ReglaUmbral("hipoxia", "spo2", bajo=90, histeresis=2)
+    assert regla.evaluar(89, 0.0).activa
+    # Volver justo al limite no normaliza: hay que pasar 'histeresis' por dentro
+    assert regla.evaluar(90, 1.0) is None
+    assert regla.evaluar(91, 2.0) is None
+    transicion = regla.evaluar(92, 3.0)
+    assert not transicion.activa and transicion.tipo == "INFO"
+
+
+def test_umbral_ignora_sin_lectura():
+    regla = ReglaUmbral("hipoxia", "spo2", bajo=90)
+    assert regla.evaluar(0, 0.0) is None and not regla.activa
+
+
+def test_sin_datos_solo_tras_recibir():
+    regla = ReglaSinDatos("sin_datos", timeout=3)
+    assert regla.revisar(100.0) is None
+    regla.recibido(0.0)
+    assert regla.revisar(2.9) is None
+    assert regla.revisar(3.0).activa
+    assert not regla.recibido(4.0).activa
+
+
+def test_motor_defecto():
+    motor = MotorAlarmas()
+    ecg = np.array([2000.0, 2400.0])
+    transiciones = []
+    for t in range(12):
+        transiciones += motor.procesar(ecg, [(85, 70)], ahora=float(t))
+    assert [(x.nombre, x.activa) for x in transiciones] == [("hipoxia", True)]
+    assert motor.activas == ["hipoxia"]
+    assert [x.nombre for x in motor.revisar(20.0)] == ["sin_datos"]
+
+
+def test_motor_prefiere_la_fc_del_ecg_mientras_no_caduque():
+    motor = MotorAlarmas()
+    # El ECG da 70 lpm y el oximetro 30: manda el ECG
+    for t in range(8):
+        assert motor.procesar(stats=[(97, 30)], frecuencias=[70.0], ahora=float(t)) == []
+    # Sin latidos del ECG, a los 5 s vuelve a contar la FC del oximetro
+    transiciones = []
+    for t in range(8, 20):
+        transiciones += [(t, x) for x in motor.procesar(stats=[(97, 30)], ahora=float(t))]
+    # Ultimo latido en t=7: el oximetro cuenta desde t=13 y la alarma salta tras 'duracion' (5 s)
+    assert [(t, x.nombre, x.activa, x.valor) for t, x in transiciones] == [(18, "bradicardia", True, "30")]
+
+
+def test_origen_hr():
+    origen = OrigenHR(caducidad=5)
+    assert not origen.ecg(0.0)
+    origen.latido(1.0)
+    assert origen.ecg(6.0) and not origen.ecg(6.1)
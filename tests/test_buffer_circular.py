@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from buffer_circular import BufferCircular, BufferCompartido, EntradaBarrido
+
+
+def test_escritura_con_vuelta():
+    buf = BufferCircular(5, dtype=np.float64)
+    buf.escribir(np.arange(3.0))
+    buf.escribir(np.arange(3.0, 7.0))
+    assert buf.total == 7 and buf.indice == 2
+    assert buf.datos.tolist() == [5, 6, 2, 3, 4]
+    assert buf.ultimos(4).tolist() == [3, 4, 5, 6]
+    assert buf.ultimos(10).tolist() == [2, 3, 4, 5, 6]
+
+
+def test_bloque_mayor_que_la_capacidad():
+    buf = BufferCircular(4, dtype=np.float64)
+    buf.escribir(np.array([1.0]))
+    buf.escribir(np.arange(10.0, 20.0))
+    assert buf.total == 11 and buf.indice == 3
+    assert buf.ultimos(4).tolist() == [16, 17, 18, 19]
+
+
+def test_igual_a_escribir_muestra_a_muestra():
+    rng = np.random.default_rng(0)
+    buf, referencia = BufferCircular(37, dtype=np.float64), BufferCircular(37, dtype=np.float64)
+    for n in rng.integers(0, 60, 50):
+        bloque = rng.normal(size=n)
+        buf.escribir(bloque)
+        for v in bloque:
+            referencia.escribir(np.array([v]))
+        assert np.array_equal(buf.datos, referencia.datos)
+        assert buf.indice == referencia.indice
+
+
+def test_vista_barrido_deja_hueco_tras_el_cursor():
+    buf = BufferCircular(6, dtype=np.float64)
+    buf.escribir(np.arange(1.0, 11.0))  # Cursor en 4
+    destino = np.empty(6)
+    buf.vista_barrido(destino, hueco=3)
+    assert np.isnan(destino[[4, 5, 0]]).all()
+    assert destino[[1, 2, 3]].tolist() == [8, 9, 10]
+
+
+def test_compartido_se_ve_desde_otra_conexion():
+    try:
+        escritor = BufferCompartido(8)
+    except OSError:
+        pytest.skip("Sin memoria compartida en este sistema")
+    lector = BufferCompartido(8, nombre=escritor.nombre)
+    try:
+        escritor.escribir(np.arange(11, dtype=np.float32))
+        assert (lector.total, lector.indice) == (11, 3)
+        assert lector.ultimos(3).tolist() == [8, 9, 10]
+        assert escritor.control[0] % 2 == 0  # Secuencia par: no hay escritura en curso
+        destino = np.empty(8, np.float32)
+        assert lector.vista_barrido(destino)[2] == 10
+    finally:
+        lector.cerrar()
+        escritor.cerrar()
+
+
+def test_compartido_no_entrega_copias_a_medio_escribir():
+    try:
+        buf = BufferCompartido(8)
+    except OSError:
+        pytest.skip("Sin memoria compartida en este sistema")
+    try:
+        buf.escribir(np.arange(8, dtype=np.float32))
+        destino = np.empty(8, np.float32)
+        buf.vista_barrido(destino)
+        anterior = destino.copy()
+
+        buf.control[0] += 1   # El escritor se queda a mitad de un bloque
+        buf.datos[:4] = -1
+        assert np.array_equal(buf.vista_barrido(destino, intentos=3), anterior)
+        assert buf.ultimos(4, intentos=3) is None
+        assert buf.lecturas_fallidas == 2
+
+        buf.control[0] += 1   # Termina: la siguiente lectura ya ve el bloque nuevo
+        assert buf.vista_barrido(destino)[0] == -1
+    finally:
+        buf.cerrar()
+
+
+def test_entrada_barrido_cambia_a_filtrado_al_empezar_barrido():
+    dsp_modulo = pytest.importorskip("dsp")
+    fs = 500
+    senal = 1500 + 300 * np.sin(2 * np.pi * 1.2 * np.arange(6 * fs) / fs)
+    entrada = EntradaBarrido(1000)
+    bloques = np.split(senal, 60)   # 50 muestras por datagrama
+
+    # Sin DSP (scipy cargando) pasa la señal cruda
+    for bloque in bloques[:25]:
+        assert entrada.procesar(None, bloque)[0] is bloque
+
+    # El DSP llega a mitad del segundo barrido: se asienta con lo recibido y sigue crudo hasta la muestra 2000
+    dsp = dsp_modulo.ProcesadorDSP(fs, desplazamiento=2048)
+    salida = np.concatenate([entrada.procesar(dsp, bloque)[0] for bloque in bloques[25:]])
+    assert dsp.detector.total == 1000 + len(senal) - 1250   # Se guarda un barrido de señal cruda
+    assert np.array_equal(salida[:2000 - 1250], senal[1250:2000])
+    filtrada = salida[2000 - 1250:]
+    assert abs(np.median(filtrada) - 2048) < 50   # Sin la linea base cruda ni el transitorio de arranque
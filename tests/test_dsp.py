@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+import dsp
+from dsp import ProcesadorDSP
+from sintetico import ecg_sintetico
+
+FS = 500
+BPM = 75
+PERIODO = FS * 60 // BPM    # 400 muestras por latido
+PRIMERA_R = 108             # Onda R en la fase 0.27 del latido de ecg_sintetico
+RETARDO_MAX = 10            # Muestras (20 ms) de retardo de grupo de los filtros sobre la R
+
+
+def desfases(latidos):
+    """Distancia (muestras) de cada R detectada a la R real mas cercana"""
+    indices = np.array([i for i, _ in latidos])
+    return (indices - PRIMERA_R + PERIODO // 2) % PERIODO - PERIODO // 2
+
+
+class Reloj:
+    """time.monotonic() controlado por el test"""
+
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+
+def test_estimacion_no_filtra_dos_veces_el_ultimo_bloque(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(dsp.time, "monotonic", reloj)
+    procesador = ProcesadorDSP()
+    llamadas = []
+    procesar_filtro = dsp.FiltroECG.procesar
+    monkeypatch.setattr(dsp.FiltroECG, "procesar",
+                        lambda self, x: llamadas.append(len(x)) or procesar_filtro(self, x))
+
+    for n in (5, 5):
+        salida, _ = procesador.procesar(np.full(n, 2000.0))
+        assert not procesador.filtrando and len(salida) == n
+        reloj.ahora += 1.0
+    reloj.ahora = dsp.ESTIMACION_FS
+    procesador.procesar(np.full(7, 2000.0))
+
+    assert procesador.filtrando
+    assert llamadas == [10, 7]
+    assert procesador.detector.total == 17
+
+
+def test_fc_e_indices_r_en_ecg_sintetico():
+    senal = ecg_sintetico(10 * FS, fs=FS, bpm=BPM, rng=np.random.default_rng(1))
+    procesador = ProcesadorDSP(FS)
+    latidos = []
+    for bloque in np.array_split(senal, 10 * FS // 37):
+        _, nuevos = procesador.procesar(bloque)
+        latidos += nuevos
+
+    assert procesador.detector.total == len(senal)
+    # Tras el aprendizaje se detectan todos los latidos, cada uno en su R con el mismo retardo
+    assert len(latidos) >= 5
+    assert np.all(np.diff([i for i, _ in latidos]) == PERIODO)
+    assert 0 <= desfases(latidos).min() and desfases(latidos).max() <= RETARDO_MAX
+    frecuencias = [hr for _, hr in latidos if hr]
+    assert frecuencias and all(hr == pytest.approx(BPM, abs=1) for hr in frecuencias)
+    assert procesador.hr == pytest.approx(BPM, abs=1)
+
+
+def test_indices_r_con_frecuencia_estimada(monkeypatch):
+    # Mismo ECG entregado en tiempo real: las R deben caer igual que con fs fija
+    reloj = Reloj()
+    monkeypatch.setattr(dsp.time, "monotonic", reloj)
+    senal = ecg_sintetico(10 * FS, fs=FS, bpm=BPM, rng=np.random.default_rng(2))
+    procesador = ProcesadorDSP()
+    latidos = []
+    for bloque in np.array_split(senal, 10 * FS // 50):
+        _, nuevos = procesador.procesar(bloque)
+        latidos += nuevos
+        reloj.ahora += len(bloque) / FS
+
+    assert procesador.fs == pytest.approx(FS, rel=0.02)
+    assert procesador.detector.total == len(senal)
+    assert len(latidos) >= 5
+    assert 0 <= desfases(latidos).min() and desfases(latidos).max() <= RETARDO_MAX
@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+import escritor_sesion
+from escritor_sesion import EscritorSesion
+
+CABECERA = ["=== LOG DE SISTEMA DE TELEMETRIA ===", "PACIENTE: Iñigo Muñoz | EDAD: 61", "TIMESTAMP,TIPO,DETALLE,VALOR"]
+
+
+def lineas_ecg(path):
+    return [l for l in path.read_text(encoding="utf-8").splitlines() if ",ECG," in l]
+
+
+def test_escribe_todo_y_cuenta_bytes_reales(tmp_path):
+    path = tmp_path / "Historial_a.txt"
+    escritor = EscritorSesion(str(path), CABECERA, intervalo=0.05)
+    escritor.start()
+    escritor.registrar("ECG", "Muestra", np.arange(1000.0))
+    escritor.registrar("ALARMA", "HIPOXIA DETECTADA", "88")
+    escritor.cerrar()
+    assert not escritor.is_alive() and escritor.file_handle.closed
+    assert len(lineas_ecg(path)) == 1000
+    assert path.read_text(encoding="utf-8").splitlines()[-1].endswith(",ALARMA,HIPOXIA DETECTADA,88")
+    # Bytes UTF-8 en disco, no caracteres ("ñ" ocupa dos)
+    assert escritor.bytes_escritos == path.stat().st_size
+    assert escritor.descartados == 0 and escritor.error is None
+
+
+def test_cola_llena_cuenta_muestras_descartadas(tmp_path):
+    escritor = EscritorSesion(str(tmp_path / "Historial_b.txt"), CABECERA, max_cola=1)
+    escritor.registrar("ECG", "Muestra", np.arange(5.0))       # Entra (el hilo aun no consume)
+    escritor.registrar("ECG", "Muestra", np.arange(7.0))       # Bloque ECG: 7 muestras perdidas
+    escritor.registrar("ECG", np.arange(3.0), "")              # Formato registro_*: bloque en 'detalle'
+    escritor.registrar("VITALES", "SPO2/HR", "97/60")          # Registro suelto: 1
+    assert escritor.descartados == 7 + 3 + 1
+    escritor.cerrar(timeout=1.0)
+
+
+def test_cerrar_no_espera_a_un_escritor_bloqueado(tmp_path, monkeypatch):
+    path = tmp_path / "Historial_c.txt"
+    disco = threading.Event()
+    volcar = EscritorSesion._volcar
+
+    def volcar_lento(self, pendientes, n_lineas):
+        disco.wait(5)   # Disco de red colgado
+        volcar(self, pendientes, n_lineas)
+
+    monkeypatch.setattr(EscritorSesion, "_volcar", volcar_lento)
+    escritor = EscritorSesion(str(path), CABECERA, max_cola=2, lote=1, intervalo=0.05)
+    escritor.start()
+    for i in range(4):
+        escritor.registrar("ECG", "Muestra", np.full(10, float(i)))
+        time.sleep(0.05)
+
+    inicio = time.monotonic()
+    escritor.cerrar(timeout=0.2)
+    assert time.monotonic() - inicio < 1.0
+    assert escritor.is_alive()
+
+    # Cuando el disco responde, el hilo vacia la cola y cierra el archivo por su cuenta
+    disco.set()
+    escritor.join(5)
+    assert not escritor.is_alive() and escritor.file_handle.closed
+    assert len(lineas_ecg(path)) + escritor.descartados == 40
+
+
+def test_cerrar_hace_flush_y_fsync(tmp_path, monkeypatch):
+    sincronizados = []
+    monkeypatch.setattr(escritor_sesion.os, "fsync", lambda fd: sincronizados.append(os.fstat(fd).st_size))
+    path = tmp_path / "Historial_d.txt"
+    escritor = EscritorSesion(str(path), CABECERA, intervalo=10.0)   # Sin flush por tiempo durante la prueba
+    escritor.start()
+    escritor.registrar("SISTEMA", "FIN DE GRABACION", "")
+    escritor.cerrar()
+    # El fsync llega con todo ya volcado al archivo
+    assert sincronizados == [path.stat().st_size]
+    assert path.read_text(encoding="utf-8").endswith(",SISTEMA,FIN DE GRABACION,\n")
+
+
+def test_cerrar_sin_arrancar_cierra_el_archivo(tmp_path):
+    path = tmp_path / "Historial_e.txt"
+    escritor = EscritorSesion(str(path), CABECERA)
+    escritor.cerrar(timeout=0)
+    assert escritor.file_handle.closed
+    assert path.read_text(encoding="utf-8").splitlines() == CABECERA
@@ -0,0 +1,66 @@
+import datetime
+
+import numpy as np
+
+from formato_binario import EscritorBinario, leer_binario, texto_a_binario, binario_a_texto
+from historial_texto import iterar_registros
+
+INICIO = datetime.datetime(2025, 12, 18, 9, 30, 0)
+
+
+def test_texto_a_binario_y_vuelta(tmp_path, escribir_historial):
+    muestras = np.round(2048 + 300 * np.sin(np.arange(1500) / 20))
+    txt, ecgb, vuelta = tmp_path / "Historial_a.txt", tmp_path / "a.ecgb", tmp_path / "Historial_b.txt"
+    escribir_historial(txt, muestras, eventos=[(750, "ALARMA", "HIPOXIA DETECTADA", "88")])
+
+    metadatos = texto_a_binario(str(txt), str(ecgb))
+    assert metadatos["dtype"] == "int16" and metadatos["paciente"] == "Ana Ruiz"
+    sesion = leer_binario(str(ecgb))
+    assert np.array_equal(sesion.ecg, muestras)
+    assert sesion.stats["spo2"].tolist() == [95, 96, 97]
+    assert [e[2:] for e in sesion.eventos] == [("ALARMA", "HIPOXIA DETECTADA", "88")]
+    # Cada evento queda anclado al numero de muestras ECG anteriores
+    assert sesion.eventos[0][0] == 751
+
+    binario_a_texto(str(ecgb), str(vuelta))
+    _, original = iterar_registros(str(txt))
+    _, convertido = iterar_registros(str(vuelta))
+    assert [(c, d) for _, c, d in original] == [(c, d) for _, c, d in convertido]
+
+
+def test_decimales_pasan_a_float32(tmp_path, escribir_historial):
+    txt, ecgb = tmp_path / "Historial_c.txt", tmp_path / "c.ecgb"
+    escribir_historial(txt, [2000.5, 2001.25, 1999.75])
+    assert texto_a_binario(str(txt), str(ecgb))["dtype"] == "float32"
+    assert leer_binario(str(ecgb)).ecg.tolist() == [2000.5, 2001.25, 1999.75]
+
+
+def test_escritor_binario(tmp_path):
+    path = tmp_path / "d.ecgb"
+    escritor = EscritorBinario(str(path), {"paciente": "X", "inicio": INICIO.isoformat(), "fs": 250, "dtype": "int16"})
+    escritor.start()
+    escritor.registrar("ECG", "Muestra", np.array([1.0, 2.0, 3.0]))
+    escritor.registrar("VITALES", "SPO2/HR", "97/61")
+    escritor.registrar("ECG", "Muestra", np.array([4.0]))
+    escritor.registrar("SISTEMA", "FIN DE GRABACION", "")
+    escritor.cerrar()
+    assert escritor.bytes_escritos == path.stat().st_size
+
+    sesion = leer_binario(str(path))
+    assert sesion.fs == 250
+    assert sesion.ecg.tolist() == [1, 2, 3, 4]
+    assert sesion.bloques["indice"].tolist() == [0, 3]
+    assert sesion.stats[["spo2", "hr"]].tolist() == [(97, 61)]
+    assert sesion.eventos[0][0] == 4 and sesion.eventos[0][2:] == ("SISTEMA", "FIN DE GRABACION", "")
+
+
+def test_archivo_cortado_conserva_lo_leido(tmp_path):
+    path = tmp_path / "e.ecgb"
+    escritor = EscritorBinario(str(path), {"paciente": "X", "dtype": "int16"})
+    escritor.start()
+    escritor.registrar("ECG", "Muestra", np.arange(10.0))
+    escritor.registrar("ECG", "Muestra", np.arange(10.0))
+    escritor.cerrar()
+    datos = path.read_bytes()
+    path.write_bytes(datos[:-25])  # Corte de luz a mitad del ultimo bloque de cabecera
+    assert len(leer_binario(str(path)).ecg) == 10
@@ -0,0 +1,140 @@
+import types
+
+import numpy as np
+import pytest
+
+import grabador
+from grabador import Grabador
+from indice_sesiones import IndiceSesiones
+from protocolo import Reensamblador
+
+ORIGEN = "192.168.1.50"
+
+
+class Reloj:
+    """Sustituye al modulo time de grabador: la rotacion por tiempo sin esperar"""
+
+    def __init__(self):
+        self.ahora = 0.0
+
+    def monotonic(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(grabador, "time", types.SimpleNamespace(monotonic=reloj.monotonic))
+    return reloj
+
+
+@pytest.fixture
+def crear(tmp_path):
+    creados = []
+
+    def crear(**kwargs):
+        kwargs.setdefault("indice", str(tmp_path / "sesiones.db"))
+        g = Grabador(str(tmp_path), ip="127.0.0.1", puerto=0, **kwargs)
+        g.receptor.enlaces[ORIGEN] = Reensamblador()   # Lo que haria el receptor al llegar el primer datagrama
+        creados.append(g)
+        return g
+
+    yield crear
+    for g in creados:
+        g.receptor.cerrar()
+
+
+def lote(n=10):
+    return {ORIGEN: (np.full(n, 2000.0), [(97, 70)])}
+
+
+def historiales(tmp_path):
+    return sorted(p.name for p in tmp_path.glob("Historial_*.txt"))
+
+
+def test_rota_por_tiempo(tmp_path, reloj, crear):
+    g = crear(rotar_segundos=60)
+    g.al_recibir(lote())
+    reloj.ahora = 59.0
+    g.al_recibir(lote())
+    reloj.ahora = 60.0
+    g.al_recibir(lote())
+    g.cerrar()
+
+    nombres = historiales(tmp_path)
+    assert [n[-8:] for n in nombres] == ["p001.txt", "p002.txt"]
+    primero, segundo = [(tmp_path / n).read_text() for n in nombres]
+    assert primero.count(",ECG,Muestra,") == 20 and "ROTACION DE ARCHIVO,2" in primero
+    assert segundo.count(",ECG,Muestra,") == 10 and "FIN DE GRABACION" in segundo
+    assert g.cerrando and not any(e.is_alive() for e in g.cerrando)
+
+
+def test_indexa_cada_parte_al_cerrarla(tmp_path, reloj, crear):
+    g = crear(rotar_segundos=60, paciente="Ana Ruiz")
+    g.al_recibir(lote())
+    reloj.ahora = 60.0
+    g.al_recibir(lote())
+    g.cerrar()
+    assert not g.hilo_indice.is_alive()
+
+    indice = IndiceSesiones(str(tmp_path / "sesiones.db"))
+    try:
+        sesiones = indice.buscar_sesiones("ana")
+    finally:
+        indice.cerrar()
+    assert sorted(s["path"] for s in sesiones) == [str(tmp_path / n) for n in historiales(tmp_path)]
+    assert all(s["dispositivo"] == ORIGEN and s["n_muestras"] == 10 for s in sesiones)
+
+
+def test_sin_indice(tmp_path, reloj, crear):
+    g = crear(indice=None)
+    g.al_recibir(lote())
+    g.cerrar()
+    assert not g.hilo_indice.is_alive() and not (tmp_path / "sesiones.db").exists()
+
+
+def test_rota_por_tamano(tmp_path, reloj, crear):
+    g = crear(rotar_bytes=1)   # La cabecera ya lo supera: cada lote abre una parte nueva
+    for _ in range(3):
+        g.al_recibir(lote())
+    g.cerrar()
+    assert len(historiales(tmp_path)) == 3
+
+
+def test_fallo_al_abrir_no_reintenta_en_cada_lote(tmp_path, reloj, crear, monkeypatch, capsys):
+    disco = {"lleno": True}
+    crear_escritor = grabador.crear_escritor
+
+    def crear_o_fallar(*args):
+        if disco["lleno"]:
+            raise OSError(28, "No space left on device")
+        return crear_escritor(*args)
+
+    monkeypatch.setattr(grabador, "crear_escritor", crear_o_fallar)
+    g = crear(rotar_segundos=60)
+    for t in range(0, 60, 10):
+        reloj.ahora = float(t)
+        g.al_recibir(lote())
+    assert capsys.readouterr().out.count("Error Disco") == 1
+    assert g.sesiones[ORIGEN].escritor is None and g.muestras == 0
+
+    disco["lleno"] = False
+    reloj.ahora = 60.0
+    g.al_recibir(lote())
+    g.cerrar()
+    assert [n[-8:] for n in historiales(tmp_path)] == ["p001.txt"]
+
+
+def test_fallo_al_rotar_sigue_con_el_archivo_anterior(tmp_path, reloj, crear, monkeypatch, capsys):
+    g = crear(rotar_segundos=60)
+    g.al_recibir(lote())
+    monkeypatch.setattr(grabador, "crear_escritor", lambda *args: (_ for _ in ()).throw(OSError("solo lectura")))
+    for t in (60.0, 61.0, 100.0):
+        reloj.ahora = t
+        g.al_recibir(lote())
+    assert capsys.readouterr().out.count("Error Disco") == 1
+    g.cerrar()
+
+    nombres = historiales(tmp_path)
+    assert len(nombres) == 1
+    assert (tmp_path / nombres[0]).read_text().count(",ECG,Muestra,") == 40
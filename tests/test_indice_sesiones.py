@@ -0,0 +1,71 @@
+import datetime
+import os
+
+import numpy as np
+import pytest
+
+from indice_sesiones import IndiceSesiones
+
+ECG = np.full(1000, 2048.0)
+
+
+@pytest.fixture
+def carpeta(tmp_path, escribir_historial):
+    escribir_historial(tmp_path / "Historial_ana_1.txt", ECG, paciente="Ana Ruiz",
+                       inicio=datetime.datetime(2025, 12, 1, 8, 0),
+                       eventos=[(500, "ALARMA", "HIPOXIA DETECTADA", "86")])
+    escribir_historial(tmp_path / "Historial_ana_2.txt", ECG, paciente="Ana Ruiz",
+                       inicio=datetime.datetime(2025, 12, 15, 23, 59, 59),
+                       eventos=[(100, "ALARMA", "TAQUICARDIA", "160"), (900, "INFO", "FC NORMALIZADA", "120")])
+    escribir_historial(tmp_path / "Historial_luis.txt", ECG, paciente="Luis Gil",
+                       inicio=datetime.datetime(2025, 12, 10, 12, 0),
+                       eventos=[(10, "ALARMA", "HIPOXIA DETECTADA", "88")])
+    (tmp_path / "otro.txt").write_text("no es un historial\n")
+    return tmp_path
+
+
+@pytest.fixture
+def indice(tmp_path):
+    indice = IndiceSesiones(str(tmp_path / "sesiones.db"))
+    yield indice
+    indice.cerrar()
+
+
+def test_actualizar_es_incremental(carpeta, indice):
+    assert indice.actualizar(str(carpeta)) == (3, 0)
+    assert indice.actualizar(str(carpeta)) == (0, 0)
+    os.remove(carpeta / "Historial_luis.txt")
+    assert indice.actualizar(str(carpeta)) == (0, 1)
+    assert indice.pacientes() == ["Ana Ruiz"]
+
+
+def test_buscar_sesiones(carpeta, indice):
+    indice.actualizar(str(carpeta))
+    assert len(indice.buscar_sesiones()) == 3
+    ana = indice.buscar_sesiones("ana")
+    assert [os.path.basename(s["path"]) for s in ana] == ["Historial_ana_1.txt", "Historial_ana_2.txt"]
+    assert ana[0]["n_muestras"] == len(ECG)
+    # Una fecha sola cubre el dia entero; la sesion que cruza medianoche tambien se solapa con el dia 16
+    assert [s["paciente"] for s in indice.buscar_sesiones(desde="2025-12-10", hasta="2025-12-10")] == ["Luis Gil"]
+    assert len(indice.buscar_sesiones(desde=datetime.date(2025, 12, 16))) == 1
+
+
+def test_buscar_eventos(carpeta, indice):
+    indice.actualizar(str(carpeta))
+    hipoxias = indice.buscar_eventos(tipo="ALARMA", detalle="HIPOXIA")
+    assert [e["paciente"] for e in hipoxias] == ["Ana Ruiz", "Luis Gil"]
+    assert hipoxias[0]["instante"].startswith("2025-12-01 08:00:01")
+    assert [e["detalle"] for e in indice.buscar_eventos("ruiz", desde="2025-12-15 12:00")] == [
+        "TAQUICARDIA", "FC NORMALIZADA"]
+    # El evento tras medianoche lleva la fecha del dia siguiente
+    assert indice.buscar_eventos(tipo="INFO")[0]["instante"].startswith("2025-12-16")
+    assert indice.buscar_eventos(paciente="nadie") == []
+
+
+def test_reindexar_un_archivo_modificado(carpeta, indice, escribir_historial):
+    indice.actualizar(str(carpeta))
+    escribir_historial(carpeta / "Historial_luis.txt", ECG[:400], paciente="Luis Gil",
+                       inicio=datetime.datetime(2025, 12, 10, 12, 0))
+    assert indice.actualizar(str(carpeta)) == (1, 0)
+    assert indice.buscar_eventos("luis") == []
+    assert indice.buscar_sesiones("luis")[0]["n_muestras"] == 400
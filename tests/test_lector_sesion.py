@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+import lector_sesion
+from lector_sesion import LectorTexto, abrir_sesion
+from historial_texto import iterar_registros
+
+FS = 500
+
+
+@pytest.fixture
+def historial(tmp_path, escribir_historial, monkeypatch):
+    # Tramos pequeños para que las ventanas crucen varios puntos de control
+    monkeypatch.setattr(lector_sesion, "PASO", 64)
+    muestras = np.round(2048 + 400 * np.sin(np.arange(3000) / 15))
+    path = escribir_historial(tmp_path / "Historial_lector.txt", muestras, fs=FS,
+                              eventos=[(1200, "ALARMA", "HIPOXIA DETECTADA", "87"),
+                                       (2400, "INFO", "NIVEL O2 NORMALIZADO", "93")])
+    return path
+
+
+def referencia(path):
+    """Parseo linea a linea de historial_texto: (segundos desde el inicio, valor) de cada muestra ECG"""
+    cabecera, registros = iterar_registros(str(path))
+    pares = [((t - cabecera["inicio"]).total_seconds(), dato) for t, clase, dato in registros if clase == "ECG"]
+    return np.array(pares)
+
+
+@pytest.mark.parametrize("t0, t1", [(0.0, 0.5), (1.234, 1.9), (2.5, 5.9), (5.5, 10.0), (0.0, 6.0)])
+def test_ventanas_como_la_referencia(historial, t0, t1):
+    ref = referencia(historial)
+    lector = LectorTexto(str(historial))
+    try:
+        assert lector.n_muestras == len(ref)
+        t, y = lector.ventana(t0, t1)
+        i0 = int(np.floor(lector.indice_de(t0)))
+        assert np.array_equal(y, ref[i0:i0 + len(y), 1])
+        # Cubre todas las muestras del intervalo (y como mucho una mas a cada lado)
+        dentro = np.flatnonzero((ref[:, 0] >= t0) & (ref[:, 0] <= t1))
+        assert i0 <= dentro[0] and dentro[-1] < i0 + len(y) <= dentro[-1] + 3
+        assert np.allclose(t, ref[i0:i0 + len(y), 0], atol=2e-3)
+    finally:
+        lector.cerrar()
+
+
+def test_indice_en_disco_da_lo_mismo(historial):
+    primero = LectorTexto(str(historial))
+    esperado = primero.muestras(100, 2900)
+    primero.cerrar()
+    assert (historial.parent / (historial.name + ".idx.npz")).exists()
+
+    segundo = abrir_sesion(str(historial))
+    try:
+        assert np.array_equal(segundo.muestras(100, 2900), esperado)
+        assert segundo.metadatos["paciente"] == "Ana Ruiz"
+    finally:
+        segundo.cerrar()
+
+
+def test_eventos_y_stats(historial):
+    lector = LectorTexto(str(historial))
+    try:
+        assert [(tipo, detalle) for _, tipo, detalle, _ in lector.eventos] == [
+            ("ALARMA", "HIPOXIA DETECTADA"), ("INFO", "NIVEL O2 NORMALIZADO")]
+        assert lector.eventos[0][0] == pytest.approx(1200 / FS, abs=2e-3)
+        assert lector.stats[:, 1].tolist() == [95, 96, 97, 98, 99, 100]
+    finally:
+        lector.cerrar()
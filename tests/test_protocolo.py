@@ -0,0 +1,116 @@
+import struct
+
+import pytest
+
+from protocolo import (Reensamblador, parsear_datagrama, codificar_binaria, decodificar_binaria, MAGIA_TRAMA,
+                       TRAMA_TEXTO, TRAMA_BINARIA, FLAG_CONTINUA, CABECERA_TRAMA)
+
+
+def test_binaria_ida_y_vuelta():
+    trama = codificar_binaria(0, 0, [2000, 2010, 65535], [(97, 72)])
+    muestras, stats = decodificar_binaria(trama)
+    assert muestras.tolist() == [2000, 2010, 65535]
+    assert stats == [(97, 72)]
+
+
+@pytest.mark.parametrize("largo", range(CABECERA_TRAMA.size, 11))
+def test_binaria_cortada_se_descarta(largo):
+    # Con 8..10 bytes ya parece enmarcada pero no llega a la cabecera binaria completa
+    data = bytes([MAGIA_TRAMA, TRAMA_BINARIA]) + bytes(largo - 2)
+    enlace = Reensamblador()
+    muestras, stats = enlace.procesar([data])
+    assert len(muestras) == 0 and stats == []
+    assert enlace.malformados == 1
+
+
+def test_binaria_con_longitudes_incoherentes():
+    buena = codificar_binaria(0, 0, [1, 2, 3], [(95, 60)])
+    corta = buena[:-3]
+    larga = buena + b"\x00\x00"
+    enlace = Reensamblador()
+    muestras, stats = enlace.procesar([corta, larga, codificar_binaria(1, 3, [4, 5])])
+    assert muestras.tolist() == [4, 5]
+    assert stats == []
+    assert enlace.malformados == 2
+    with pytest.raises(ValueError):
+        decodificar_binaria(corta)
+    with pytest.raises(ValueError):
+        decodificar_binaria(larga)
+
+
+def test_binaria_n_muestras_enorme():
+    data = CABECERA_TRAMA.pack(MAGIA_TRAMA, TRAMA_BINARIA, 0, 0) + struct.pack("<HB", 0xFFFF, 0xFF) + bytes(4)
+    enlace = Reensamblador()
+    muestras, _ = enlace.procesar([data])
+    assert len(muestras) == 0 and enlace.malformados == 1
+
+
+def trama_texto(seq, lineas, cuerpo, continua=False):
+    tipo = TRAMA_TEXTO | (FLAG_CONTINUA if continua else 0)
+    return CABECERA_TRAMA.pack(MAGIA_TRAMA, tipo, seq, lineas) + cuerpo
+
+
+def test_parsear_datagrama_con_stats_y_linea_corrupta():
+    muestras, stats = parsear_datagrama(b"2000\nS:97,72\n2010\n20x4\n2020\n")
+    assert muestras.tolist() == [2000, 2010, 2020]
+    assert stats == [(97, 72)]
+
+
+def test_texto_plano_recompone_lineas_partidas():
+    enlace = Reensamblador()
+    muestras, stats = enlace.procesar([b"2000\n20", b"34\n2050\nS:9", b"8,70\n20"])
+    assert muestras.tolist() == [2000, 2034, 2050]
+    assert stats == [(98, 70)]
+    muestras, _ = enlace.procesar([b"60\n"])  # La linea partida tambien se une entre drenados
+    assert muestras.tolist() == [2060]
+    assert not enlace.enmarcado
+
+
+def test_enmarcado_texto_en_orden():
+    enlace = Reensamblador()
+    muestras, stats = enlace.procesar([trama_texto(0, 0, b"2000\n20"), trama_texto(1, 1, b"10\nS:97,72\n", True)])
+    assert muestras.tolist() == [2000, 2010]
+    assert stats == [(97, 72)]
+    assert (enlace.enmarcado, enlace.perdidos, enlace.truncados) == (True, 0, 0)
+
+
+def test_enmarcado_texto_con_hueco_descarta_la_linea_partida():
+    enlace = Reensamblador()
+    enlace.procesar([trama_texto(0, 0, b"2000\n20")])
+    # Se pierde la secuencia 1 (dos lineas); la 2 empieza a mitad de linea
+    muestras, _ = enlace.procesar([trama_texto(2, 4, b"55\n2060\n", True)])
+    assert muestras.tolist() == [2060]
+    assert enlace.perdidos == 1
+    assert enlace.muestras_perdidas == 3
+    assert enlace.truncados == 2  # La cola "20" pendiente y la cabeza "55" sin su principio
+
+
+def test_enmarcado_texto_desordenado_se_descarta():
+    enlace = Reensamblador()
+    enlace.procesar([trama_texto(0, 0, b"1\n"), trama_texto(2, 2, b"3\n")])
+    muestras, _ = enlace.procesar([trama_texto(1, 1, b"2\n")])
+    assert len(muestras) == 0
+    assert (enlace.perdidos, enlace.reordenados) == (1, 1)
+
+
+def test_reinicio_del_puente_no_cuenta_perdidas():
+    enlace = Reensamblador()
+    enlace.procesar([trama_texto(0, 0, b"1\n"), trama_texto(1, 1, b"2\n")])
+    muestras, _ = enlace.procesar([trama_texto(0, 0, b"7\n")])
+    assert muestras.tolist() == [7]
+    assert enlace.perdidos == 0
+
+
+def test_binaria_secuencia_y_perdidas():
+    enlace = Reensamblador()
+    muestras, stats = enlace.procesar([codificar_binaria(0, 0, [1, 2, 3]), codificar_binaria(1, 3, [4], [(96, 65)]),
+                                       codificar_binaria(3, 10, [9, 9])])
+    assert muestras.tolist() == [1, 2, 3, 4, 9, 9]
+    assert stats == [(96, 65)]
+    assert enlace.binario and enlace.perdidos == 1 and enlace.muestras_perdidas == 6
+
+
+def test_mezcla_de_texto_plano_y_binario_conserva_el_orden():
+    enlace = Reensamblador()
+    muestras, _ = enlace.procesar([b"10\n11\n", codificar_binaria(0, 0, [12, 13]), b"14\n"])
+    assert muestras.tolist() == [10, 11, 12, 13, 14]
@@ -0,0 +1,142 @@
+import os
+import sys
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLabel,
+                             QScrollBar, QComboBox, QListWidget, QListWidgetItem, QFileDialog)
+from PyQt5.QtCore import Qt
+
+from graficos import crear_grafica
+from lector_sesion import abrir_sesion
+
+BACKEND_GRAFICA = os.environ.get("MONITOR_GRAFICA", "pyqtgraph")
+PUNTOS_MAX = 4000          # Puntos maximos por curva (envolvente min/max por encima)
+RESOLUCION_BARRA = 10      # Pasos de la barra de desplazamiento por segundo
+ZOOMS = [("2 s", 2), ("10 s", 10), ("30 s", 30), ("1 min", 60), ("5 min", 300), ("30 min", 1800), ("Todo", None)]
+
+
+def formatear_tiempo(segundos):
+    h, resto = divmod(int(segundos), 3600)
+    m, s = divmod(resto, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}"
+
+
+class VentanaRevision(QMainWindow):
+    """Revision de una sesion grabada: vista general min/max + detalle desplazable"""
+
+    def __init__(self, path):
+        super().__init__()
+        self.lector = abrir_sesion(path)
+        self.setWindowTitle(f"Revision de Historial - {os.path.basename(path)}")
+        self.setGeometry(120, 120, 1100, 650)
+        self.setStyleSheet("background-color: #121212; color: #00FF00;")
+        self.ancho = ZOOMS[1][1]
+        self.initUI()
+        self.mostrar_resumen()
+        self.actualizar_detalle()
+
+    def initUI(self):
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        main_layout = QHBoxLayout(central_widget)
+        plot_layout = QVBoxLayout()
+
+        meta = self.lector.metadatos
+        info = QLabel(f"PACIENTE: {meta.get('paciente') or '-'} | EDAD: {meta.get('edad') or '-'} | "
+                      f"INICIO: {meta.get('inicio') or '-'} | DURACION: {formatear_tiempo(self.lector.duracion)}")
+        info.setStyleSheet("color: white; font-size: 12px;")
+        plot_layout.addWidget(info)
+
+        self.grafica_resumen = crear_grafica(BACKEND_GRAFICA, [0, max(self.lector.duracion, 1)], 'Sesion completa')
+        self.grafica_resumen.widget.setMaximumHeight(180)
+        plot_layout.addWidget(self.grafica_resumen.widget)
+
+        self.grafica_detalle = crear_grafica(BACKEND_GRAFICA, [0, self.ancho], 'ECG')
+        plot_layout.addWidget(self.grafica_detalle.widget, stretch=1)
+
+        controles = QHBoxLayout()
+        self.barra = QScrollBar(Qt.Horizontal)
+        self.barra.valueChanged.connect(self.actualizar_detalle)
+        controles.addWidget(self.barra, stretch=1)
+
+        self.combo_zoom = QComboBox()
+        self.combo_zoom.addItems([nombre for nombre, _ in ZOOMS])
+        self.combo_zoom.setCurrentIndex(1)
+        self.combo_zoom.setStyleSheet("background-color: #333333; color: white;")
+        self.combo_zoom.currentIndexChanged.connect(self.cambiar_zoom)
+        controles.addWidget(self.combo_zoom)
+
+        self.lbl_posicion = QLabel("")
+        self.lbl_posicion.setStyleSheet("color: gray; font-size: 11px;")
+        controles.addWidget(self.lbl_posicion)
+        plot_layout.addLayout(controles)
+
+        self.lista_eventos = QListWidget()
+        self.lista_eventos.setStyleSheet("background-color: #1E1E1E; color: white; border: 1px solid #333333;")
+        for t, tipo, detalle, valor in self.lector.eventos:
+            item = QListWidgetItem(f"{formatear_tiempo(t)}  {tipo}  {detalle} {valor}")
+            item.setData(Qt.UserRole, t)
+            if tipo == "ALARMA":
+                item.setForeground(Qt.red)
+            self.lista_eventos.addItem(item)
+        self.lista_eventos.itemClicked.connect(self.ir_a_evento)
+
+        main_layout.addLayout(plot_layout, stretch=4)
+        main_layout.addWidget(self.lista_eventos, stretch=1)
+        self.configurar_barra()
+
+    def configurar_barra(self):
+        ancho = self.ancho or self.lector.duracion
+        maximo = max(0, int((self.lector.duracion - ancho) * RESOLUCION_BARRA))
+        self.barra.setRange(0, maximo)
+        self.barra.setPageStep(max(1, int(ancho * RESOLUCION_BARRA)))
+        self.barra.setEnabled(maximo > 0)
+
+    def mostrar_resumen(self):
+        t, y = self.lector.ventana_decimada(0, self.lector.duracion, PUNTOS_MAX)
+        self.grafica_resumen.mostrar(t, y)
+
+    def cambiar_zoom(self, indice):
+        centro = self.barra.value() / RESOLUCION_BARRA + (self.ancho or 0) / 2
+        self.ancho = ZOOMS[indice][1]
+        self.configurar_barra()
+        self.ir_a(centro)
+        self.actualizar_detalle()
+
+    def ir_a(self, t_centro):
+        ancho = self.ancho or self.lector.duracion
+        self.barra.setValue(int(max(0, t_centro - ancho / 2) * RESOLUCION_BARRA))
+
+    def ir_a_evento(self, item):
+        self.ir_a(item.data(Qt.UserRole))
+
+    def actualizar_detalle(self, *args):
+        t0 = self.barra.value() / RESOLUCION_BARRA
+        t1 = t0 + (self.ancho or self.lector.duracion)
+        t, y = self.lector.ventana_decimada(t0, t1, PUNTOS_MAX)
+        self.grafica_detalle.mostrar(t, y)
+
+        texto = f"{formatear_tiempo(t0)} - {formatear_tiempo(t1)}"
+        stats = self.lector.stats
+        if len(stats):
+            fila = stats[max(0, stats[:, 0].searchsorted(t1) - 1)]
+            texto += f" | SPO2 {int(fila[1])}% HR {int(fila[2])}"
+        self.lbl_posicion.setText(texto)
+
+    def closeEvent(self, event):
+        self.lector.cerrar()
+        event.accept()
+
+
+def elegir_historial(parent=None):
+    path, _ = QFileDialog.getOpenFileName(parent, "Abrir historial", "",
+                                          "Historiales (*.txt *.ecgb);;Todos (*)")
+    return path
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    path = sys.argv[1] if len(sys.argv) > 1 else elegir_historial()
+    if not path:
+        sys.exit(0)
+    window = VentanaRevision(path)
+    window.show()
+    sys.exit(app.exec_())